@@ -92,6 +92,24 @@ parameters = [
 ]
 
 
+# ------------------------------------------------------------
+# filters
+#
+# Optional WHERE predicates, combined with AND.
+#
+# `spotify.silver.fact_stream` is partitioned by `stream_date`
+# (derived from `stream_timestamp`), so a bound on that column
+# prunes whole partitions before the joins run. The list is empty
+# by default (all history); to read the last 30 days only:
+#
+#   filters = [
+#       "fact_stream.stream_date >= date_sub(current_date(), 30)",
+#   ]
+# ------------------------------------------------------------
+
+filters = []
+
+
 # COMMAND ----------
 
 # MAGIC %md
@@ -201,6 +219,7 @@ from jinja2 import Template
 #     - alias     : table alias used in the query
 #     - cols      : comma-separated column list
 #     - condition : (optional) join condition
+#   filters: list of SQL predicates (may be empty)
 #
 # Conventions:
 #   - parameters[0] is treated as the BASE (fact) table
@@ -218,6 +237,9 @@ FROM {{ parameters[0].table }} AS {{ parameters[0].alias }}
 LEFT JOIN {{ param.table }} AS {{ param.alias }}
     ON {{ param.condition }}
 {% endfor %}
+{% if filters %}
+WHERE {{ filters | join(' AND ') }}
+{% endif %}
 """
 
 
@@ -238,6 +260,10 @@ LEFT JOIN {{ param.table }} AS {{ param.alias }}
 #    - Emits a LEFT JOIN for each
 #    - Uses the provided join condition
 #
+# 4) WHERE clause
+#    - Only emitted when `filters` is non-empty
+#    - Predicates are joined with AND
+#
 # Result
 # ------
 # After rendering, this template produces a valid SQL query
@@ -285,7 +311,7 @@ jinja_sql_str = Template(query_text)
 #     resolved
 # ------------------------------------------------------------
 
-query = jinja_sql_str.render(parameters=parameters)
+query = jinja_sql_str.render(parameters=parameters, filters=filters)
 
 
 # ------------------------------------------------------------
@@ -1,22 +1,42 @@
+# ============================================================
+# Delta Live Tables (DLT): generated dim_date
+#
+# The calendar is generated (utilities/date_dimension.py) instead of
+# streaming `spotify.silver.dim_date` through an SCD2 CDC flow: no
+# streaming query, no CDC state, and no versions of days that never
+# change.
+#
+# - Covers whole years from the first to the last fact date; facts
+#   beyond the end extend it on the next refresh
+# - Same key and columns as before (date_key, date, day, month, year,
+#   weekday_id) plus ISO week, fiscal and holiday attributes
+# - The dim_date rules still run as expectations (warn only), on the
+#   rule predicates directly: there is no staging bitmask to test
+#
+# Full recompute, on purpose
+# --------------------------
+# The materialized view is regenerated in full on every update. That
+# is intentional: the calendar is a few hundred rows per year, built
+# from column expressions, and its only input is the min / max
+# `date_key` of the Silver facts (answered from Delta file statistics).
+# Generating only the missing range would need a streaming table and
+# append flows for no measurable gain, and would stop attribute
+# changes (e.g. FIXED_HOLIDAYS, fiscal start month) from reaching past
+# dates.
+#
+# NOTE:
+# dim_date changes from a streaming table to a materialized view:
+# run a FULL REFRESH of the Gold pipeline once after deploying.
+# ============================================================
+
 import dlt
 
-@dlt.table
-def dim_date_stg():
-    df = spark.readStream.table(
-        "spotify.silver.dim_date"
-    )
-    return df
+from utilities.date_dimension import calendar_bounds, generate_calendar
+from utilities.rules import TABLE_RULES
 
-dlt.create_streaming_table("dim_date")
 
-dlt.create_auto_cdc_flow(
-    target = "dim_date",
-    source = "dim_date_stg",
-    keys = ["date_key"],
-    sequence_by = "date",
-    stored_as_scd_type = 2,
-    track_history_column_list = None,
-    track_history_except_column_list = None,
-    name = None,
-    once = False
-)
\ No newline at end of file
+@dlt.table(name="dim_date", comment="Generated calendar covering every fact date (whole years).")
+@dlt.expect_all(TABLE_RULES["dim_date"])
+def dim_date():
+    facts = spark.read.table("spotify.silver.fact_stream").select("date_key")
+    return generate_calendar(calendar_bounds(facts))
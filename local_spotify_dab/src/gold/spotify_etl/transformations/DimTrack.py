@@ -11,6 +11,7 @@
 # What this code does (high level)
 # -------------------------------
 # 1) Defines a staging DLT table/view `dim_track_stg` that streams from Silver
+#    and validates it; failing rows go to `dim_track_quarantine`
 # 2) Creates the target streaming table `dim_track`
 # 3) Applies CDC into `dim_track` using SCD Type 2 semantics
 #
@@ -23,21 +24,32 @@
 # ============================================================
 
 import dlt
+from pyspark.sql.functions import expr
+
+from utilities.quarantine import split_validated
+from utilities.rules import DQ_COLUMN, expectations, with_validation
+from utilities.scd import tracked_columns
+from utilities.silver_reader import CHANGE_COLUMNS, read_silver
+from utilities.staging import staging
 
 
 # ------------------------------------------------------------
 # 1) Staging stream
 #
-# Why a staging table?
+# Why a staging dataset?
 # - Provides a stable named source for the CDC flow
 # - Keeps the streaming read isolated and easy to inspect/debug
+# - A non-materialized view by default: nothing is written before the
+#   CDC flow (opt-in table for debugging, see utilities/staging.py)
 #
 # NOTE:
-# - `spark.readStream.table(...)` treats the source as a streaming input.
+# - `read_silver(...)` streams the Silver Change Data Feed, so only rows
+#   that actually changed reach the CDC flow (utilities/silver_reader.py)
 # - The upstream Silver table must support streaming reads.
 # ------------------------------------------------------------
 
-@dlt.table
+@staging
+@dlt.expect_all(expectations("dim_track"))
 def dim_track_stg():
     """
     Staging stream for dim_track CDC.
@@ -45,12 +57,28 @@ def dim_track_stg():
     Returns
     -------
     pyspark.sql.DataFrame
-        Streaming DataFrame read from the Silver dimension table.
+        Streaming change feed of the Silver dimension table, with the
+        `_dq_failed` validation bitmask.
     """
-    df = spark.readStream.table("spotify.silver.dim_track")
+    df = with_validation(read_silver(spark, "spotify.silver.dim_track"), "dim_track")
     return df
 
 
+# ------------------------------------------------------------
+# 1b) Quarantine split (utilities/quarantine.py)
+#
+# - dim_track_valid: view of the staged rows that passed every rule;
+#   source of the CDC flow below
+# - dim_track_quarantine: staged rows that failed a rule, with the
+#   failed-rule bitmask and names, instead of being dropped
+#
+# Rules are evaluated in the staging dataset; per-rule counts are
+# reported by `expect_all` in the DLT event log.
+# ------------------------------------------------------------
+
+split_validated("dim_track", "dim_track_stg")
+
+
 # ------------------------------------------------------------
 # 2) Create the target table
 #
@@ -76,6 +104,16 @@ dlt.create_streaming_table("dim_track")
 #   - SCD Type 2 tracks history by inserting a new row version
 #     whenever relevant attributes change.
 #
+# track_history_column_list:
+#   - Only artist_id, album_name changes open a new version
+#     (utilities/scd.py); other changes update the current version
+#     in place (SCD1), e.g. an `updated_at`-only bump
+#
+# apply_as_deletes / except_column_list:
+#   - Deletes from the Silver change feed are applied to the target
+#   - `_change_type` / `_commit_timestamp` only route the change; not stored in Gold
+#   - `_dq_failed` is always 0 on valid rows; not stored either
+#
 # once:
 #   - If False, the flow runs continuously (pipeline-dependent).
 #   - If True, it attempts a one-time processing run (where supported).
@@ -83,11 +121,13 @@ dlt.create_streaming_table("dim_track")
 
 dlt.create_auto_cdc_flow(
     target="dim_track",
-    source="dim_track_stg",
+    source="dim_track_valid",
     keys=["track_id"],
     sequence_by="updated_at",
     stored_as_scd_type=2,
-    track_history_column_list=None,
+    apply_as_deletes=expr("_change_type = 'delete'"),
+    except_column_list=[*CHANGE_COLUMNS, DQ_COLUMN],
+    track_history_column_list=tracked_columns("dim_track"),
     track_history_except_column_list=None,
     name=None,
     once=False,
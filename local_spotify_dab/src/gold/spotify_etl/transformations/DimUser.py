@@ -8,13 +8,16 @@
 # over time using a change sequence column (`updated_at`) and a business key
 # (`user_id`).
 #
-# This version also introduces a simple data quality rule:
-#   - Drop records where `user_id` is NULL
+# Data quality rules (utilities/rules.py) quarantine records where, e.g.:
+#   - `user_id` is NULL
+#   - `start_date` is after `end_date`
+#   - `subscription_type_id` is the Unknown code
 #
 # What this code does (high level)
 # -------------------------------
 # 1) Defines a staging DLT table/view `dim_user_stg` that streams from Silver
-# 2) Creates the target streaming table `dim_user` with expectations enforced
+#    and validates it; failing rows go to `dim_user_quarantine`
+# 2) Creates the target streaming table `dim_user`
 # 3) Applies CDC into `dim_user` using SCD Type 2 semantics
 #
 # Assumptions
@@ -26,40 +29,50 @@
 # ============================================================
 
 import dlt
+from pyspark.sql.functions import expr
+
+from utilities.quarantine import split_validated
+from utilities.rules import DQ_COLUMN, expectations as rule_expectations, with_validation
+from utilities.scd import tracked_columns
+from utilities.silver_reader import CHANGE_COLUMNS, read_silver
+from utilities.staging import staging
 
 
 # ------------------------------------------------------------
 # 0) Data quality expectations
 #
-# expectations:
-#   - Dictionary of named rules → SQL boolean expressions
-#
-# expect_all_or_drop:
-#   - Rows that fail ANY expectation are dropped from the target table
+# Rules live in utilities/rules.py (TABLE_RULES["dim_user"]):
+#   - `with_validation` evaluates ALL rules in one projection and
+#     stores the failed-rule bitmask in `_dq_failed`
+#   - `expectations("dim_user")` maps every rule name to a bit test
+#     on that mask, e.g. {"user_id_not_null": "_dq_failed & 1 = 0"}
 #
-# NOTE:
-# Keep expectation names descriptive (e.g. "user_id_not_null") so DLT logs
-# are easy to interpret when reviewing pipeline quality metrics.
+# expect_all:
+#   - Records pass / fail counts per rule name in the DLT event log
+#   - Rows are NOT dropped here: they are routed by the quarantine split
 # ------------------------------------------------------------
 
-expectations = {
-    "rule 1": "user_id IS NOT NULL",
-}
+expectations = rule_expectations("dim_user")
 
 
 # ------------------------------------------------------------
 # 1) Staging stream
 #
-# Why a staging table?
+# Why a staging dataset?
 # - Keeps the source read isolated and easy to inspect
 # - Provides a stable `source` name for the CDC flow
+# - A non-materialized view by default: nothing is written before the
+#   CDC flow (opt-in table for debugging, see utilities/staging.py)
 #
 # NOTE:
-# - `spark.readStream.table(...)` treats the source as a streaming input.
+# - `read_silver(...)` streams the Silver Change Data Feed, so only rows
+#   that actually changed reach the CDC flow (utilities/silver_reader.py)
 # - The upstream Silver table must support streaming reads.
+# - Expectations are recorded here, where `_dq_failed` exists.
 # ------------------------------------------------------------
 
-@dlt.table
+@staging
+@dlt.expect_all(expectations)
 def dim_user_stg():
     """
     Staging stream for dim_user CDC.
@@ -67,21 +80,34 @@ def dim_user_stg():
     Returns
     -------
     pyspark.sql.DataFrame
-        Streaming DataFrame read from the Silver dimension table.
+        Streaming change feed of the Silver dimension table, with the
+        `_dq_failed` validation bitmask.
     """
-    df = spark.readStream.table("spotify.silver.dim_user")
+    df = with_validation(read_silver(spark, "spotify.silver.dim_user"), "dim_user")
     return df
 
 
 # ------------------------------------------------------------
-# 2) Create the target table with expectations
+# 1b) Quarantine split (utilities/quarantine.py)
+#
+# - dim_user_valid: view of the staged rows that passed every rule;
+#   source of the CDC flow below
+# - dim_user_quarantine: staged rows that failed a rule, with the
+#   failed-rule bitmask and names, instead of being dropped
+#
+# Rules are evaluated in the staging dataset; per-rule counts are
+# reported by `expect_all` in the DLT event log.
+# ------------------------------------------------------------
+
+split_validated("dim_user", "dim_user_stg")
+
+
+# ------------------------------------------------------------
+# 2) Create the target table
 #
 # name:
 #   - Target DLT table name (`dim_user`)
 #
-# expect_all_or_drop:
-#   - Apply all expectations and drop failing rows
-#
 # Practical tip:
 # - Start with strict rules (like non-null keys) and expand gradually.
 # - Avoid overly strict rules early unless you're sure they won't drop
@@ -90,7 +116,6 @@ def dim_user_stg():
 
 dlt.create_streaming_table(
     name="dim_user",
-    expect_all_or_drop=expectations,
 )
 
 
@@ -107,6 +132,16 @@ dlt.create_streaming_table(
 # stored_as_scd_type = 2:
 #   - SCD Type 2: inserts new versions of rows when changes occur
 #
+# track_history_column_list:
+#   - Only country, subscription_type_id changes open a new version
+#     (utilities/scd.py); other changes update the current version
+#     in place (SCD1), e.g. an `updated_at`-only bump
+#
+# apply_as_deletes / except_column_list:
+#   - Deletes from the Silver change feed are applied to the target
+#   - `_change_type` / `_commit_timestamp` only route the change; not stored in Gold
+#   - `_dq_failed` is always 0 on valid rows; not stored either
+#
 # once:
 #   - If False: run continuously (pipeline-dependent)
 #   - If True : run as a one-time processing flow (where supported)
@@ -114,11 +149,13 @@ dlt.create_streaming_table(
 
 dlt.create_auto_cdc_flow(
     target="dim_user",
-    source="dim_user_stg",
+    source="dim_user_valid",
     keys=["user_id"],
     sequence_by="updated_at",
     stored_as_scd_type=2,
-    track_history_column_list=None,
+    apply_as_deletes=expr("_change_type = 'delete'"),
+    except_column_list=[*CHANGE_COLUMNS, DQ_COLUMN],
+    track_history_column_list=tracked_columns("dim_user"),
     track_history_except_column_list=None,
     name=None,
     once=False,
@@ -1,5 +1,5 @@
 # ============================================================
-# Delta Live Tables (DLT): CDC flow for fact_stream (SCD Type 1)
+# Delta Live Tables (DLT): flows for fact_stream
 #
 # Goal
 # ----
@@ -11,6 +11,9 @@
 # - keys        : ["stream_id"]         (unique identifier for each fact event)
 # - sequence_by : "stream_timestamp"    (orders changes for each key)
 # - SCD type    : 1                     (overwrite / upsert semantics)
+# - Mode        : "merge" (default)     every event merged (SCD Type 1)
+#                 "append"              new events appended, corrections
+#                                       merged separately (utilities/facts.py)
 #
 # Why SCD Type 1 for a fact table?
 # -------------------------------
@@ -23,6 +26,9 @@
 #   - the record for a given stream_id is updated in place
 #   - history is not preserved (unlike SCD Type 2)
 #
+# In "append" mode only the corrections are merged; the latest truth
+# is the view `fact_stream_current`.
+#
 # Assumptions
 # -----------
 # - `spotify.silver.fact_stream` exists and is readable by the pipeline
@@ -32,21 +38,32 @@
 # ============================================================
 
 import dlt
+from pyspark.sql.functions import col, expr, lit
+
+from utilities.facts import DELETED_COLUMN, current_facts, fact_mode, is_correction
+from utilities.quarantine import split_validated
+from utilities.rules import DQ_COLUMN, expectations, with_validation
+from utilities.silver_reader import CHANGE_COLUMNS, read_silver
+from utilities.staging import staging
 
 
 # ------------------------------------------------------------
 # 1) Staging stream
 #
-# Why a staging table?
+# Why a staging dataset?
 # - Provides a stable named source for the CDC flow
 # - Keeps the streaming read isolated and easy to inspect/debug
+# - A non-materialized view by default: nothing is written before the
+#   CDC flow (opt-in table for debugging, see utilities/staging.py)
 #
 # NOTE:
-# - `spark.readStream.table(...)` treats the source as a streaming input.
+# - `read_silver(...)` streams the Silver Change Data Feed, so only rows
+#   that actually changed reach the CDC flow (utilities/silver_reader.py)
 # - The upstream Silver table must support streaming reads.
 # ------------------------------------------------------------
 
-@dlt.table
+@staging
+@dlt.expect_all(expectations("fact_stream"))
 def fact_stream_stg():
     """
     Staging stream for fact_stream CDC.
@@ -54,50 +71,138 @@ def fact_stream_stg():
     Returns
     -------
     pyspark.sql.DataFrame
-        Streaming DataFrame read from the Silver fact table.
+        Streaming change feed of the Silver fact table, with the
+        `_dq_failed` validation bitmask.
     """
-    df = spark.readStream.table("spotify.silver.fact_stream")
+    df = with_validation(read_silver(spark, "spotify.silver.fact_stream"), "fact_stream")
     return df
 
 
 # ------------------------------------------------------------
-# 2) Create the target table
+# 1b) Quarantine split (utilities/quarantine.py)
 #
-# This declares the target table that will receive CDC-applied rows.
+# - fact_stream_valid: view of the staged rows that failed no
+#   quarantining rule; source of the flows below
+# - fact_stream_quarantine: staged rows that failed a rule, with the
+#   failed-rule bitmask and names, instead of being dropped
+# - device_type_known is warn-only (WARN_RULES): an unknown device is
+#   counted by its expectation, the event still reaches fact_stream
+#
+# Rules are evaluated in the staging dataset; per-rule counts are
+# reported by `expect_all` in the DLT event log.
 # ------------------------------------------------------------
 
-dlt.create_streaming_table("fact_stream")
+split_validated("fact_stream", "fact_stream_stg")
 
 
 # ------------------------------------------------------------
-# 3) Apply CDC as SCD Type 1
-#
-# keys:
-#   - Unique identifier for fact events (`stream_id`)
-#   - Used to match incoming records to existing target records
-#
-# sequence_by:
-#   - Orders changes for each key (`stream_timestamp`)
-#   - Must be reliable; if events arrive out of order, updates could be applied
-#     incorrectly without a stable sequencing strategy
-#
-# stored_as_scd_type = 1:
-#   - SCD Type 1: maintain the latest version only (overwrite/upsert)
-#   - No historical row versions are kept
+# 2) Create the target table
 #
-# once:
-#   - If False: run continuously (pipeline-dependent)
-#   - If True : run as a one-time processing run (where supported)
+# This declares the target table that will receive CDC-applied rows
+# ("merge" mode) or the appended new events ("append" mode).
 # ------------------------------------------------------------
 
-dlt.create_auto_cdc_flow(
-    target="fact_stream",
-    source="fact_stream_stg",
-    keys=["stream_id"],
-    sequence_by="stream_timestamp",
-    stored_as_scd_type=1,
-    track_history_column_list=None,
-    track_history_except_column_list=None,
-    name=None,
-    once=False,
-)
+dlt.create_streaming_table("fact_stream")
+
+
+if fact_mode() == "merge":
+
+    # --------------------------------------------------------
+    # 3) "merge" mode (default): apply CDC as SCD Type 1
+    #
+    # keys:
+    #   - Unique identifier for fact events (`stream_id`)
+    #   - Used to match incoming records to existing target records
+    #
+    # sequence_by:
+    #   - Orders changes for each key (`stream_timestamp`)
+    #   - Must be reliable; if events arrive out of order, updates could be applied
+    #     incorrectly without a stable sequencing strategy
+    #
+    # stored_as_scd_type = 1:
+    #   - SCD Type 1: maintain the latest version only (overwrite/upsert)
+    #   - No historical row versions are kept
+    #   - Every micro-batch is a MERGE against the whole fact table
+    #
+    # apply_as_deletes / except_column_list:
+    #   - Deletes from the Silver change feed are applied to the target
+    #   - `_change_type` / `_commit_timestamp` only route the change; not stored in Gold
+    #   - `_dq_failed` only holds warn-only bits on valid rows; not stored either
+    #
+    # once:
+    #   - If False: run continuously (pipeline-dependent)
+    #   - If True : run as a one-time processing run (where supported)
+    # --------------------------------------------------------
+
+    dlt.create_auto_cdc_flow(
+        target="fact_stream",
+        source="fact_stream_valid",
+        keys=["stream_id"],
+        sequence_by="stream_timestamp",
+        stored_as_scd_type=1,
+        apply_as_deletes=expr("_change_type = 'delete'"),
+        except_column_list=[*CHANGE_COLUMNS, DQ_COLUMN],
+        track_history_column_list=None,
+        track_history_except_column_list=None,
+        name=None,
+        once=False,
+    )
+
+else:
+
+    # --------------------------------------------------------
+    # 3) "append" mode: new events are appended
+    #
+    # - No key matching: each micro-batch only writes its own rows
+    # - Corrections (Silver update / delete, late events) are routed
+    #   to the corrections path below instead (utilities/facts.py)
+    # --------------------------------------------------------
+
+    @dlt.append_flow(target="fact_stream", name="fact_stream_new_events")
+    def fact_stream_new_events():
+        return dlt.read_stream("fact_stream_valid").where(~is_correction()).drop(*CHANGE_COLUMNS, DQ_COLUMN)
+
+    # --------------------------------------------------------
+    # 3b) Corrections: SCD Type 1 on a small table
+    #
+    # - The MERGE only matches against previous corrections, not
+    #   against every fact
+    # - Deletes are kept as tombstones (`is_deleted`) so that the
+    #   deleted event is hidden from fact_stream_current
+    # --------------------------------------------------------
+
+    @dlt.view(name="fact_stream_correction_feed", comment="Corrections routed out of the append-only path.")
+    def fact_stream_correction_feed():
+        return (
+            dlt.read_stream("fact_stream_valid")
+            .where(is_correction())
+            .withColumn(DELETED_COLUMN, col("_change_type") == lit("delete"))
+        )
+
+    dlt.create_streaming_table("fact_stream_corrections")
+
+    dlt.create_auto_cdc_flow(
+        target="fact_stream_corrections",
+        source="fact_stream_correction_feed",
+        keys=["stream_id"],
+        sequence_by="stream_timestamp",
+        stored_as_scd_type=1,
+        except_column_list=[*CHANGE_COLUMNS, DQ_COLUMN],
+        name=None,
+        once=False,
+    )
+
+    # --------------------------------------------------------
+    # 3c) Latest truth for readers
+    #
+    # Appended events without a correction, plus the live
+    # corrections (`current_fact_table()` in utilities/facts.py)
+    #
+    # - A view: evaluated by its readers, nothing is copied on update
+    # - Readers outside the pipeline use the Unity Catalog view created
+    #   by `python -m utilities.facts` (utilities/facts.py)
+    # --------------------------------------------------------
+
+    @dlt.view(name="fact_stream_current", comment="Latest version of every fact event.")
+    def fact_stream_current():
+        return current_facts(dlt.read("fact_stream"), dlt.read("fact_stream_corrections"))
@@ -0,0 +1,64 @@
+# ============================================================
+# Delta Live Tables (DLT): fact_stream with dimension versions
+#
+# Goal
+# ----
+# Resolve, for every stream, the SCD2 version of its user, track and
+# artist that was current at `stream_timestamp`, as surrogate keys:
+#
+#   user_version_key   : dim_user   version current at the stream
+#   track_version_key  : dim_track  version current at the stream
+#   artist_version_key : dim_artist version current at the stream
+#                        (artist of the track version above)
+#
+# Joining a version key back to its dimension gives the attributes
+# as they were when the stream happened:
+#
+#   fact_stream_versions.user_version_key
+#     = xxhash64(dim_user.user_id, dim_user.__START_AT)
+#
+# Key design choices
+# ------------------
+# - Point-in-time joins (utilities/point_in_time.py): the plain
+#   key + interval join by default; dimensions with deep histories
+#   (~100+ versions per key) can use the binned range join instead,
+#   via the pipeline configuration `spotify.gold.pit_join`
+# - Reads the latest truth of the facts (`current_fact_table()`,
+#   utilities/facts.py), whatever the fact ingestion mode
+# - Materialized view: a late dimension change re-resolves the facts
+#   it affects on the next update
+#
+# A stream with no version current at its timestamp (e.g. before the
+# first version of its user) keeps a null version key.
+# ============================================================
+
+import dlt
+
+from utilities.facts import current_fact_table
+from utilities.point_in_time import point_in_time_join
+
+
+@dlt.table(
+    name="fact_stream_versions",
+    comment="fact_stream with the dim_user / dim_track / dim_artist version current at each stream.",
+)
+def fact_stream_versions():
+    """
+    Facts with point-in-time dimension version keys.
+
+    Returns
+    -------
+    pyspark.sql.DataFrame
+        Every fact column plus `user_version_key`, `track_version_key`
+        and `artist_version_key`.
+    """
+    facts = dlt.read(current_fact_table())
+
+    df = point_in_time_join(facts, dlt.read("dim_user"), "dim_user", ["user_id"], "stream_timestamp", "user_version_key")
+    df = point_in_time_join(
+        df, dlt.read("dim_track"), "dim_track", ["track_id"], "stream_timestamp", "track_version_key", carry=["artist_id"]
+    )
+    df = point_in_time_join(
+        df, dlt.read("dim_artist"), "dim_artist", ["artist_id"], "stream_timestamp", "artist_version_key"
+    )
+    return df.drop("artist_id")
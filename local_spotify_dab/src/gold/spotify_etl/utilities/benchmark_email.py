@@ -0,0 +1,103 @@
+# ============================================================
+# Benchmark: email validation implementations
+#
+# Validates generated user rows with:
+#   - row_udf : the previous row-at-a-time Python @udf (re.match)
+#   - pandas  : is_valid_email_pandas (Arrow batches)
+#   - rlike   : is_valid_email (native, JVM only)
+#
+# Each run forces full evaluation (count of valid rows) over a
+# cached input, so only the validation itself is timed. The three
+# implementations must agree on the number of valid rows.
+#
+# Usage (from src/gold/spotify_etl)
+# ---------------------------------
+#   python -m utilities.benchmark_email --rows 3000000
+# ============================================================
+
+import argparse
+import re
+import time
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.functions import col, concat, lit, udf, when
+from pyspark.sql.types import BooleanType
+
+from utilities.utils import EMAIL_PATTERN, is_valid_email, is_valid_email_pandas
+
+
+@udf(returnType=BooleanType())
+def is_valid_email_row_udf(email):
+    """Previous implementation (baseline only)."""
+    if email is None:
+        return False
+    return re.match(EMAIL_PATTERN, email) is not None
+
+
+def generate_users(spark: SparkSession, rows: int) -> DataFrame:
+    """
+    User rows with a mix of valid, malformed and NULL emails.
+    """
+    user = col("id")
+    return spark.range(rows).select(
+        user.cast("int").alias("user_id"),
+        when(user % 50 == 0, lit(None))
+        .when(user % 10 == 1, concat(lit("user"), user.cast("string"), lit("@example")))
+        .when(user % 10 == 2, concat(lit("user "), user.cast("string"), lit("@example.com")))
+        .otherwise(concat(lit("user."), user.cast("string"), lit("@example.com")))
+        .alias("email"),
+    )
+
+
+def benchmark(spark: SparkSession, rows: int, repeats: int = 3) -> dict:
+    """
+    Rows/sec of every implementation (best of `repeats`).
+
+    Returns
+    -------
+    dict
+        {name: (rows_per_sec, valid_rows)}
+    """
+    users = generate_users(spark, rows).cache()
+    users.count()
+
+    implementations = {
+        "row_udf": is_valid_email_row_udf(col("email")),
+        "pandas": is_valid_email_pandas(col("email")),
+        "rlike": is_valid_email(col("email")),
+    }
+
+    results = {}
+    for name, check in implementations.items():
+        best, valid = None, None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            valid = users.where(check).count()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = (rows / best, valid)
+
+    users.unpersist()
+
+    if len({valid for _, valid in results.values()}) != 1:
+        raise AssertionError(f"Implementations disagree on valid rows: {results}")
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark email validation implementations.")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.appName("benchmark_email").getOrCreate()
+
+    results = benchmark(spark, args.rows, args.repeats)
+    baseline = results["row_udf"][0]
+    for name, (rows_per_sec, valid) in results.items():
+        print(f"{name:8s} {rows_per_sec:>14,.0f} rows/sec  x{rows_per_sec / baseline:5.1f}  valid={valid:,}")
+
+
+if __name__ == "__main__":
+    main()
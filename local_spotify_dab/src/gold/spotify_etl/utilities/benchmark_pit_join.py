@@ -0,0 +1,101 @@
+# ============================================================
+# Benchmark: naive vs binned point-in-time join
+#
+# Synthetic SCD2 dimension with `depth` versions per key, spread
+# evenly over `days`, and facts with random keys and timestamps in
+# the same range. Both joins must resolve the same version keys
+# (matched rows and a checksum of the keys).
+#
+# Usage (from src/gold/spotify_etl)
+# ---------------------------------
+#   python -m utilities.benchmark_pit_join --keys 1000 --depth 1 --depth 64 --depth 4096
+# ============================================================
+
+import argparse
+import time
+from typing import Optional
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from utilities.point_in_time import END_COLUMN, START_COLUMN, binned_join, naive_join
+
+
+EPOCH = 1_700_000_000
+
+
+def synthetic_dim(spark: SparkSession, keys: int, depth: int, days: int) -> DataFrame:
+    """`keys` × `depth` versions; the last version of each key is open."""
+    step = days * 86400 // depth
+    return (
+        spark.range(keys * depth)
+        .select(
+            (F.col("id") % keys).cast("int").alias("user_id"),
+            (F.col("id") / keys).cast("int").alias("_n"),
+        )
+        .select(
+            "user_id",
+            F.timestamp_seconds(F.lit(EPOCH) + F.col("_n") * step).alias(START_COLUMN),
+            F.when(F.col("_n") < depth - 1, F.timestamp_seconds(F.lit(EPOCH) + (F.col("_n") + 1) * step)).alias(END_COLUMN),
+        )
+    )
+
+
+def synthetic_facts(spark: SparkSession, rows: int, keys: int, days: int) -> DataFrame:
+    return spark.range(rows).select(
+        F.col("id").alias("stream_id"),
+        (F.rand(1) * keys).cast("int").alias("user_id"),
+        F.timestamp_seconds(F.lit(EPOCH) + (F.rand(2) * days * 86400).cast("long")).alias("stream_timestamp"),
+    )
+
+
+def _run(df: DataFrame):
+    """(seconds, matched rows, checksum) of a full evaluation."""
+    start = time.perf_counter()
+    row = df.agg(
+        F.count("user_version_key").alias("matched"),
+        F.sum(F.col("user_version_key") % 1_000_003).alias("checksum"),
+    ).first()
+    return time.perf_counter() - start, row["matched"], row["checksum"]
+
+
+def benchmark(spark: SparkSession, depths, keys: int, facts: int, days: int, bin_seconds: Optional[int] = None):
+    facts_df = synthetic_facts(spark, facts, keys, days).cache()
+    facts_df.count()
+
+    results = []
+    for depth in depths:
+        dim = synthetic_dim(spark, keys, depth, days).cache()
+        dim.count()
+
+        naive_s, naive_rows, naive_sum = _run(naive_join(facts_df, dim, ["user_id"], "stream_timestamp", "user_version_key"))
+        binned_s, binned_rows, binned_sum = _run(
+            binned_join(facts_df, dim, ["user_id"], "stream_timestamp", "user_version_key", bin_seconds=bin_seconds)
+        )
+        if (naive_rows, naive_sum) != (binned_rows, binned_sum):
+            raise AssertionError(f"depth {depth}: binned join differs from the naive join")
+
+        results.append((depth, naive_s, binned_s, naive_rows))
+        dim.unpersist()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Naive vs binned point-in-time join.")
+    parser.add_argument("--depth", type=int, action="append", help="Versions per key (repeatable).")
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--facts", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--bin-seconds", type=int, help="Fixed bin width (default: average version lifetime).")
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.appName("benchmark_pit_join").getOrCreate()
+    depths = args.depth or [1, 16, 64, 256, 1024]
+
+    print(f"{'depth':>6} {'naive_s':>9} {'binned_s':>9} {'speedup':>8} {'matched':>10}")
+    for depth, naive_s, binned_s, matched in benchmark(spark, depths, args.keys, args.facts, args.days, args.bin_seconds):
+        print(f"{depth:>6} {naive_s:>9.2f} {binned_s:>9.2f} {naive_s / binned_s:>7.1f}x {matched:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# ============================================================
+# Benchmark: Gold staging as views vs materialized tables
+#
+# Compares pipeline updates of the Gold pipeline, e.g. one full
+# refresh with the default staging views and one with
+#   spotify.gold.materialize_staging = "true"
+#
+# Per update:
+#   duration_s     : first → last `update_progress` event
+#   output_rows    : rows written by every flow (event log)
+#   written_bytes  : Delta `numOutputBytes` of every commit to the
+#                    Gold schema's tables during the update
+#   stg_bytes      : current size of the materialized `*_stg` tables
+#
+# Usage (notebook / job on Databricks)
+# ------------------------------------
+#   python -m utilities.benchmark_staging --pipeline-id <id> \
+#       --schema spotify.gold --update views=<update id> --update tables=<update id>
+# ============================================================
+
+import argparse
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+
+def update_window(spark: SparkSession, pipeline_id: str, update_id: str):
+    """(start, end, duration seconds) of one pipeline update."""
+    row = spark.sql(
+        f"""
+        SELECT min(timestamp) AS start, max(timestamp) AS end
+        FROM event_log('{pipeline_id}')
+        WHERE event_type = 'update_progress' AND origin.update_id = '{update_id}'
+        """
+    ).first()
+    return row["start"], row["end"], (row["end"] - row["start"]).total_seconds()
+
+
+def output_rows(spark: SparkSession, pipeline_id: str, update_id: str) -> int:
+    """Rows written by all flows of one update."""
+    row = spark.sql(
+        f"""
+        SELECT sum(CAST(details:flow_progress.metrics.num_output_rows AS BIGINT)) AS rows
+        FROM event_log('{pipeline_id}')
+        WHERE event_type = 'flow_progress' AND origin.update_id = '{update_id}'
+        """
+    ).first()
+    return int(row["rows"] or 0)
+
+
+def _tables(spark: SparkSession, schema: str):
+    return [row["tableName"] for row in spark.sql(f"SHOW TABLES IN {schema}").collect()]
+
+
+def written_bytes(spark: SparkSession, schema: str, start, end) -> int:
+    """Bytes committed to the tables of `schema` between `start` and `end`."""
+    total = 0
+    for table in _tables(spark, schema):
+        try:
+            history = spark.sql(f"DESCRIBE HISTORY {schema}.{table}")
+        except Exception:
+            # Views and tables without Delta history
+            continue
+        row = (
+            history.where(F.col("timestamp").between(start, end))
+            .agg(F.sum(F.col("operationMetrics")["numOutputBytes"].cast("bigint")).alias("bytes"))
+            .first()
+        )
+        total += int(row["bytes"] or 0)
+    return total
+
+
+def staging_bytes(spark: SparkSession, schema: str) -> int:
+    """Current size of the materialized staging tables."""
+    total = 0
+    for table in _tables(spark, schema):
+        if table.endswith("_stg"):
+            try:
+                total += spark.sql(f"DESCRIBE DETAIL {schema}.{table}").first()["sizeInBytes"] or 0
+            except Exception:
+                # Staging is a view in this update
+                continue
+    return total
+
+
+def benchmark(spark: SparkSession, pipeline_id: str, schema: str, updates: dict) -> DataFrame:
+    """
+    One row per labelled update.
+
+    Parameters
+    ----------
+    updates:
+        {label: update_id}, e.g. {"views": "...", "tables": "..."}.
+    """
+    rows = []
+    for label, update_id in updates.items():
+        start, end, duration = update_window(spark, pipeline_id, update_id)
+        rows.append(
+            (
+                label,
+                update_id,
+                float(duration),
+                output_rows(spark, pipeline_id, update_id),
+                written_bytes(spark, schema, start, end),
+            )
+        )
+    result = spark.createDataFrame(
+        rows, "label STRING, update_id STRING, duration_s DOUBLE, output_rows BIGINT, written_bytes BIGINT"
+    )
+    # Storage of staging tables is only measurable for the current layout
+    return result.withColumn("stg_bytes_now", F.lit(staging_bytes(spark, schema)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Gold pipeline updates (staging views vs tables).")
+    parser.add_argument("--pipeline-id", required=True)
+    parser.add_argument("--schema", default="spotify.gold")
+    parser.add_argument("--update", action="append", required=True, help="label=update_id")
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.appName("benchmark_staging").getOrCreate()
+    updates = dict(item.split("=", 1) for item in args.update)
+    benchmark(spark, args.pipeline_id, args.schema, updates).show(truncate=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# ============================================================
+# Generated date dimension
+#
+# Purpose
+# -------
+# A calendar never changes: instead of streaming the Silver calendar
+# through an SCD2 CDC flow, `dim_date` is generated for a date range
+# with column expressions over `sequence(start, end)` (one row per
+# day, no Python per-row code).
+#
+# Columns
+# -------
+#   date_key, date, day, month, year, weekday_id   (as Silver dim_date;
+#                                                   weekday_id 1 = Monday)
+#   quarter, day_of_year, is_weekend
+#   iso_year, iso_week                 ISO 8601 week (weeks start on
+#                                      Monday; week 1 holds the first
+#                                      Thursday of the year)
+#   fiscal_year, fiscal_quarter,       fiscal year starting on the 1st of
+#   fiscal_month                       `fiscal_start_month`, named after
+#                                      the calendar year it ends in
+#   is_holiday, holiday_name           FIXED_HOLIDAYS + Easter-based
+#                                      EASTER_HOLIDAYS
+#
+# Range
+# -----
+# Whole calendar years from the first to the last fact date
+# (`calendar_bounds`), widened by the optional configured start / end.
+# When facts arrive beyond the end, the next refresh extends the
+# calendar to the end of their year.
+#
+# Pipeline configuration
+# ----------------------
+#   spotify.gold.calendar_start      : first date to cover (yyyy-MM-dd)
+#   spotify.gold.calendar_end        : last date to cover (yyyy-MM-dd)
+#   spotify.gold.fiscal_start_month  : 1..12 (default 1)
+# ============================================================
+
+from typing import Dict, Optional, Tuple
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+
+CALENDAR_START_CONF = "spotify.gold.calendar_start"
+CALENDAR_END_CONF = "spotify.gold.calendar_end"
+FISCAL_START_MONTH_CONF = "spotify.gold.fiscal_start_month"
+
+# (month, day) → name
+FIXED_HOLIDAYS: Dict[Tuple[int, int], str] = {
+    (1, 1): "New Year's Day",
+    (12, 25): "Christmas Day",
+    (12, 26): "Boxing Day",
+}
+
+# Days from Easter Sunday → name
+EASTER_HOLIDAYS: Dict[int, str] = {
+    -2: "Good Friday",
+    0: "Easter Sunday",
+    1: "Easter Monday",
+}
+
+
+def _conf(name: str, default: Optional[str] = None) -> Optional[str]:
+    spark = SparkSession.getActiveSession()
+    return spark.conf.get(name, default) if spark else default
+
+
+# ------------------------------------------------------------
+# 1) Range
+# ------------------------------------------------------------
+
+def calendar_bounds(facts: DataFrame, start: Optional[str] = None, end: Optional[str] = None) -> DataFrame:
+    """
+    One row (start, end) covering the fact dates in whole years.
+
+    Parameters
+    ----------
+    facts:
+        Any DataFrame with an int `date_key` (yyyyMMdd).
+    start, end:
+        Dates to cover in any case (yyyy-MM-dd); default: the pipeline
+        configuration, if set.
+    """
+    start = start or _conf(CALENDAR_START_CONF)
+    end = end or _conf(CALENDAR_END_CONF)
+
+    fact_date = F.to_date(F.col("date_key").cast("string"), "yyyyMMdd")
+    bounds = facts.agg(F.min(fact_date).alias("first"), F.max(fact_date).alias("last"))
+
+    first = F.least(F.col("first"), F.to_date(F.lit(start))) if start else F.col("first")
+    last = F.greatest(F.col("last"), F.to_date(F.lit(end))) if end else F.col("last")
+    # No facts yet: the configured dates, else the current year
+    first = F.coalesce(first, F.to_date(F.lit(start)) if start else F.current_date())
+    last = F.coalesce(last, F.to_date(F.lit(end)) if end else F.current_date())
+
+    return bounds.select(
+        F.trunc(first, "year").alias("start"),
+        F.date_add(F.add_months(F.trunc(last, "year"), 12), -1).alias("end"),
+    )
+
+
+# ------------------------------------------------------------
+# 2) Attributes
+# ------------------------------------------------------------
+
+def _easter_sunday(year: Column) -> Column:
+    """Gregorian Easter Sunday of `year` (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b = F.floor(year / 100)
+    c = year % 100
+    d = F.floor(b / 4)
+    e = b % 4
+    f = F.floor((b + 8) / 25)
+    g = F.floor((b - f + 1) / 3)
+    h = (19 * a + b - d - g + 15) % 30
+    i = F.floor(c / 4)
+    k = c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = F.floor((a + 11 * h + 22 * l) / 451)
+    month = F.floor((h + l - 7 * m + 114) / 31)
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return F.make_date(year, month.cast("int"), day.cast("int"))
+
+
+def _holiday_name(date: Column) -> Column:
+    name = F.lit(None).cast("string")
+    for (month, day), holiday in FIXED_HOLIDAYS.items():
+        name = F.when((F.month(date) == month) & (F.dayofmonth(date) == day), F.lit(holiday)).otherwise(name)
+    offset = F.datediff(date, _easter_sunday(F.year(date)))
+    for days, holiday in EASTER_HOLIDAYS.items():
+        name = F.when(offset == days, F.lit(holiday)).otherwise(name)
+    return name
+
+
+def date_attributes(dates: DataFrame, fiscal_start_month: int = 1) -> DataFrame:
+    """
+    Calendar attributes of a DataFrame with one `date` per row.
+    """
+    if not 1 <= fiscal_start_month <= 12:
+        raise ValueError(f"fiscal_start_month must be 1..12, got {fiscal_start_month!r}")
+
+    date = F.col("date")
+    # weekday(): 0 = Monday
+    weekday = F.weekday(date)
+    fiscal_month = (F.month(date) - fiscal_start_month + 12) % 12 + 1
+    fiscal_year = F.year(date) + F.when(F.month(date) >= fiscal_start_month, 1 if fiscal_start_month > 1 else 0).otherwise(0)
+
+    return dates.select(
+        F.date_format(date, "yyyyMMdd").cast("int").alias("date_key"),
+        date,
+        F.dayofmonth(date).cast("tinyint").alias("day"),
+        F.month(date).cast("tinyint").alias("month"),
+        F.year(date).cast("smallint").alias("year"),
+        (weekday + 1).cast("tinyint").alias("weekday_id"),
+        F.quarter(date).cast("tinyint").alias("quarter"),
+        F.dayofyear(date).cast("smallint").alias("day_of_year"),
+        (weekday >= 5).alias("is_weekend"),
+        # The ISO year is the year of the week's Thursday
+        F.year(F.date_add(date, 3 - weekday)).cast("smallint").alias("iso_year"),
+        F.weekofyear(date).cast("tinyint").alias("iso_week"),
+        fiscal_year.cast("smallint").alias("fiscal_year"),
+        ((fiscal_month - 1) / 3 + 1).cast("tinyint").alias("fiscal_quarter"),
+        fiscal_month.cast("tinyint").alias("fiscal_month"),
+        _holiday_name(date).isNotNull().alias("is_holiday"),
+        _holiday_name(date).alias("holiday_name"),
+    )
+
+
+# ------------------------------------------------------------
+# 3) Calendar
+# ------------------------------------------------------------
+
+def generate_calendar(bounds: DataFrame, fiscal_start_month: Optional[int] = None) -> DataFrame:
+    """
+    One row per day from `start` to `end` of the one-row `bounds`.
+    """
+    fiscal_start_month = fiscal_start_month or int(_conf(FISCAL_START_MONTH_CONF, "1"))
+    dates = bounds.select(F.explode(F.sequence(F.col("start"), F.col("end"))).alias("date"))
+    return date_attributes(dates, fiscal_start_month)
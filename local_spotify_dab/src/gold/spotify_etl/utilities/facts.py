@@ -0,0 +1,177 @@
+# ============================================================
+# fact_stream ingestion modes: append-only events + corrections
+#
+# Purpose
+# -------
+# An SCD Type 1 CDC flow MERGEs every micro-batch into the fact table
+# on `stream_id`: the cost of each batch grows with the table, even
+# though nearly every event is new. The opt-in "append" mode splits the
+# change feed instead:
+#
+#   fact_stream_valid ──┬── new events  → fact_stream              (append only)
+#                       └── corrections → fact_stream_corrections  (SCD1, small)
+#
+#   fact_stream_current = fact_stream without corrected ids
+#                         + live corrections            (view)
+#
+# A row is a correction when:
+#   - it is flagged by the change feed (`_change_type` update / delete:
+#     Silver updated or deleted an existing event), or
+#   - it is late: it reached Silver (`_commit_timestamp`, see
+#     utilities/silver_reader.py) more than the lateness threshold after
+#     its `stream_timestamp`, i.e. most likely a replay of an event that
+#     was already appended
+#
+# Lateness is measured against ingestion, not the wall clock, so a
+# backfill or initial load (the seed included) is late as a whole: its
+# events all take the corrections path. In append mode `fact_stream`
+# then holds only the events appended on time; the latest truth is
+# `fact_stream_current`, never `fact_stream`. "merge" therefore stays
+# the default, and "append" suits a Silver feed ingested as events
+# happen.
+#
+# Only corrections are merged, so ingestion cost depends on the batch
+# (and the corrections table), not on the size of the fact table.
+#
+# Deletes are kept in `fact_stream_corrections` as tombstones
+# (`is_deleted`): the deleted event is still in the append-only table
+# and must stay hidden from `fact_stream_current`.
+#
+# `fact_stream_current` is a view, not a materialized view: copying
+# the whole fact table on every update would bring back the cost the
+# append path removes. In the pipeline it is a DLT view; readers
+# outside the pipeline use the Unity Catalog view of the same name
+# (`create_current_view`, run once after the first update):
+#
+#   python -m utilities.facts --schema spotify.gold
+#
+# Pipeline configuration
+# ----------------------
+#   spotify.gold.fact_mode       : "merge" (default, SCD1 flow into
+#                                  fact_stream) or "append"
+#   spotify.gold.fact_late_after : lateness threshold (default "3 days")
+#
+# Assumption: a `stream_id` is only re-sent as a Silver update / delete
+# or more than the lateness threshold after its event; a duplicate
+# within the threshold would be appended twice.
+#
+# NOTE:
+# Switching mode changes the flows of `fact_stream`: run a FULL REFRESH
+# of the Gold pipeline afterwards.
+# ============================================================
+
+import argparse
+from typing import Optional
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql.functions import col, expr, lit
+
+
+FACT_MODE_CONF = "spotify.gold.fact_mode"
+DEFAULT_FACT_MODE = "merge"
+FACT_MODES = ("append", "merge")
+
+LATE_AFTER_CONF = "spotify.gold.fact_late_after"
+DEFAULT_LATE_AFTER = "3 days"
+
+DELETED_COLUMN = "is_deleted"
+
+
+def fact_mode() -> str:
+    """Ingestion mode of fact_stream from the pipeline configuration."""
+    spark = SparkSession.getActiveSession()
+    mode = spark.conf.get(FACT_MODE_CONF, DEFAULT_FACT_MODE).strip().lower() if spark else DEFAULT_FACT_MODE
+    if mode not in FACT_MODES:
+        raise ValueError(f"Unknown fact mode: {mode!r} (expected one of {FACT_MODES})")
+    return mode
+
+
+def late_after() -> str:
+    """Lateness threshold, as an interval string (e.g. "3 days")."""
+    spark = SparkSession.getActiveSession()
+    return spark.conf.get(LATE_AFTER_CONF, DEFAULT_LATE_AFTER) if spark else DEFAULT_LATE_AFTER
+
+
+def is_correction(threshold: Optional[str] = None) -> Column:
+    """
+    True for change-feed rows routed to the corrections path.
+
+    Needs `_change_type` and `_commit_timestamp` (utilities/silver_reader.py).
+    """
+    threshold = threshold or late_after()
+    flagged = col("_change_type") != lit("insert")
+    late = col("stream_timestamp") < col("_commit_timestamp") - expr(f"INTERVAL {threshold}")
+    # A null timestamp never gets here: `stream_timestamp_not_null` quarantines it
+    return flagged | late
+
+
+def current_fact_table(mode: Optional[str] = None) -> str:
+    """Gold dataset holding the latest version of every fact."""
+    return "fact_stream_current" if (mode or fact_mode()) == "append" else "fact_stream"
+
+
+def current_facts(events: DataFrame, corrections: DataFrame) -> DataFrame:
+    """
+    Latest version of every fact.
+
+    Parameters
+    ----------
+    events:
+        Append-only fact table (`fact_stream`).
+    corrections:
+        SCD1 corrections with the `is_deleted` tombstone flag
+        (`fact_stream_corrections`).
+
+    Returns
+    -------
+    DataFrame
+        Events without a correction, plus the non-deleted corrections,
+        with the columns of `events`.
+    """
+    corrected = corrections.select("stream_id")
+    live = corrections.where(~col(DELETED_COLUMN)).select(*events.columns)
+    return events.join(corrected, "stream_id", "left_anti").unionByName(live)
+
+
+def create_current_view(spark: SparkSession, schema: str) -> str:
+    """
+    Create or replace the Unity Catalog view `<schema>.fact_stream_current`.
+
+    Same rows as `current_facts`; the view is resolved at query time, so
+    it only needs re-creating when the fact columns change.
+
+    Returns
+    -------
+    str
+        Fully qualified name of the view.
+    """
+    view = f"{schema}.fact_stream_current"
+    columns = ", ".join(f"`{name}`" for name in spark.read.table(f"{schema}.fact_stream").columns)
+    spark.sql(
+        f"""
+        CREATE OR REPLACE VIEW {view}
+        COMMENT 'Latest version of every fact event.'
+        AS
+        SELECT {columns}
+        FROM {schema}.fact_stream AS f
+        LEFT ANTI JOIN {schema}.fact_stream_corrections AS c ON f.stream_id = c.stream_id
+        UNION ALL
+        SELECT {columns}
+        FROM {schema}.fact_stream_corrections
+        WHERE NOT {DELETED_COLUMN}
+        """
+    )
+    return view
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish fact_stream_current as a Unity Catalog view.")
+    parser.add_argument("--schema", default="spotify.gold", help="Gold schema of the pipeline.")
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.appName("fact_stream_current_view").getOrCreate()
+    print(create_current_view(spark, args.schema))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# ============================================================
+# Gold aggregate marts, maintained incrementally
+#
+# Purpose
+# -------
+# Daily listens per user / track / artist, so that dashboards read
+# the (small) marts instead of re-aggregating fact_stream:
+#
+#   mart_user_daily   : date_key, user_id,   streams, listen_duration
+#   mart_track_daily  : date_key, track_id,  streams, listen_duration
+#   mart_artist_daily : date_key, artist_id, streams, listen_duration
+#
+# Monthly questions group a daily mart by `date_key DIV 100`.
+#
+# How
+# ---
+# A stream over the Silver fact change feed. Silver fact_stream is
+# append-only, so a corrected or re-sent event arrives as another
+# `insert` of the same stream_id: the marts cannot rely on change
+# types (pre-images) to retract old values. Instead the values each
+# stream contributes are kept in a ledger, `mart_stream_ledger`
+# (stream_id, date_key, user_id, track_id, artist_id, listen_duration),
+# and every micro-batch
+#
+#   1. keeps the latest valid change per stream_id (`latest_changes`)
+#   2. retracts the ledger values of those stream_ids (-1 stream,
+#      -listen_duration) and adds the new values (+1, +listen_duration)
+#      unless the change is a delete (`stream_deltas`)
+#   3. aggregates the signed deltas per (date_key, entity) and MERGEs
+#      them into the marts by ADDING them (`t.streams + s.streams`);
+#      a row whose stream count drops to 0 is deleted
+#   4. MERGEs the latest changes into the ledger
+#
+# A correction therefore moves its counts, even across days, users or
+# artists; a re-sent identical event nets to zero.
+#
+# Rows are validated with the Gold rules (utilities/rules.py): a change
+# failing a quarantining rule is ignored (no retraction either), as it
+# was quarantined instead of reaching fact_stream.
+#
+# The artist is the one of the dim_track version current at the
+# stream (utilities/point_in_time.py), or of the track's first version
+# for a stream older than it, stored in the ledger so that a
+# retraction hits the artist that was counted.
+#
+# Idempotency and checkpoint resets
+# ---------------------------------
+# Each MERGE is idempotent: txnAppId = query + table + id of the
+# streaming query, txnVersion = batch id. A replayed micro-batch is not
+# added twice; the ledger is merged last, so a batch interrupted between
+# MERGEs recomputes the same deltas.
+#
+# The streaming query id lives in the checkpoint (`<checkpoint>/metadata`):
+# after a checkpoint reset the batch ids restart at 0 under a NEW id, so
+# no MERGE is skipped. The replayed Silver rows are retracted from the
+# ledger before being added again, so a reset does not double count.
+# To rebuild the marts from scratch, drop the marts AND the ledger
+# together with the checkpoint.
+#
+# Usage (job task, from src/gold/spotify_etl)
+# -------------------------------------------
+#   python -m utilities.marts --checkpoint /Volumes/spotify/gold/checkpoints/_marts
+# ============================================================
+
+import argparse
+import logging
+from typing import Dict
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.streaming import StreamingQuery
+from pyspark.sql.window import Window
+
+from utilities.point_in_time import point_in_time_join, with_first_version
+from utilities.rules import passed, with_validation
+from utilities.silver_reader import read_silver
+
+
+logger = logging.getLogger(__name__)
+
+MARTS_QUERY_NAME = "gold_marts"
+
+# Mart → entity key
+MARTS: Dict[str, str] = {
+    "mart_user_daily": "user_id",
+    "mart_track_daily": "track_id",
+    "mart_artist_daily": "artist_id",
+}
+
+# stream_id → values counted in the marts
+LEDGER = "mart_stream_ledger"
+LEDGER_COLUMNS = ["stream_id", "date_key", "user_id", "track_id", "artist_id", "listen_duration"]
+
+
+# ------------------------------------------------------------
+# 1) Signed deltas and partial aggregates
+# ------------------------------------------------------------
+
+def latest_changes(changes: DataFrame) -> DataFrame:
+    """
+    Latest valid change of every stream_id in a batch.
+
+    Parameters
+    ----------
+    changes:
+        Silver fact change feed rows with `_change_type` and
+        `_commit_timestamp` (utilities/silver_reader.py).
+
+    Returns
+    -------
+    DataFrame
+        stream_id, stream_timestamp, date_key, user_id, track_id,
+        listen_duration and `is_deleted`.
+    """
+    latest = Window.partitionBy("stream_id").orderBy(F.col("_commit_timestamp").desc(), F.col("stream_timestamp").desc())
+    deleted = F.col("_change_type") == F.lit("delete")
+    return (
+        with_validation(changes, "fact_stream")
+        # Deletes only need their key (as in utilities/quarantine.py)
+        .where(passed("fact_stream") | deleted)
+        .withColumn("_latest", F.row_number().over(latest))
+        .where(F.col("_latest") == 1)
+        .select(
+            "stream_id",
+            "stream_timestamp",
+            "date_key",
+            "user_id",
+            "track_id",
+            F.coalesce(F.col("listen_duration"), F.lit(0)).cast("bigint").alias("listen_duration"),
+            deleted.alias("is_deleted"),
+        )
+    )
+
+
+def stream_deltas(latest: DataFrame, ledger: DataFrame) -> DataFrame:
+    """
+    Signed deltas of a batch: retract what the ledger counted, add the new values.
+
+    Parameters
+    ----------
+    latest:
+        `latest_changes` of the batch, with the attributed `artist_id`.
+    ledger:
+        Values counted so far per stream_id (LEDGER_COLUMNS).
+
+    Returns
+    -------
+    DataFrame
+        date_key, user_id, track_id, artist_id, streams (+1 / -1) and
+        listen_duration (signed).
+    """
+    values = ["date_key", "user_id", "track_id", "artist_id"]
+    counted = ledger.join(latest.select("stream_id"), "stream_id", "left_semi")
+    retracted = counted.select(
+        *values, F.lit(-1).cast("bigint").alias("streams"), (-F.col("listen_duration")).alias("listen_duration")
+    )
+    added = latest.where(~F.col("is_deleted")).select(
+        *values, F.lit(1).cast("bigint").alias("streams"), F.col("listen_duration")
+    )
+    return retracted.unionByName(added)
+
+
+def partial_aggregates(deltas: DataFrame, key: str) -> DataFrame:
+    """Net change per (date_key, key) of one batch; rows netting to zero are dropped."""
+    return (
+        # A null key would never match in the MERGE (e.g. a track missing from dim_track)
+        deltas.where(F.col("date_key").isNotNull() & F.col(key).isNotNull())
+        .groupBy("date_key", key)
+        .agg(F.sum("streams").alias("streams"), F.sum("listen_duration").alias("listen_duration"))
+        .where((F.col("streams") != 0) | (F.col("listen_duration") != 0))
+    )
+
+
+# ------------------------------------------------------------
+# 2) Marts
+# ------------------------------------------------------------
+
+def ensure_marts(spark: SparkSession, schema: str) -> None:
+    for mart, key in MARTS.items():
+        spark.sql(
+            f"""
+            CREATE TABLE IF NOT EXISTS {schema}.{mart} (
+                date_key INT, {key} INT, streams BIGINT, listen_duration BIGINT
+            ) USING DELTA CLUSTER BY (date_key, {key})
+            """
+        )
+    # Clustered by stream_id: each batch only touches the files of its own streams
+    spark.sql(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{LEDGER} (
+            stream_id BIGINT, date_key INT, user_id INT, track_id INT, artist_id INT, listen_duration BIGINT
+        ) USING DELTA CLUSTER BY (stream_id)
+        """
+    )
+
+
+def _merge(spark: SparkSession, statement: str, app_id: str, version: int) -> None:
+    """Run a MERGE as an idempotent Delta write (skipped if app_id already committed version)."""
+    spark.conf.set("spark.databricks.delta.write.txnAppId", app_id)
+    spark.conf.set("spark.databricks.delta.write.txnVersion", str(version))
+    try:
+        spark.sql(statement)
+    finally:
+        spark.conf.unset("spark.databricks.delta.write.txnAppId")
+        spark.conf.unset("spark.databricks.delta.write.txnVersion")
+
+
+def merge_partials(spark: SparkSession, partials: DataFrame, target: str, key: str, app_id: str, version: int) -> None:
+    """
+    Add `partials` to the mart `target` (idempotent per app_id / version).
+    """
+    view = f"_partials_{key}"
+    partials.createOrReplaceTempView(view)
+    _merge(
+        spark,
+        f"""
+        MERGE INTO {target} t
+        USING {view} s
+        ON t.date_key = s.date_key AND t.{key} = s.{key}
+        WHEN MATCHED AND t.streams + s.streams = 0 THEN DELETE
+        WHEN MATCHED THEN UPDATE SET
+            t.streams = t.streams + s.streams,
+            t.listen_duration = t.listen_duration + s.listen_duration
+        WHEN NOT MATCHED THEN INSERT (date_key, {key}, streams, listen_duration)
+            VALUES (s.date_key, s.{key}, s.streams, s.listen_duration)
+        """,
+        app_id,
+        version,
+    )
+
+
+def merge_ledger(spark: SparkSession, latest: DataFrame, ledger: str, app_id: str, version: int) -> None:
+    """
+    Record the values now counted per stream_id (idempotent per app_id / version).
+    """
+    latest.createOrReplaceTempView("_latest_streams")
+    _merge(
+        spark,
+        f"""
+        MERGE INTO {ledger} t
+        USING _latest_streams s
+        ON t.stream_id = s.stream_id
+        WHEN MATCHED AND s.is_deleted THEN DELETE
+        WHEN MATCHED THEN UPDATE SET {", ".join(f"t.{c} = s.{c}" for c in LEDGER_COLUMNS[1:])}
+        WHEN NOT MATCHED AND NOT s.is_deleted THEN INSERT ({", ".join(LEDGER_COLUMNS)})
+            VALUES ({", ".join(f"s.{c}" for c in LEDGER_COLUMNS)})
+        """,
+        app_id,
+        version,
+    )
+
+
+def checkpoint_query_id(spark: SparkSession, checkpoint: str) -> str:
+    """Id of the streaming query owning `checkpoint` (new after a checkpoint reset)."""
+    return spark.read.json(f"{checkpoint}/metadata").first()["id"]
+
+
+def update_marts(batch: DataFrame, batch_id: int, schema: str, dim_track: str, query_id: str) -> None:
+    """Apply one micro-batch of the fact change feed to every mart, then to the ledger."""
+    spark = batch.sparkSession
+    ledger = f"{schema}.{LEDGER}"
+    tracks = spark.read.table(dim_track)
+    version = (["track_id"], "stream_timestamp", "track_version_key")
+    latest = point_in_time_join(latest_changes(batch), tracks, "dim_track", *version, carry=["artist_id"])
+    # Streams before their track's first version get that version's artist
+    latest = with_first_version(latest, tracks, *version, carry=["artist_id"]).persist()
+    # Computed from the ledger BEFORE this batch's ledger MERGE
+    deltas = stream_deltas(latest, spark.read.table(ledger)).persist()
+
+    try:
+        for mart, key in MARTS.items():
+            partials = partial_aggregates(deltas, key)
+            merge_partials(spark, partials, f"{schema}.{mart}", key, f"{MARTS_QUERY_NAME}_{mart}_{query_id}", batch_id)
+        merge_ledger(spark, latest, ledger, f"{MARTS_QUERY_NAME}_{LEDGER}_{query_id}", batch_id)
+        logger.info("Marts updated from batch %d", batch_id)
+    finally:
+        deltas.unpersist()
+        latest.unpersist()
+
+
+def run_marts(
+    spark: SparkSession,
+    checkpoint: str,
+    schema: str = "spotify.gold",
+    silver_table: str = "spotify.silver.fact_stream",
+) -> StreamingQuery:
+    """
+    Apply the fact changes since the last run to the marts.
+
+    Blocks until caught up (availableNow).
+    """
+    ensure_marts(spark, schema)
+    dim_track = f"{schema}.dim_track"
+    # Resolved on the first batch: the query writes <checkpoint>/metadata when it starts
+    query_ids: Dict[str, str] = {}
+
+    def apply(batch: DataFrame, batch_id: int) -> None:
+        if checkpoint not in query_ids:
+            query_ids[checkpoint] = checkpoint_query_id(batch.sparkSession, checkpoint)
+        update_marts(batch, batch_id, schema, dim_track, query_ids[checkpoint])
+
+    query = (
+        read_silver(spark, silver_table)
+        .writeStream
+        .queryName(MARTS_QUERY_NAME)
+        .option("checkpointLocation", checkpoint)
+        .foreachBatch(apply)
+        .trigger(availableNow=True)
+        .start()
+    )
+    query.awaitTermination()
+    return query
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally update the Gold aggregate marts.")
+    parser.add_argument("--checkpoint", required=True, help="Checkpoint location of the marts stream.")
+    parser.add_argument("--schema", default="spotify.gold")
+    parser.add_argument("--silver-table", default="spotify.silver.fact_stream")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    spark = SparkSession.builder.appName("gold_marts").getOrCreate()
+    run_marts(spark, args.checkpoint, args.schema, args.silver_table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ============================================================
+# Quarantine routing for the Gold staging tables
+#
+# Purpose
+# -------
+# `expect_all_or_drop` discards failing rows: the only way to find
+# them again is to rescan Silver. Instead, every staging dataset
+# evaluates its rules ONCE per row (utilities/rules.py →
+# `_dq_failed` bitmask) and its output is split:
+#
+#   <table>_stg ──┬── <table>_valid      (view, no quarantining rule failed)  → CDC flow
+#                 └── <table>_quarantine (table, the others)
+#
+# Warn-only rules (WARN_RULES in utilities/rules.py) never quarantine.
+#
+# Both outputs only filter the staged rows on the mask. Staging is a
+# view by default (utilities/staging.py), so each output evaluates it;
+# a materialized staging table is read from Silver exactly once.
+#
+# Deletes from the change feed always go to the valid view: they only
+# need their key, and quarantining one would leave the deleted row
+# in Gold.
+#
+# Quarantine rows keep every Silver column plus:
+#   _dq_failed        : failed-rule bitmask
+#   _dq_failed_rules  : names of the failed rules
+#   _quarantined_at   : processing time
+#
+# Per-rule pass / fail counts come from the staging dataset's
+# `@dlt.expect_all(...)` (warn only) and land in the DLT event log,
+# see `load_dlt_expectations` in utils/stream_metrics.py.
+# ============================================================
+
+import dlt
+from pyspark.sql.functions import col, current_timestamp, lit
+
+from utilities.rules import failed_rules, passed
+
+
+def valid_view_name(table: str) -> str:
+    return f"{table}_valid"
+
+
+def quarantine_table_name(table: str) -> str:
+    return f"{table}_quarantine"
+
+
+def split_validated(table: str, staging: str) -> str:
+    """
+    Define the valid-rows view and the quarantine table of `table`.
+
+    Parameters
+    ----------
+    table:
+        Rule set / Gold table name, e.g. "dim_user".
+    staging:
+        Staging dataset carrying `_dq_failed` (e.g. "dim_user_stg").
+
+    Returns
+    -------
+    str
+        Name of the valid-rows view, to use as the CDC flow source.
+    """
+    kept = passed(table) | (col("_change_type") == lit("delete"))
+
+    @dlt.view(name=valid_view_name(table), comment=f"Rows of {staging} that failed no quarantining rule.")
+    def valid():
+        return dlt.read_stream(staging).where(kept)
+
+    @dlt.table(name=quarantine_table_name(table), comment=f"Rows of {staging} that failed at least one rule.")
+    def quarantine():
+        return (
+            dlt.read_stream(staging)
+            .where(~kept)
+            .select("*", failed_rules(table).alias("_dq_failed_rules"), current_timestamp().alias("_quarantined_at"))
+        )
+
+    return valid_view_name(table)
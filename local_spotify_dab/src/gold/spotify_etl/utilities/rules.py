@@ -0,0 +1,189 @@
+# ============================================================
+# Validation rule library for the Gold staging tables
+#
+# Purpose
+# -------
+# Every rule is a Spark SQL boolean expression (native, no UDF).
+# All rules of a table are compiled into ONE projection that adds a
+# bitmask column:
+#
+#   _dq_failed = (rule 0 failed) << 0 | (rule 1 failed) << 1 | ...
+#
+# A rule FAILS when its expression is false or NULL, so rules spell
+# out whether NULLs are acceptable (e.g. an open-ended `end_date`).
+#
+# DLT expectations are derived from the same rules, as bit tests on
+# the precomputed mask:
+#
+#   {"user_id_not_null": "_dq_failed & 1 = 0", ...}
+#
+# so DLT still reports per-rule pass / fail counts, while each rule
+# is evaluated exactly once per row.
+#
+# Severity
+# --------
+# A failed rule quarantines its row, unless the rule is listed in
+# WARN_RULES: it is still evaluated, counted by its expectation and
+# named in `_dq_failed_rules`, but its bit is left out of the
+# quarantine mask (`quarantine_mask` / `passed`). E.g. Silver encodes
+# an unseen device label as code 0: the event itself is sound and must
+# still reach fact_stream and the marts.
+#
+# Usage (staging dataset + quarantine split, utilities/quarantine.py)
+# -------------------------------------------------------------------
+#   @staging
+#   @dlt.expect_all(expectations("dim_user"))      # warn only: counts per rule
+#   def dim_user_stg():
+#       return with_validation(read_silver(spark, "spotify.silver.dim_user"), "dim_user")
+#
+#   split_validated("dim_user", "dim_user_stg")    # dim_user_valid / dim_user_quarantine
+#
+# NOTE:
+# Bit positions follow the order of TABLE_RULES[table]. Only APPEND
+# rules, or masks already written (e.g. quarantine rows) change
+# meaning.
+# ============================================================
+
+from typing import Dict, List, Tuple
+
+from pyspark.sql import Column, DataFrame
+from pyspark.sql.functions import col, expr
+
+from utilities.utils import EMAIL_PATTERN
+
+
+DQ_COLUMN = "_dq_failed"
+
+# Code 0 of every encoded Silver column means NULL / unknown value
+# (see utils/schema_registry.py in the bundle root)
+UNKNOWN_CODE = 0
+
+
+# ------------------------------------------------------------
+# 1) Rule builders (return SQL expressions)
+# ------------------------------------------------------------
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def not_null(column: str) -> str:
+    return f"{column} IS NOT NULL"
+
+
+def valid_email(column: str) -> str:
+    """Same check as `utilities.utils.is_valid_email` (NULL fails)."""
+    return f"{column} RLIKE {_literal(EMAIL_PATTERN)}"
+
+
+def iso_date(column: str) -> str:
+    """A yyyy-MM-dd string that is also a real calendar date."""
+    return (
+        f"{column} RLIKE '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' "
+        f"AND try_to_timestamp({column}, 'yyyy-MM-dd') IS NOT NULL"
+    )
+
+
+def ordered(start: str, end: str) -> str:
+    """`start <= end`; an open-ended (NULL) `end` passes."""
+    return f"{end} IS NULL OR {start} <= {end}"
+
+
+def non_negative(column: str) -> str:
+    return f"{column} >= 0"
+
+
+def known_code(column: str) -> str:
+    """Encoded Silver column holds a registered value (not Unknown)."""
+    return f"{column} <> {UNKNOWN_CODE}"
+
+
+def one_of(column: str, values) -> str:
+    return f"{column} IN ({', '.join(_literal(str(v)) for v in values)})"
+
+
+# ------------------------------------------------------------
+# 2) Rules per Silver table
+# ------------------------------------------------------------
+
+TABLE_RULES: Dict[str, Dict[str, str]] = {
+    "dim_user": {
+        "user_id_not_null": not_null("user_id"),
+        "start_date_before_end_date": ordered("start_date", "end_date"),
+        "subscription_type_known": known_code("subscription_type_id"),
+    },
+    "dim_artist": {
+        "artist_id_not_null": not_null("artist_id"),
+        "genre_known": known_code("genre_id"),
+    },
+    "dim_track": {
+        "track_id_not_null": not_null("track_id"),
+        "duration_sec_non_negative": non_negative("duration_sec"),
+    },
+    "dim_date": {
+        "date_key_not_null": not_null("date_key"),
+        "date_key_matches_date": "date_key = CAST(date_format(date, 'yyyyMMdd') AS INT)",
+        "weekday_known": known_code("weekday_id"),
+    },
+    "fact_stream": {
+        "stream_id_not_null": not_null("stream_id"),
+        "listen_duration_non_negative": non_negative("listen_duration"),
+        "device_type_known": known_code("device_type_id"),
+        # sequence_by of the fact CDC flows: a NULL cannot be ordered
+        "stream_timestamp_not_null": not_null("stream_timestamp"),
+    },
+}
+
+
+# Rules reported by their expectation only, never quarantining a row
+WARN_RULES: Dict[str, Tuple[str, ...]] = {
+    "fact_stream": ("device_type_known",),
+}
+
+
+# ------------------------------------------------------------
+# 3) Compilation
+# ------------------------------------------------------------
+
+def validation_mask(rules: Dict[str, str]) -> Column:
+    """Bitmask of failed rules (0 = every rule passed)."""
+    failed = [
+        f"CASE WHEN coalesce(({rule}), false) THEN 0 ELSE {1 << bit} END"
+        for bit, rule in enumerate(rules.values())
+    ]
+    return expr(" + ".join(failed) if failed else "0").cast("bigint")
+
+
+def with_validation(df: DataFrame, table: str) -> DataFrame:
+    """Add `_dq_failed` for all rules of `table` in one projection."""
+    return df.select("*", validation_mask(TABLE_RULES[table]).alias(DQ_COLUMN))
+
+
+def expectations(table: str) -> Dict[str, str]:
+    """DLT expectations of `table`, as bit tests on `_dq_failed`."""
+    return {
+        name: f"{DQ_COLUMN} & {1 << bit} = 0"
+        for bit, name in enumerate(TABLE_RULES[table])
+    }
+
+
+def quarantine_mask(table: str) -> int:
+    """Bits of the rules of `table` that quarantine a failing row."""
+    warn = set(WARN_RULES.get(table, ()))
+    return sum(1 << bit for bit, name in enumerate(TABLE_RULES[table]) if name not in warn)
+
+
+def passed(table: str) -> Column:
+    """True for rows of `table` that failed no quarantining rule."""
+    return col(DQ_COLUMN).bitwiseAND(quarantine_mask(table)) == 0
+
+
+def failed_rules(table: str, mask: str = DQ_COLUMN) -> Column:
+    """Names of the rules a row failed, decoded from its mask."""
+    names = ", ".join(_literal(name) for name in TABLE_RULES[table])
+    return expr(f"filter(array({names}), (name, bit) -> {mask} & shiftleft(1L, bit) <> 0)")
+
+
+def rule_names(table: str) -> List[str]:
+    """Rule names of `table` in bit order."""
+    return list(TABLE_RULES[table])
@@ -0,0 +1,109 @@
+# ============================================================
+# SCD Type 2: tracked history columns per dimension
+#
+# Purpose
+# -------
+# With `track_history_column_list=None` EVERY column change (even a
+# bare `updated_at` bump) closes the current version and opens a new
+# one. Only the columns below create SCD2 versions; changes to any
+# other column update the current version in place (SCD1).
+#
+# Encoded Silver columns are tracked by their code column (e.g.
+# `subscription_type_id` for subscription_type).
+#
+# Report
+# ------
+# `version_report` replays the existing version history of a Gold
+# dimension and counts the versions that would remain if only the
+# tracked columns opened new versions, e.g.
+#
+#   python -m utilities.scd --table spotify.gold.dim_user
+#
+# NOTE:
+# Changing the tracked columns of an existing table only affects new
+# changes; run a FULL REFRESH of the Gold pipeline to rebuild the
+# history with the new configuration.
+# ============================================================
+
+import argparse
+from typing import Dict, List, Sequence
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.window import Window
+
+
+TRACKED_COLUMNS: Dict[str, List[str]] = {
+    "dim_user": ["country", "subscription_type_id"],
+    "dim_artist": ["genre_id", "country"],
+    "dim_track": ["artist_id", "album_name"],
+}
+
+KEYS: Dict[str, List[str]] = {
+    "dim_user": ["user_id"],
+    "dim_artist": ["artist_id"],
+    "dim_track": ["track_id"],
+}
+
+# Columns DLT adds to SCD Type 2 targets
+START_COLUMN = "__START_AT"
+
+
+def tracked_columns(table: str) -> List[str]:
+    """`track_history_column_list` of a Gold dimension."""
+    return list(TRACKED_COLUMNS[table])
+
+
+def version_report(spark: SparkSession, table: str, keys: Sequence[str], tracked: Sequence[str]) -> DataFrame:
+    """
+    Versions now vs versions with only `tracked` columns versioned.
+
+    Parameters
+    ----------
+    table:
+        Fully qualified SCD2 table, e.g. "spotify.gold.dim_user".
+    keys:
+        Business keys of the dimension.
+    tracked:
+        Columns that should open new versions.
+
+    Returns
+    -------
+    DataFrame
+        keys, versions, tracked_versions, spurious_versions
+        (totals only; one row)
+    """
+    history = Window.partitionBy(*keys).orderBy(START_COLUMN)
+    changed = F.lit(False)
+    for column in tracked:
+        changed = changed | ~F.col(column).eqNullSafe(F.lag(column).over(history))
+
+    versions = spark.read.table(table).select(
+        *keys,
+        (F.row_number().over(history) == 1).alias("_first"),
+        changed.alias("_changed"),
+    )
+
+    return versions.agg(
+        F.countDistinct(*keys).alias("keys"),
+        F.count(F.lit(1)).alias("versions"),
+        F.sum((F.col("_first") | F.col("_changed")).cast("bigint")).alias("tracked_versions"),
+    ).withColumn("spurious_versions", F.col("versions") - F.col("tracked_versions"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count SCD2 versions opened by untracked column changes.")
+    parser.add_argument("--table", action="append", help="Gold dimension, e.g. spotify.gold.dim_user (default: all).")
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.appName("scd_version_report").getOrCreate()
+    tables = args.table or [f"spotify.gold.{name}" for name in TRACKED_COLUMNS]
+
+    for table in tables:
+        name = table.rsplit(".", 1)[-1]
+        print(table)
+        version_report(spark, table, KEYS[name], TRACKED_COLUMNS[name]).show(truncate=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ============================================================
+# Gold staging datasets: views by default, tables on request
+#
+# Purpose
+# -------
+# A `@dlt.table` staging dataset writes every Silver change to a
+# Delta table before the CDC flow reads it back. As a `@dlt.view`
+# the staging query is inlined into its readers instead: nothing is
+# written, and the fact table's Gold write I/O is halved.
+#
+# Materializing is an opt-in for debugging (inspect exactly what the
+# CDC flow received), via the pipeline configuration:
+#
+#   spotify.gold.materialize_staging: "true"               (all)
+#   spotify.gold.materialize_staging: "dim_user_stg,..."   (some)
+#
+# Trade-off
+# ---------
+# A view is evaluated by each of its readers: with the quarantine
+# split (utilities/quarantine.py) the Silver change feed is read by
+# both `<table>_valid` and `<table>_quarantine`. Reading twice is
+# still cheaper than writing and re-reading a staging table, and a
+# materialized staging table restores the single read.
+#
+# NOTE:
+# Switching a staging dataset between view and table changes the
+# streaming sources of its readers: run a FULL REFRESH afterwards.
+# ============================================================
+
+import dlt
+from pyspark.sql import SparkSession
+
+
+MATERIALIZE_CONF = "spotify.gold.materialize_staging"
+
+
+def materialize_staging(name: str) -> bool:
+    """True if the pipeline configuration materializes staging `name`."""
+    spark = SparkSession.getActiveSession()
+    value = spark.conf.get(MATERIALIZE_CONF, "false").strip().lower() if spark else "false"
+    if value in ("true", "all"):
+        return True
+    return name.lower() in {item.strip() for item in value.split(",")}
+
+
+def staging(func):
+    """
+    Declare a staging dataset: `@dlt.view`, or `@dlt.table` if materialized.
+
+    Usage
+    -----
+    @staging
+    @dlt.expect_all(expectations("dim_user"))
+    def dim_user_stg():
+        ...
+    """
+    name = func.__name__
+    if materialize_staging(name):
+        return dlt.table(name=name, comment="Materialized Gold staging (debug).")(func)
+    return dlt.view(name=name, comment="Gold staging view.")(func)
@@ -0,0 +1,60 @@
+# ============================================================
+# Generated Bronze rows (types as in data_scripts/spotify_initial_load.sql)
+# ============================================================
+
+import datetime as dt
+
+
+BRONZE_SCHEMAS = {
+    "DimUser": "user_id INT, user_name STRING, country STRING, subscription_type STRING, "
+    "start_date DATE, end_date DATE, updated_at TIMESTAMP",
+    "DimArtist": "artist_id INT, artist_name STRING, genre STRING, country STRING, updated_at TIMESTAMP",
+    "DimTrack": "track_id INT, track_name STRING, artist_id INT, album_name STRING, duration_sec INT, "
+    "release_date DATE, updated_at TIMESTAMP",
+    "DimDate": "date_key INT, date DATE, day INT, month INT, year INT, weekday STRING",
+    "FactStream": "stream_id BIGINT, user_id INT, track_id INT, date_key INT, listen_duration INT, "
+    "device_type STRING, stream_timestamp TIMESTAMP",
+}
+
+TS = dt.datetime(2025, 9, 23, 19, 49, 55)
+DAY = dt.date(2025, 9, 23)
+
+# Batch 1: user 1 is sent twice, "Student" is not a known subscription type
+BATCH_1 = {
+    "DimUser": [
+        (1, "Carlos Berry", "Switzerland", "Premium", DAY, None, TS),
+        (2, "Amanda Jenkins", "Montserrat", "Family", DAY, None, TS),
+        (3, "Daniel Cook", "Chile", "Student", DAY, None, TS),
+        (1, "Carlos Berry", "Switzerland", "Free", DAY, None, TS),
+    ],
+    "DimArtist": [
+        (1, "Artist One", "Rock", "Chile", TS),
+        (2, "Artist Two", "Jazz", "Peru", TS),
+    ],
+    "DimTrack": [
+        (1, "Short", 1, "Album", 120, DAY, TS),
+        (2, "Medium", 1, "Album", 200, DAY, TS),
+        (3, "Long", 2, "Album", 400, DAY, TS),
+    ],
+    "DimDate": [
+        (20250923, DAY, 23, 9, 2025, "Tuesday"),
+        (20250924, DAY + dt.timedelta(days=1), 24, 9, 2025, "Wednesday"),
+    ],
+    "FactStream": [
+        (1, 1, 1, 20250923, 100, "Mobile", TS),
+        (2, 2, 2, 20250923, 180, "Desktop", TS),
+        (3, 3, 3, 20250924, 390, "Smart Speaker", TS + dt.timedelta(days=1)),
+    ],
+}
+
+# Batch 2: one new user, user 2 again, two new streams
+BATCH_2 = {
+    "DimUser": [
+        (4, "New User", "Peru", "Free", DAY, None, TS),
+        (2, "Amanda Jenkins", "Montserrat", "Premium", DAY, None, TS),
+    ],
+    "FactStream": [
+        (4, 4, 1, 20250924, 90, "Mobile", TS + dt.timedelta(days=1)),
+        (5, 1, 2, 20250924, 60, "Tablet", TS + dt.timedelta(days=1)),
+    ],
+}
@@ -0,0 +1,69 @@
+# ============================================================
+# Local test harness: PySpark + delta-spark, generated Bronze
+#
+# - One local SparkSession with Delta for the whole test session
+#   (skipped when delta-spark or its jars are not available)
+# - `bronze` writes small ADF-style Parquet files per table:
+#     {bronze_base}/{Name}/part-*.parquet
+#     {bronze_base}/{Name}_cdc/cdc.json
+# ============================================================
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from bronze_data import BRONZE_SCHEMAS
+from utils.storage_paths import StorageLayout
+
+
+@pytest.fixture(scope="session")
+def spark():
+    pytest.importorskip("delta")
+    from utils.silver_job import local_spark
+
+    try:
+        session = local_spark("silver_tests")
+    except Exception as exc:  # e.g. Delta jars cannot be downloaded
+        pytest.skip(f"local Delta SparkSession unavailable: {exc}")
+
+    session.sparkContext.setLogLevel("ERROR")
+    yield session
+    session.stop()
+
+
+@pytest.fixture
+def layout(tmp_path):
+    """Bronze and Silver roots under the test's temp directory."""
+    return StorageLayout.under(tmp_path)
+
+
+@pytest.fixture
+def bronze(spark, layout):
+    """
+    Factory writing one Bronze batch; returns the Bronze base path.
+
+    Usage: bronze_base = bronze(BATCH_1)
+    """
+    base = Path(layout.bronze_base)
+
+    def write(batch):
+        for name, rows in batch.items():
+            (
+                spark.createDataFrame(rows, BRONZE_SCHEMAS[name])
+                .coalesce(1)
+                .write.mode("append")
+                .parquet(str(base / name))
+            )
+            # ADF watermark next to every table folder (not Parquet)
+            (base / f"{name}_cdc").mkdir(parents=True, exist_ok=True)
+            (base / f"{name}_cdc" / "cdc.json").write_text('{"cdc": "2025-09-23 19:49:55"}')
+        return str(base)
+
+    return write
+
+
+@pytest.fixture
+def silver_base(layout):
+    return layout.silver_base
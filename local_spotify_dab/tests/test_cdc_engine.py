@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pc = pytest.importorskip("pyarrow.compute")
+
+from utils.cdc_engine import CdcSpec, LocalCdcTable, apply_changes  # noqa: E402
+
+
+def _changes(rows):
+    user_id, country, plan, day, change_type = zip(*rows)
+    return pa.table(
+        {
+            "user_id": pa.array(user_id, pa.int32()),
+            "country": list(country),
+            "plan": list(plan),
+            "updated_at": pa.array([datetime(2024, 1, d) for d in day], pa.timestamp("us")),
+            "_change_type": list(change_type),
+        }
+    )
+
+
+def _spec(scd, **kwargs):
+    return CdcSpec(
+        keys=("user_id",),
+        sequence_by="updated_at",
+        stored_as_scd_type=scd,
+        apply_as_deletes=pc.field("_change_type") == "delete",
+        except_column_list=("_change_type",),
+        **kwargs,
+    )
+
+
+def _rows(table, *columns):
+    return sorted(tuple(row[c] for c in columns) for row in table.to_pylist())
+
+
+def test_scd2_tracks_history_and_rebuilds_out_of_order(tmp_path):
+    table = LocalCdcTable(str(tmp_path / "dim_user"), _spec(2, track_history_column_list=("country",)))
+
+    table.apply(_changes([(1, "US", "a", 1, "upsert"), (1, "US", "b", 3, "upsert"), (2, "FR", "a", 1, "upsert")]))
+    # late change between existing ones, a newer tracked change, a delete
+    target = table.apply(
+        _changes([(1, "GB", "c", 4, "upsert"), (1, "US", "q", 2, "upsert"), (2, "FR", "z", 2, "delete")])
+    )
+
+    day = lambda d: datetime(2024, 1, d)  # noqa: E731
+    assert _rows(target, "user_id", "country", "plan", "__START_AT", "__END_AT") == [
+        (1, "GB", "c", day(4), None),
+        # plan is untracked: updated in place, latest value kept
+        (1, "US", "b", day(1), day(4)),
+        (2, "FR", "a", day(1), day(2)),
+    ]
+    assert table.read().num_rows == 3
+
+
+def test_scd1_keeps_latest_and_ignores_stale_changes():
+    spec = _spec(1)
+    target, log = apply_changes(
+        None, None, _changes([(1, "US", "a", 3, "upsert"), (2, "FR", "a", 1, "upsert"), (2, "FR", "a", 2, "delete")]), spec
+    )
+    target, log = apply_changes(
+        target, log, _changes([(1, "XX", "a", 2, "upsert"), (2, "IT", "a", 1, "upsert"), (3, "SE", "a", 1, "upsert")]), spec
+    )
+
+    assert _rows(target, "user_id", "country") == [(1, "US"), (3, "SE")]
+    # one entry per key, including the tombstone of user 2
+    assert log.num_rows == 3
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from utilities.facts import is_correction
+from utilities.rules import failed_rules, with_validation
+
+
+def test_old_events_are_appended_when_ingested_on_time(spark):
+    changes = spark.createDataFrame(
+        [
+            # 2025 events that reached Silver right away: appended
+            (1, datetime(2025, 1, 5, 10, 0), datetime(2025, 1, 5, 10, 5), "insert"),
+            (2, datetime(2025, 3, 1, 8, 0), datetime(2025, 3, 2, 8, 0), "insert"),
+            # re-sent a week after the event: correction
+            (3, datetime(2025, 1, 1, 9, 0), datetime(2025, 1, 8, 9, 0), "insert"),
+            # flagged by the change feed
+            (4, datetime(2025, 1, 5, 10, 0), datetime(2025, 1, 5, 10, 5), "update_postimage"),
+        ],
+        "stream_id INT, stream_timestamp TIMESTAMP, _commit_timestamp TIMESTAMP, _change_type STRING",
+    )
+
+    routed = changes.select("stream_id", is_correction("3 days").alias("correction")).collect()
+
+    assert {row.stream_id: row.correction for row in routed} == {1: False, 2: False, 3: True, 4: True}
+
+
+def test_events_without_timestamp_are_quarantined(spark):
+    changes = spark.createDataFrame(
+        [(1, 0, 2, datetime(2025, 1, 5, 10, 0)), (2, 0, 2, None)],
+        "stream_id INT, listen_duration INT, device_type_id INT, stream_timestamp TIMESTAMP",
+    )
+
+    validated = with_validation(changes, "fact_stream").select("stream_id", failed_rules("fact_stream").alias("failed"))
+
+    assert {row.stream_id: row.failed for row in validated.collect()} == {1: [], 2: ["stream_timestamp_not_null"]}
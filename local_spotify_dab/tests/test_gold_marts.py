@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pyspark.sql.functions import lit
+
+from utilities.marts import latest_changes, partial_aggregates, stream_deltas
+
+
+def test_resent_stream_retracts_its_counted_values(spark):
+    ledger = spark.createDataFrame(
+        [(1, 20250105, 10, 100, 7, 200), (4, 20250105, 12, 100, 7, 50)],
+        "stream_id BIGINT, date_key INT, user_id INT, track_id INT, artist_id INT, listen_duration BIGINT",
+    )
+    day = lambda h: datetime(2025, 1, 5, h)  # noqa: E731
+    changes = spark.createDataFrame(
+        [
+            # stream 1 re-sent twice (append-only Silver: both inserts); the last commit wins
+            (1, 10, 100, 20250105, 230, 1, day(9), day(10), "insert"),
+            (1, 10, 100, 20250105, 260, 1, day(9), day(11), "insert"),
+            (2, 11, 100, 20250105, 100, 1, day(9), day(10), "insert"),
+            # invalid: ignored, nothing retracted
+            (3, 12, 100, 20250105, -5, 1, day(9), day(10), "insert"),
+            (4, None, None, None, None, None, day(9), day(10), "delete"),
+        ],
+        "stream_id BIGINT, user_id INT, track_id INT, date_key INT, listen_duration INT, device_type_id INT, "
+        "stream_timestamp TIMESTAMP, _commit_timestamp TIMESTAMP, _change_type STRING",
+    )
+
+    # every stream attributed to artist 7 (point-in-time join not under test)
+    deltas = stream_deltas(latest_changes(changes).withColumn("artist_id", lit(7)), ledger)
+
+    users = {(r.user_id, r.streams, r.listen_duration) for r in partial_aggregates(deltas, "user_id").collect()}
+    artists = {(r.artist_id, r.streams, r.listen_duration) for r in partial_aggregates(deltas, "artist_id").collect()}
+    assert users == {(10, 0, 60), (11, 1, 100), (12, -1, -50)}
+    assert artists == {(7, 0, 110)}
+
+
+def test_unknown_device_is_counted_not_quarantined(spark):
+    at = datetime(2025, 1, 5, 9)
+    changes = spark.createDataFrame(
+        # device_type_id 0: a device label Silver had not registered yet
+        [(1, 10, 100, 20250105, 120, 0, at, at, "insert"), (2, 10, 100, 20250105, -1, 0, at, at, "insert")],
+        "stream_id BIGINT, user_id INT, track_id INT, date_key INT, listen_duration INT, device_type_id INT, "
+        "stream_timestamp TIMESTAMP, _commit_timestamp TIMESTAMP, _change_type STRING",
+    )
+
+    assert [r.stream_id for r in latest_changes(changes).collect()] == [1]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from utilities.point_in_time import JOIN_STRATEGY_CONF, point_in_time_join, use_binned_join, with_first_version
+
+
+def test_strategy_is_naive_unless_configured_and_results_match(spark):
+    day = lambda d: datetime(2025, 1, d)  # noqa: E731
+    dim = spark.createDataFrame(
+        [(1, "US", day(1), day(5)), (1, "GB", day(5), None), (2, "FR", day(3), None)],
+        "user_id INT, country STRING, __START_AT TIMESTAMP, __END_AT TIMESTAMP",
+    )
+    facts = spark.createDataFrame(
+        [(10, 1, day(2)), (11, 1, day(6)), (12, 2, day(2)), (13, 2, day(4))],
+        "stream_id INT, user_id INT, stream_timestamp TIMESTAMP",
+    )
+
+    def resolved():
+        joined = point_in_time_join(facts, dim, "dim_user", ["user_id"], "stream_timestamp", "v", carry=["country"])
+        return sorted((r.stream_id, r.country) for r in joined.collect())
+
+    try:
+        spark.conf.unset(JOIN_STRATEGY_CONF)
+        assert not use_binned_join("dim_user")
+        naive = resolved()
+
+        spark.conf.set(JOIN_STRATEGY_CONF, "dim_track, dim_user")
+        assert use_binned_join("dim_user") and not use_binned_join("dim_artist")
+        assert resolved() == naive == [(10, "US"), (11, "GB"), (12, None), (13, "FR")]
+    finally:
+        spark.conf.unset(JOIN_STRATEGY_CONF)
+
+
+def test_facts_before_the_first_version_take_it(spark):
+    day = lambda d: datetime(2025, 1, d)  # noqa: E731
+    dim = spark.createDataFrame(
+        [(1, 7, day(3), day(5)), (1, 8, day(5), None), (2, 9, day(1), day(2))],
+        "track_id INT, artist_id INT, __START_AT TIMESTAMP, __END_AT TIMESTAMP",
+    )
+    facts = spark.createDataFrame(
+        [(10, 1, day(1)), (11, 1, day(4)), (12, 1, day(6)), (13, 2, day(3)), (14, 3, day(1))],
+        "stream_id INT, track_id INT, stream_timestamp TIMESTAMP",
+    )
+
+    version = (["track_id"], "stream_timestamp", "v")
+    joined = point_in_time_join(facts, dim, "dim_track", *version, carry=["artist_id"])
+    filled = with_first_version(joined, dim, *version, carry=["artist_id"])
+
+    rows = {r.stream_id: (r.artist_id, r.v) for r in filled.collect()}
+    # before the first version of track 1: its first version
+    assert rows[10] == rows[11]
+    assert {k: artist for k, (artist, _) in rows.items()} == {10: 7, 11: 7, 12: 8, 13: None, 14: None}
+    assert filled.columns == joined.columns
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class _Stream:
+    """Stand-in for a streaming DataFrame: every transformation is a no-op."""
+
+    def where(self, *args):
+        return self
+
+    def select(self, *args):
+        return self
+
+
+@pytest.fixture
+def dlt_graph(monkeypatch):
+    """
+    Minimal `dlt` module recording the declared datasets.
+
+    Like DLT, `read_stream` of a view evaluates the view's query inline;
+    reading a table reads what it wrote.
+    """
+    graph = {}
+    dlt = types.ModuleType("dlt")
+
+    def declare(kind):
+        def decorator(name=None, comment=None):
+            def register(func):
+                graph[name or func.__name__] = (kind, func)
+                return func
+
+            return register
+
+        return decorator
+
+    def read_stream(name):
+        kind, func = graph[name]
+        return func() if kind == "view" else _Stream()
+
+    dlt.table, dlt.view, dlt.read_stream = declare("table"), declare("view"), read_stream
+    dlt.graph = graph
+    monkeypatch.setitem(sys.modules, "dlt", dlt)
+    for module in ("utilities.staging", "utilities.quarantine"):
+        monkeypatch.delitem(sys.modules, module, raising=False)
+    yield dlt
+    for module in ("utilities.staging", "utilities.quarantine"):
+        sys.modules.pop(module, None)
+
+
+def _declare_dim_user(dlt_graph, reads):
+    staging = importlib.import_module("utilities.staging")
+    quarantine = importlib.import_module("utilities.quarantine")
+
+    @staging.staging
+    def dim_user_stg():
+        reads.append("spotify.silver.dim_user")
+        return _Stream()
+
+    return quarantine.split_validated("dim_user", "dim_user_stg")
+
+
+def test_quarantined_staging_is_not_materialized(spark, dlt_graph):
+    _declare_dim_user(dlt_graph, [])
+
+    tables = sorted(name for name, (kind, _) in dlt_graph.graph.items() if kind == "table")
+    assert dlt_graph.graph["dim_user_stg"][0] == "view"
+    assert dlt_graph.graph["dim_user_valid"][0] == "view"
+    assert tables == ["dim_user_quarantine"]
+
+
+def test_cdc_source_reads_silver_through_the_staging_view(spark, dlt_graph):
+    reads = []
+    valid = _declare_dim_user(dlt_graph, reads)
+
+    # The CDC flow evaluates valid → staging inline; the quarantine table is the second reader
+    dlt_graph.read_stream(valid)
+    assert len(reads) == 1
+    dlt_graph.graph["dim_user_quarantine"][1]()
+    assert len(reads) == 2
+
+
+def test_staging_can_be_materialized_for_debugging(spark, dlt_graph):
+    spark.conf.set("spotify.gold.materialize_staging", "dim_user_stg")
+    try:
+        _declare_dim_user(dlt_graph, [])
+    finally:
+        spark.conf.unset("spotify.gold.materialize_staging")
+
+    assert dlt_graph.graph["dim_user_stg"][0] == "table"
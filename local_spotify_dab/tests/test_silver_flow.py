@@ -0,0 +1,117 @@
+# ============================================================
+# Bronze → Silver end to end on a local SparkSession
+# ============================================================
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from bronze_data import BATCH_1, BATCH_2, BRONZE_SCHEMAS
+from utils.column_profile import load_profiles, rollup_profiles
+from utils.silver_engine import local_tables, migrate_encoded_columns, preview_silver_table, read_silver_table
+from utils.silver_job import metrics_target, run_silver
+from utils.stream_metrics import load_metrics
+
+
+def _counts(spark, silver_base):
+    return {name: read_silver_table(spark, spec).count() for name, spec in local_tables(silver_base).items()}
+
+
+def test_preview_writes_nothing(spark, bronze, silver_base):
+    bronze_base = bronze(BATCH_1)
+
+    rows = preview_silver_table(spark, local_tables(silver_base)["dim_track"], bronze_base).collect()
+
+    assert sorted((r["track_id"], r["durationFlag"]) for r in rows) == [(1, "low"), (2, "medium"), (3, "high")]
+    assert not os.path.exists(silver_base)
+
+
+def test_run_silver_per_table(spark, bronze, silver_base):
+    bronze_base = bronze(BATCH_1)
+
+    run_silver(spark, bronze_base, silver_base, local=True)
+
+    assert _counts(spark, silver_base) == {
+        "dim_user": 3,
+        "dim_artist": 2,
+        "dim_track": 3,
+        "dim_date": 2,
+        "fact_stream": 3,
+    }
+
+    tables = local_tables(silver_base)
+    users = read_silver_table(spark, tables["dim_user"])
+    assert dict(users.dtypes)["subscription_type_id"] == "tinyint"
+    # "Student" is not a registered subscription type -> Unknown (0)
+    assert users.where("user_id = 3").first()["subscription_type_id"] == 0
+
+    facts = read_silver_table(spark, tables["fact_stream"])
+    assert "stream_date" in facts.columns
+    cdf = spark.sql(f"SHOW TBLPROPERTIES {tables['fact_stream'].sql_ref} (delta.enableChangeDataFeed)").first()
+    assert cdf["value"] == "true"
+
+    metrics = load_metrics(spark, metrics_target(silver_base))
+    assert {r["query_name"] for r in metrics.select("query_name").distinct().collect()} == set(tables)
+
+
+def test_second_run_only_ingests_new_files(spark, bronze, silver_base):
+    bronze_base = bronze(BATCH_1)
+    run_silver(spark, bronze_base, silver_base, local=True)
+
+    bronze(BATCH_2)
+    run_silver(spark, bronze_base, silver_base, local=True)
+
+    counts = _counts(spark, silver_base)
+    # user 2 was already seen: first seen wins
+    assert counts["dim_user"] == 4
+    assert counts["fact_stream"] == 5
+    assert counts["dim_track"] == 3
+
+    tables = local_tables(silver_base)
+    device = read_silver_table(spark, tables["fact_stream"]).where("stream_id = 5").first()["device_type_id"]
+    assert device == 0
+
+
+def test_table_with_string_columns_is_migrated_once(spark, bronze, silver_base):
+    bronze_base = bronze(BATCH_1)
+    spec = local_tables(silver_base)["dim_user"]
+    # created before subscription_type was encoded
+    legacy = [(9, "Old User", "Peru", "Premium", None, None, None)]
+    spark.createDataFrame(legacy, BRONZE_SCHEMAS["DimUser"]).write.format("delta").save(spec.location)
+
+    with pytest.raises(ValueError, match="subscription_type"):
+        run_silver(spark, bronze_base, silver_base, tables=["dim_user"], local=True)
+
+    assert migrate_encoded_columns(spark, spec) == ("subscription_type",)
+    assert migrate_encoded_columns(spark, spec) == ()
+
+    run_silver(spark, bronze_base, silver_base, tables=["dim_user"], local=True)
+    users = read_silver_table(spark, spec)
+    assert users.count() == 4
+    assert users.where("user_id = 9").first()["subscription_type_id"] == 2
+
+
+def test_multiplex_matches_per_table(spark, bronze, tmp_path):
+    bronze_base = bronze(BATCH_1)
+    per_table, multiplexed = str(tmp_path / "per_table"), str(tmp_path / "multiplexed")
+
+    run_silver(spark, bronze_base, per_table, local=True)
+    run_silver(spark, bronze_base, multiplexed, local=True, multiplex=True)
+
+    assert _counts(spark, multiplexed) == _counts(spark, per_table)
+
+
+def test_profiles_roll_up_across_runs(spark, bronze, layout):
+    run_silver(spark, bronze(BATCH_1), layout.silver_base, tables=["dim_user"], local=True, profile=True)
+    run_silver(spark, bronze(BATCH_2), layout.silver_base, tables=["dim_user"], local=True, profile=True)
+
+    profiles = load_profiles(spark, layout.profile_target)
+    assert profiles.select("batch_id").distinct().count() == 2
+
+    country = rollup_profiles(profiles.where("column = 'country'"), period=None).first()
+    users = read_silver_table(spark, local_tables(layout.silver_base)["dim_user"])
+    assert country["rows"] == users.count()
+    assert country["distinct_estimate"] == users.select("country").distinct().count()
+    assert sum(tv["count"] for tv in country["top_values"]) == users.count()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+from utils import storage_paths
+from utils.silver_engine import SILVER_TABLES, checkpoint_location, table_path
+from utils.storage_paths import StorageLayout, resolve_base_path
+
+
+@pytest.fixture(autouse=True)
+def clean_resolution(monkeypatch):
+    for var in (*storage_paths.BASE_PATH_ENV.values(), storage_paths.LOCAL_ROOT_ENV, storage_paths.DATABRICKS_RUNTIME_ENV):
+        monkeypatch.delenv(var, raising=False)
+    storage_paths.clear_resolved_paths()
+    yield
+    storage_paths.clear_resolved_paths()
+
+
+def test_layout_paths(tmp_path):
+    layout = StorageLayout.under(tmp_path)
+    spec = SILVER_TABLES["dim_user"]
+
+    assert layout.bronze_table(spec) == f"{tmp_path}/bronze/DimUser"
+    assert layout.table_data(spec) == f"{tmp_path}/silver/DimUser/data"
+    assert layout.checkpoint(spec) == f"{tmp_path}/silver/_checkpoints/dim_user"
+    assert layout.multiplex_checkpoint == f"{tmp_path}/silver/_checkpoints/_multiplex"
+    # Engine helpers derive from the same layout
+    assert table_path(layout.silver_base, spec) == layout.table_data(spec)
+    assert checkpoint_location(layout.silver_base, spec) == layout.checkpoint(spec)
+
+
+def test_env_var_wins_and_is_cached(monkeypatch):
+    monkeypatch.setenv("SILVER_BASE_PATH", "/mnt/silver/")
+    assert resolve_base_path(None, "silver") == "/mnt/silver"
+
+    monkeypatch.setenv("SILVER_BASE_PATH", "/mnt/other")
+    assert resolve_base_path(None, "silver") == "/mnt/silver"
+
+
+def test_local_fallback(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPOTIFY_LOCAL_ROOT", str(tmp_path))
+    assert StorageLayout().bronze_base == str(tmp_path / "bronze")
+
+
+def test_databricks_without_location_raises(monkeypatch):
+    monkeypatch.setenv("DATABRICKS_RUNTIME_VERSION", "15.4")
+    with pytest.raises(RuntimeError, match="SILVER_BASE_PATH"):
+        resolve_base_path(None, "silver")
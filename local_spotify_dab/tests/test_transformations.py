@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from pyspark.sql.functions import col, when
+
+from utils.transformations import plan_size, reusable
+
+
+def test_pipeline_compiles_to_one_projection_per_stage(spark):
+    df = spark.createDataFrame(
+        [(1, 100, None), (2, 400, None), (3, -1, None)],
+        "track_id INT, duration_sec INT, _rescued_data STRING",
+    )
+    pipeline = (
+        reusable()
+        .drop("_rescued_data", "not_there")
+        .derive("durationFlag", when(col("duration_sec") < 150, "low").otherwise("high"))
+        .derive("duration_min", col("duration_sec") / 60)
+        .cast({"track_id": "bigint"})
+        .filter(col("duration_sec") >= 0)
+    )
+
+    fused = pipeline.apply(df)
+    chained = pipeline._chained(df)
+
+    assert fused.dtypes == chained.dtypes
+    assert sorted(fused.collect()) == sorted(chained.collect())
+    # one select + one filter on top of the input
+    assert plan_size(fused) == plan_size(df) + 2 < plan_size(chained)
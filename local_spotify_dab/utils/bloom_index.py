@@ -0,0 +1,310 @@
+# ============================================================
+# Per-file Bloom filter indexes on Silver lookup keys
+#
+# Purpose
+# -------
+# Delta min/max statistics cannot prune files for point lookups on
+# high-cardinality keys that are spread over every file (e.g. one
+# user's streams). A Bloom filter per (file, key column) answers
+# "can this file contain user 123?" so a support-style query only
+# opens the few files that may match.
+#
+# Two implementations, chosen by how the table is addressed
+# ---------------------------------------------------------
+# - UC table name (Databricks): native Delta Bloom filter index
+#   (CREATE BLOOMFILTER INDEX). Filters are written with every new
+#   data file and used by the Databricks reader automatically.
+# - Storage path (local / delta-spark): side-car index at
+#   {table location}/_bloom_index (Parquet, ignored by Delta and
+#   VACUUM like every `_`-prefixed folder), one row per
+#   (file, column) with the packed filter bits.
+#   `read_by_keys` consults it and scans only candidate files.
+#
+# Maintenance (called from `maintain_silver_tables`)
+# -------------------------------------------------
+# - Files added since the last refresh are indexed incrementally
+# - Once removed files (e.g. compacted by OPTIMIZE) outnumber the
+#   live ones, the side-car is rebuilt from the active files
+# - Files without an index entry are always scanned, so a stale
+#   index never hides rows
+# ============================================================
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.utils import AnalysisException
+
+from utils.silver_maintenance import _active_files, _is_path, _read_table, _table_location
+
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_DIR: str = "_bloom_index"
+DEFAULT_FPP: float = 0.01
+
+# Expected distinct keys per file, for the native index (sizing only)
+DEFAULT_NUM_ITEMS: int = 1_000_000
+
+INDEX_SCHEMA: str = "path STRING, column STRING, num_keys BIGINT, num_bits BIGINT, num_hashes INT, bits BINARY"
+
+
+# ------------------------------------------------------------
+# 1) Bloom filter (numpy)
+#
+# Keys are hashed in their string form, so Spark-side builds
+# (CAST(col AS STRING)) and driver-side lookups (str(value)) agree
+# whatever the column type. One 64-bit hash is split into two
+# 32-bit halves for double hashing:
+#   position_i = (lo + i * hi) mod num_bits
+# ------------------------------------------------------------
+
+def _hash(values: Iterable[str]) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(list(values), dtype=object))
+
+
+def _positions(hashes: np.ndarray, num_bits: int, num_hashes: int) -> np.ndarray:
+    lo = hashes & np.uint64(0xFFFFFFFF)
+    hi = (hashes >> np.uint64(32)) | np.uint64(1)
+    rounds = np.arange(num_hashes, dtype=np.uint64)
+    return (lo[:, None] + rounds[None, :] * hi[:, None]) % np.uint64(num_bits)
+
+
+def filter_size(num_keys: int, fpp: float = DEFAULT_FPP) -> Tuple[int, int]:
+    """(num_bits, num_hashes) of an optimal filter for `num_keys` keys."""
+    num_keys = max(num_keys, 1)
+    num_bits = max(64, math.ceil(-num_keys * math.log(fpp) / math.log(2) ** 2))
+    num_bits = (num_bits + 7) // 8 * 8
+    return num_bits, max(1, round(num_bits / num_keys * math.log(2)))
+
+
+def build_filter(keys: Iterable[str], fpp: float = DEFAULT_FPP) -> Tuple[int, int, int, bytes]:
+    """
+    Build a Bloom filter over distinct string keys.
+
+    Returns
+    -------
+    (num_keys, num_bits, num_hashes, packed bits)
+    """
+    keys = pd.unique(np.asarray(list(keys), dtype=object))
+    num_bits, num_hashes = filter_size(len(keys), fpp)
+    bits = np.zeros(num_bits, dtype=np.uint8)
+    if len(keys):
+        bits[_positions(_hash(keys), num_bits, num_hashes).ravel().astype(np.int64)] = 1
+    return len(keys), num_bits, num_hashes, np.packbits(bits, bitorder="little").tobytes()
+
+
+def might_contain(bits: bytes, num_bits: int, num_hashes: int, keys: Sequence[str]) -> bool:
+    """True if ANY of `keys` may be in the filter (no false negatives)."""
+    if not keys:
+        return False
+    packed = np.frombuffer(bits, dtype=np.uint8)
+    positions = _positions(_hash(keys), num_bits, num_hashes).astype(np.int64)
+    hits = (packed[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1
+    return bool(hits.all(axis=1).any())
+
+
+# ------------------------------------------------------------
+# 2) Side-car index (path tables)
+# ------------------------------------------------------------
+
+def _file_name(path: str) -> str:
+    return unquote(path).rsplit("/", 1)[-1]
+
+
+def _load_index(spark: SparkSession, location: str) -> Optional[DataFrame]:
+    try:
+        return spark.read.schema(INDEX_SCHEMA).parquet(f"{location}/{INDEX_DIR}")
+    except AnalysisException:
+        # Not built yet
+        return None
+
+
+def _build_rows(fpp: float):
+    def build(pdf: pd.DataFrame) -> pd.DataFrame:
+        num_keys, num_bits, num_hashes, bits = build_filter(pdf["value"].dropna(), fpp)
+        return pd.DataFrame(
+            {
+                "path": [pdf["path"].iloc[0]],
+                "column": [pdf["column"].iloc[0]],
+                "num_keys": [num_keys],
+                "num_bits": [num_bits],
+                "num_hashes": [num_hashes],
+                "bits": [bits],
+            }
+        )
+
+    return build
+
+
+def refresh_sidecar_index(
+    spark: SparkSession,
+    ref: str,
+    columns: Sequence[str],
+    fpp: float = DEFAULT_FPP,
+) -> int:
+    """
+    Index every active file of a Delta path table that has no filter yet.
+
+    Returns
+    -------
+    int
+        Number of files indexed.
+    """
+    location = _table_location(spark, ref)
+    active: Set[str] = {row["path"] for row in _active_files(spark, location).select("path").collect()}
+
+    existing = _load_index(spark, location)
+    indexed: Set[Tuple[str, str]] = set()
+    if existing is not None:
+        indexed = {(row["path"], row["column"]) for row in existing.select("path", "column").collect()}
+
+    stale = {path for path, _ in indexed} - active
+    if len(stale) > len(active):
+        # Mostly compacted away: rebuild instead of appending
+        missing, mode = sorted(active), "overwrite"
+    else:
+        missing = sorted(p for p in active if any((p, c) not in indexed for c in columns))
+        mode = "append"
+
+    if not missing:
+        return 0
+
+    names = spark.createDataFrame([(_file_name(p), p) for p in missing], "_file STRING, path STRING")
+    values = F.explode(
+        F.array(*[F.struct(F.lit(c).alias("column"), F.col(c).cast("string").alias("value")) for c in columns])
+    )
+    rows = (
+        spark.read.parquet(*[f"{location}/{unquote(p)}" for p in missing])
+        .select(F.element_at(F.split(F.input_file_name(), "/"), -1).alias("_file"), values.alias("kv"))
+        .join(F.broadcast(names), "_file")
+        .select("path", "kv.column", "kv.value")
+    )
+
+    (
+        rows.groupBy("path", "column")
+        .applyInPandas(_build_rows(fpp), INDEX_SCHEMA)
+        .write.mode(mode)
+        .parquet(f"{location}/{INDEX_DIR}")
+    )
+
+    logger.info(
+        "%s: Bloom filters %s for %d files (%s)",
+        ref, "rebuilt" if mode == "overwrite" else "added", len(missing), ", ".join(columns),
+    )
+    return len(missing)
+
+
+def candidate_files(spark: SparkSession, ref: str, column: str, values: Sequence) -> Tuple[List[str], int]:
+    """
+    Active files that may contain any of `values` in `column`.
+
+    Returns
+    -------
+    (candidate paths relative to the table, number of active files)
+    """
+    location = _table_location(spark, ref)
+    active = [row["path"] for row in _active_files(spark, location).select("path").collect()]
+    keys = [str(v) for v in values]
+
+    filters = {}
+    index = _load_index(spark, location)
+    if index is not None:
+        for row in index.where(F.col("column") == column).collect():
+            filters[row["path"]] = row
+
+    candidates = [
+        path for path in active
+        if path not in filters
+        or might_contain(filters[path]["bits"], filters[path]["num_bits"], filters[path]["num_hashes"], keys)
+    ]
+    return candidates, len(active)
+
+
+def read_by_keys(spark: SparkSession, ref: str, column: str, values: Sequence) -> DataFrame:
+    """
+    Rows whose `column` is in `values`, scanning only candidate files.
+
+    e.g. read_by_keys(spark, "/tmp/silver/FactStream/data", "user_id", [123])
+
+    Path tables are pruned with the side-car index; UC tables rely on
+    the native index (plain filtered read).
+
+    NOTE:
+    Candidate files are read as Parquet (with `basePath` so partition
+    columns are kept). Silver tables are append-only without deletion
+    vectors, so the active files are exactly the table's rows.
+    """
+    table = _read_table(spark, ref)
+    predicate = F.col(column).isin(list(values))
+
+    if not _is_path(ref):
+        return table.where(predicate)
+
+    candidates, total = candidate_files(spark, ref, column, values)
+    logger.info("%s: %s in %s -> %d of %d files", ref, column, list(values), len(candidates), total)
+
+    if not candidates:
+        return table.limit(0)
+
+    location = _table_location(spark, ref)
+    return (
+        spark.read.option("basePath", location)
+        .parquet(*[f"{location}/{unquote(p)}" for p in candidates])
+        .where(predicate)
+        .select(*table.columns)
+    )
+
+
+# ------------------------------------------------------------
+# 3) Native index (UC tables, Databricks)
+# ------------------------------------------------------------
+
+def create_native_bloom_index(
+    spark: SparkSession,
+    table: str,
+    columns: Sequence[str],
+    fpp: float = DEFAULT_FPP,
+    num_items: int = DEFAULT_NUM_ITEMS,
+) -> List[str]:
+    """
+    Declare a Delta Bloom filter index on columns that do not have one.
+
+    Only files written afterwards carry filters; existing files get
+    them when OPTIMIZE rewrites them.
+
+    Returns
+    -------
+    list of str
+        Columns the index was created for.
+    """
+    schema = spark.read.table(table).schema
+    missing = [c for c in columns if "delta.bloomFilter.enabled" not in schema[c].metadata]
+    if missing:
+        options = ", ".join(f"{c} OPTIONS (fpp = {fpp}, numItems = {num_items})" for c in missing)
+        spark.sql(f"CREATE BLOOMFILTER INDEX ON TABLE {table} FOR COLUMNS ({options})")
+        logger.info("%s: Bloom filter index created on %s", table, ", ".join(missing))
+    return missing
+
+
+def maintain_bloom_index(spark: SparkSession, ref: str, columns: Sequence[str], fpp: float = DEFAULT_FPP) -> int:
+    """
+    Bring the Bloom filters of one table up to date.
+
+    Returns
+    -------
+    int
+        Files indexed by the side-car (0 for UC tables).
+    """
+    if _is_path(ref):
+        return refresh_sidecar_index(spark, ref, columns, fpp)
+    create_native_bloom_index(spark, ref, columns, fpp)
+    return 0
@@ -0,0 +1,419 @@
+# ============================================================
+# Local CDC engine: SCD Type 1 / 2 apply, without a cluster
+#
+# Purpose
+# -------
+# The Gold dimensions and facts are maintained by DLT
+# `create_auto_cdc_flow`, which only runs inside a pipeline. This
+# module applies the same flow settings to Arrow tables in-process
+# (vectorized `pyarrow.compute` + numpy), so Gold can run on small
+# deployments and in CI, and SCD application can be benchmarked on
+# millions of changes locally.
+#
+# Semantics (as create_auto_cdc_flow)
+# -----------------------------------
+# - keys / sequence_by : changes are ordered per key by `sequence_by`,
+#   whatever their arrival order; for the same (key, sequence) the
+#   last arrival wins
+# - apply_as_deletes   : Arrow expression (or boolean column) marking
+#   delete changes
+# - except_column_list : source columns not stored in the target
+# - SCD Type 1         : one row per key, the latest change; a delete
+#   removes the row, and older (out-of-order) changes arriving after
+#   a newer change or delete are ignored
+# - SCD Type 2         : one row per version, `__START_AT` / `__END_AT`
+#   (`__END_AT` null for the current version). A change opens a new
+#   version when a tracked column differs from the previous change
+#   (track_history_column_list / track_history_except_column_list,
+#   default: every column); other changes update the current version
+#   in place. A delete closes the current version. Out-of-order
+#   changes rebuild the history of their key.
+#
+# State
+# -----
+# Next to the target, a change log (`_cdc_log/`) keeps what DLT keeps
+# in its internal state: for SCD1 the latest change per key (deletes
+# as tombstones), for SCD2 every change of every key. Each `apply`
+# only recomputes the keys present in the batch.
+#
+# Storage
+# -------
+#   {path}/part-00000.parquet  target ("parquet")  or a Delta table
+#                              written with delta-rs ("delta",
+#                              optional `deltalake` package)
+#   {path}/_cdc_log/           change log (Parquet; `_` folders are
+#                              ignored by Parquet / Delta readers)
+#
+# Usage
+# -----
+#   spec = CdcSpec(keys=("user_id",), sequence_by="updated_at", stored_as_scd_type=2,
+#                  apply_as_deletes=pc.field("_change_type") == "delete",
+#                  except_column_list=("_change_type",),
+#                  track_history_column_list=("country", "subscription_type_id"))
+#   LocalCdcTable("/tmp/gold/dim_user", spec).apply(changes)
+#
+# Benchmark
+# ---------
+#   python -m utils.cdc_engine --changes 2000000 --keys 200000 --scd 2
+# ============================================================
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+logger = logging.getLogger(__name__)
+
+
+START_COLUMN: str = "__START_AT"
+END_COLUMN: str = "__END_AT"
+
+LOG_DIR: str = "_cdc_log"
+DATA_FILE: str = "part-00000.parquet"
+
+# Internal columns of the change log
+_DELETE: str = "__DELETE"
+_ARRIVAL: str = "__ARRIVAL"
+
+
+# ------------------------------------------------------------
+# 1) Flow settings
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CdcSpec:
+    """
+    Settings of one CDC flow, named as in `dlt.create_auto_cdc_flow`.
+
+    apply_as_deletes:
+        Arrow expression (e.g. `pc.field("_change_type") == "delete"`)
+        or the name of a boolean column; None: no deletes.
+    """
+
+    keys: Tuple[str, ...]
+    sequence_by: str
+    stored_as_scd_type: int = 1
+    apply_as_deletes: Union[pc.Expression, str, None] = None
+    except_column_list: Tuple[str, ...] = ()
+    track_history_column_list: Optional[Tuple[str, ...]] = None
+    track_history_except_column_list: Optional[Tuple[str, ...]] = None
+
+    def __post_init__(self) -> None:
+        if self.stored_as_scd_type not in (1, 2):
+            raise ValueError(f"stored_as_scd_type must be 1 or 2, got {self.stored_as_scd_type!r}")
+        if self.track_history_column_list is not None and self.track_history_except_column_list is not None:
+            raise ValueError("Set track_history_column_list or track_history_except_column_list, not both")
+
+    def value_columns(self, schema: pa.Schema) -> List[str]:
+        """Source columns stored in the target."""
+        return [name for name in schema.names if name not in self.except_column_list and not name.startswith("__")]
+
+    def tracked_columns(self, value_columns: Sequence[str]) -> List[str]:
+        """Columns whose change opens a new SCD2 version."""
+        if self.track_history_column_list is not None:
+            return list(self.track_history_column_list)
+        excluded = set(self.keys) | set(self.track_history_except_column_list or ())
+        return [name for name in value_columns if name not in excluded]
+
+
+# ------------------------------------------------------------
+# 2) Vectorized helpers (tables sorted by keys, sequence)
+# ------------------------------------------------------------
+
+def _same_as_previous(table: pa.Table, columns: Sequence[str]) -> np.ndarray:
+    """Row i has the same (null-safe) values in `columns` as row i - 1."""
+    n = table.num_rows
+    same = np.zeros(n, dtype=bool)
+    if n < 2:
+        return same
+    equal = np.ones(n - 1, dtype=bool)
+    for name in columns:
+        column = table.column(name)
+        current, previous = column.slice(1), column.slice(0, n - 1)
+        both_null = pc.and_(pc.is_null(current), pc.is_null(previous))
+        equal &= np.asarray(pc.or_(pc.fill_null(pc.equal(current, previous), False), both_null))
+    same[1:] = equal
+    return same
+
+
+def _mask(table: pa.Table, condition: Union[pc.Expression, str, None]) -> np.ndarray:
+    """Evaluate the delete condition; null counts as False."""
+    if condition is None:
+        return np.zeros(table.num_rows, dtype=bool)
+    if isinstance(condition, str):
+        values = table.column(condition)
+    else:
+        values = ds.dataset(table).to_table(columns={"_m": condition}).column("_m")
+    return np.asarray(pc.fill_null(values, False))
+
+
+def _sorted_log(log: pa.Table, keys: Sequence[str], sequence_by: str) -> pa.Table:
+    """Sort by key / sequence / arrival and keep the last arrival per (key, sequence)."""
+    order = [(k, "ascending") for k in keys] + [(sequence_by, "ascending"), (_ARRIVAL, "ascending")]
+    log = log.sort_by(order).combine_chunks()
+    duplicate = _same_as_previous(log, [*keys, sequence_by])
+    superseded = np.append(duplicate[1:], False)
+    return log.filter(pa.array(~superseded)) if superseded.any() else log
+
+
+def _next_values(column: pa.ChunkedArray, has_next: np.ndarray) -> pa.Array:
+    """Value of row i + 1 where `has_next`, else null."""
+    n = len(column)
+    following = pc.take(column, pa.array(np.minimum(np.arange(1, n + 1), max(n - 1, 0))))
+    return pc.if_else(pa.array(has_next), following, pa.scalar(None, column.type))
+
+
+# ------------------------------------------------------------
+# 3) SCD application on a sorted change log
+# ------------------------------------------------------------
+
+def scd1_from_log(log: pa.Table, spec: CdcSpec, value_columns: Sequence[str]) -> Tuple[pa.Table, pa.Table]:
+    """
+    (target rows, reduced log) of SCD Type 1.
+
+    The reduced log is the latest change per key, deletes included
+    (tombstones for out-of-order changes).
+    """
+    same_key = _same_as_previous(log, spec.keys)
+    latest = log.filter(pa.array(~np.append(same_key[1:], False)))
+    deleted = np.asarray(latest.column(_DELETE))
+    target = latest.filter(pa.array(~deleted)).select(list(value_columns))
+    return target, latest
+
+
+def scd2_from_log(log: pa.Table, spec: CdcSpec, value_columns: Sequence[str]) -> pa.Table:
+    """Every version of every key in `log`, with __START_AT / __END_AT."""
+    n = log.num_rows
+    if n == 0:
+        return _empty_scd2(log.schema, spec, value_columns)
+
+    same_key = _same_as_previous(log, spec.keys)
+    deleted = np.asarray(log.column(_DELETE))
+    after_delete = np.concatenate([[False], deleted[:-1]])
+
+    changed = np.zeros(n, dtype=bool)
+    for name in spec.tracked_columns(value_columns):
+        changed |= ~_same_as_previous(log, [name])
+
+    # A version starts at an upsert that is the first of its key,
+    # follows a delete, or changes a tracked column
+    opens = ~deleted & (~same_key | after_delete | changed)
+    version = np.cumsum(opens)
+
+    upserts = np.flatnonzero(~deleted)
+    up_version = version[upserts]
+    last = upserts[np.append(up_version[1:] != up_version[:-1], True)] if len(upserts) else upserts
+    first = np.flatnonzero(opens)
+
+    sequence = log.column(spec.sequence_by)
+    following = _next_values(sequence, np.append(same_key[1:], False))
+
+    # Untracked columns keep their latest value (in-place update)
+    versions = log.take(pa.array(last)).select(list(value_columns))
+    versions = versions.append_column(START_COLUMN, pc.take(sequence, pa.array(first)))
+    return versions.append_column(END_COLUMN, pc.take(following, pa.array(last)))
+
+
+def _empty_scd2(schema: pa.Schema, spec: CdcSpec, value_columns: Sequence[str]) -> pa.Table:
+    sequence_type = schema.field(spec.sequence_by).type
+    fields = [schema.field(name) for name in value_columns]
+    fields += [pa.field(START_COLUMN, sequence_type), pa.field(END_COLUMN, sequence_type)]
+    return pa.schema(fields).empty_table()
+
+
+def apply_changes(
+    target: Optional[pa.Table],
+    log: Optional[pa.Table],
+    changes: pa.Table,
+    spec: CdcSpec,
+) -> Tuple[pa.Table, pa.Table]:
+    """
+    Apply one batch of changes.
+
+    Parameters
+    ----------
+    target, log:
+        Current target and change log (None for an empty target).
+    changes:
+        Source rows (in any order).
+
+    Returns
+    -------
+    (target, log)
+        The new target and change log. Keys absent from `changes`
+        are carried over untouched.
+    """
+    value_columns = spec.value_columns(changes.schema)
+
+    valid = pc.is_valid(changes.column(spec.sequence_by))
+    for key in spec.keys:
+        valid = pc.and_(valid, pc.is_valid(changes.column(key)))
+    dropped = changes.num_rows - pc.sum(valid.cast(pa.int64())).as_py() if changes.num_rows else 0
+    if dropped:
+        logger.warning("Ignoring %d changes with a null key or %s", dropped, spec.sequence_by)
+        changes = changes.filter(valid)
+
+    batch = changes.select(value_columns)
+    batch = batch.append_column(_DELETE, pa.array(_mask(changes, spec.apply_as_deletes)))
+    batch = batch.append_column(_ARRIVAL, pa.array(np.arange(1, changes.num_rows + 1, dtype=np.int64)))
+
+    affected = batch.select(list(spec.keys)).group_by(list(spec.keys)).aggregate([])
+    if log is not None and log.num_rows:
+        previous = log.join(affected, list(spec.keys), join_type="left semi")
+        untouched_log = log.join(affected, list(spec.keys), join_type="left anti")
+        previous = previous.set_column(
+            previous.schema.get_field_index(_ARRIVAL), _ARRIVAL, pa.array(np.zeros(previous.num_rows, dtype=np.int64))
+        )
+        batch = pa.concat_tables([previous, batch], promote_options="default")
+    else:
+        untouched_log = None
+
+    merged = _sorted_log(batch, spec.keys, spec.sequence_by)
+    if spec.stored_as_scd_type == 1:
+        rows, merged = scd1_from_log(merged, spec, value_columns)
+    else:
+        rows = scd2_from_log(merged, spec, value_columns)
+
+    if target is not None and target.num_rows:
+        untouched = target.join(affected, list(spec.keys), join_type="left anti")
+        rows = pa.concat_tables([untouched, rows], promote_options="default")
+    if untouched_log is not None:
+        merged = pa.concat_tables([untouched_log, merged], promote_options="default")
+    return rows, merged
+
+
+# ------------------------------------------------------------
+# 4) Persisted target
+# ------------------------------------------------------------
+
+class LocalCdcTable:
+    """
+    A CDC target on the local filesystem.
+
+    Parameters
+    ----------
+    path:
+        Target directory.
+    spec:
+        Flow settings.
+    fmt:
+        "parquet" (default) or "delta" (delta-rs, `pip install deltalake`).
+    """
+
+    def __init__(self, path: str, spec: CdcSpec, fmt: str = "parquet"):
+        if fmt not in ("parquet", "delta"):
+            raise ValueError(f"Unknown format: {fmt!r} (expected 'parquet' or 'delta')")
+        self.path = path
+        self.spec = spec
+        self.fmt = fmt
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.path, LOG_DIR, DATA_FILE)
+
+    def read(self) -> Optional[pa.Table]:
+        """Current target, or None before the first apply."""
+        if self.fmt == "delta":
+            from deltalake import DeltaTable
+
+            if not os.path.isdir(os.path.join(self.path, "_delta_log")):
+                return None
+            return DeltaTable(self.path).to_pyarrow_table()
+
+        data = os.path.join(self.path, DATA_FILE)
+        return pq.read_table(data) if os.path.exists(data) else None
+
+    def read_log(self) -> Optional[pa.Table]:
+        return pq.read_table(self.log_path) if os.path.exists(self.log_path) else None
+
+    def apply(self, changes: pa.Table) -> pa.Table:
+        """Apply `changes` and persist the target and change log; returns the target."""
+        target, log = apply_changes(self.read(), self.read_log(), changes, self.spec)
+        self._write_parquet(log, self.log_path)
+
+        if self.fmt == "delta":
+            from deltalake import write_deltalake
+
+            write_deltalake(self.path, target, mode="overwrite", schema_mode="overwrite")
+        else:
+            self._write_parquet(target, os.path.join(self.path, DATA_FILE))
+        return target
+
+    @staticmethod
+    def _write_parquet(table: pa.Table, path: str) -> None:
+        """Write then rename: readers never see a partial file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+
+# ------------------------------------------------------------
+# 5) Benchmark
+# ------------------------------------------------------------
+
+def synthetic_changes(changes: int, keys: int, seed: int = 0, delete_ratio: float = 0.01) -> pa.Table:
+    """Out-of-order user changes: country / plan (tracked) and a counter (untracked)."""
+    rng = np.random.default_rng(seed)
+    countries = np.array(["US", "GB", "DE", "FR", "BR", "IN", "JP", "SE"])
+    return pa.table(
+        {
+            "user_id": rng.integers(0, keys, changes, dtype=np.int32),
+            "country": countries[rng.integers(0, len(countries), changes)],
+            "subscription_type_id": rng.integers(1, 4, changes, dtype=np.int32),
+            "logins": rng.integers(0, 1000, changes, dtype=np.int32),
+            "updated_at": pa.array(rng.integers(0, 10**9, changes) * 1_000_000, pa.timestamp("us")),
+            "_change_type": np.where(rng.random(changes) < delete_ratio, "delete", "upsert"),
+        }
+    )
+
+
+def benchmark(changes: int, keys: int, scd: int, batches: int) -> Tuple[float, int]:
+    """(seconds, target rows) to apply `changes` in `batches` batches."""
+    spec = CdcSpec(
+        keys=("user_id",),
+        sequence_by="updated_at",
+        stored_as_scd_type=scd,
+        apply_as_deletes=pc.field("_change_type") == "delete",
+        except_column_list=("_change_type",),
+        track_history_column_list=("country", "subscription_type_id"),
+    )
+    source = synthetic_changes(changes, keys)
+    size = -(-changes // batches)
+
+    target = log = None
+    start = time.perf_counter()
+    for offset in range(0, changes, size):
+        target, log = apply_changes(target, log, source.slice(offset, size), spec)
+    return time.perf_counter() - start, target.num_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the local SCD apply engine.")
+    parser.add_argument("--changes", type=int, default=2_000_000)
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--scd", type=int, choices=(1, 2), action="append", help="SCD type(s) (default: 1 and 2).")
+    parser.add_argument("--batches", type=int, default=1)
+    args = parser.parse_args()
+
+    for scd in args.scd or [1, 2]:
+        seconds, rows = benchmark(args.changes, args.keys, scd, args.batches)
+        print(
+            f"SCD{scd}: {args.changes:,} changes over {args.keys:,} keys in {args.batches} batch(es): "
+            f"{seconds:.2f} s ({args.changes / seconds:,.0f} changes/s), {rows:,} target rows"
+        )
+
+
+if __name__ == "__main__":
+    main()
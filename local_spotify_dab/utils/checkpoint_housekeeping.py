@@ -0,0 +1,411 @@
+# ============================================================
+# Silver checkpoint housekeeping
+#
+# Purpose
+# -------
+# Every Silver stream keeps a checkpoint whose `offsets/` and
+# `commits/` logs gain one file per micro-batch, next to the
+# Autoloader file index (`sources/`). Old runs also left checkpoints
+# behind that nothing reads any more. This tool:
+#
+# 1) Finds every checkpoint under the Silver container:
+#      - {silver_base}/_checkpoints/{table}   : per-table streams
+#      - {silver_base}/_checkpoints/_multiplex: multiplexed stream
+#      - {silver_base}/_checkpoints/_profile/{table}: column profiles
+#      - {silver_base}/{Table}/checkpoint     : legacy {Table}/data
+#        stream, replaced by the preview mode (orphaned)
+#      - {silver_base}/{Table}/checkpoint/display: old display
+#        stream checkpoint (orphaned)
+# 2) Reports log sizes, the last committed / planned batch id and the
+#    size of the source file index and state store
+# 3) Removes orphaned display / legacy checkpoints
+#
+# What bounds each part of a live checkpoint
+# ------------------------------------------
+# - offsets/ + commits/: Spark deletes batches older than
+#   `spark.sql.streaming.minBatchesToRetain` after every commit.
+#   `retain_batches` lowers it from Spark's 100 for the Silver runs
+#   (utils.silver_job); nothing here deletes batch files by hand.
+# - sources/: the Autoloader file index (RocksDB) keeps every ingested
+#   file until `cloudFiles.maxFileAge` evicts it (SilverTable.max_file_age);
+#   the local Parquet file source compacts its own file log
+#   (`spark.sql.streaming.fileSource.log.*`). The report shows its size
+#   per checkpoint to decide where a max file age is needed.
+#
+# Safety rules
+# ------------
+# - Nothing runs while a streaming query is active on the session
+# - Live checkpoints are only reported, never modified
+# - `{Table}/checkpoint/schema` is the live Autoloader schema
+#   location: removing a legacy checkpoint never touches it
+# - Unknown folders under `_checkpoints` are reported, never removed
+#
+# Local usage
+# -----------
+#   python -m utils.checkpoint_housekeeping --silver-base /tmp/silver
+#   python -m utils.checkpoint_housekeeping --silver-base /tmp/silver --remove-orphans
+# ============================================================
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pyspark.sql import DataFrame, SparkSession
+
+from utils.silver_engine import SILVER_TABLES, SilverTable
+from utils.storage_paths import StorageLayout
+
+
+logger = logging.getLogger(__name__)
+
+
+MIN_BATCHES_CONF: str = "spark.sql.streaming.minBatchesToRetain"
+
+# Spark keeps 100 batches; a restart only needs the last one, the rest
+# is history for debugging
+DEFAULT_KEEP_BATCHES: int = 20
+
+# Streaming entries of a checkpoint (everything but the schema location)
+STREAM_ENTRIES: Tuple[str, ...] = ("offsets", "commits", "sources", "state", "metadata", ".metadata.crc")
+
+# Batch log files: "12", and Hadoop's checksum / temp siblings ".12.crc", ".12.<uuid>.tmp"
+_BATCH_FILE = re.compile(r"^\.?(\d+)(\.crc|\..+\.tmp)?$")
+
+
+# ------------------------------------------------------------
+# 1) File system access
+#
+# dbutils.fs on Databricks (abfss:// paths), the local file system
+# otherwise. Both expose the same three calls.
+# ------------------------------------------------------------
+
+class _LocalFs:
+    def ls(self, path: str) -> List[Tuple[str, int, bool]]:
+        path = path[len("file:"):] if path.startswith("file:") else path
+        if not os.path.isdir(path):
+            return []
+        entries = []
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            is_dir = os.path.isdir(full)
+            entries.append((full, 0 if is_dir else os.path.getsize(full), is_dir))
+        return entries
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path[len("file:"):] if path.startswith("file:") else path)
+
+    def rm(self, path: str, recurse: bool = False) -> None:
+        path = path[len("file:"):] if path.startswith("file:") else path
+        if os.path.isdir(path) and recurse:
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class _DbutilsFs:
+    def __init__(self, dbutils):
+        self._fs = dbutils.fs
+
+    def ls(self, path: str) -> List[Tuple[str, int, bool]]:
+        try:
+            files = self._fs.ls(path)
+        except Exception as exc:
+            if "FileNotFound" in str(exc):
+                return []
+            raise
+        return [(f.path.rstrip("/"), f.size, f.isDir()) for f in files]
+
+    def exists(self, path: str) -> bool:
+        parent, _, name = path.rstrip("/").rpartition("/")
+        return any(p.rsplit("/", 1)[-1] == name for p, _, _ in self.ls(parent))
+
+    def rm(self, path: str, recurse: bool = False) -> None:
+        self._fs.rm(path, recurse)
+
+
+def _filesystem(spark: SparkSession):
+    try:
+        from pyspark.dbutils import DBUtils
+    except ImportError:
+        return _LocalFs()
+    return _DbutilsFs(DBUtils(spark))
+
+
+def _name(path: str) -> str:
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _du(fs, path: str) -> Tuple[int, int]:
+    """(files, bytes) below `path`, recursively."""
+    files = size = 0
+    for child, child_size, is_dir in fs.ls(path):
+        if is_dir:
+            sub_files, sub_size = _du(fs, child)
+            files, size = files + sub_files, size + sub_size
+        else:
+            files, size = files + 1, size + child_size
+    return files, size
+
+
+def _batch_log(fs, path: str) -> Dict[int, List[Tuple[str, int]]]:
+    """Files of an offsets / commits log grouped by batch id."""
+    batches: Dict[int, List[Tuple[str, int]]] = {}
+    for child, size, is_dir in fs.ls(path):
+        match = _BATCH_FILE.match(_name(child))
+        if match and not is_dir:
+            batches.setdefault(int(match.group(1)), []).append((child, size))
+    return batches
+
+
+# ------------------------------------------------------------
+# 2) Discovery + report
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CheckpointReport:
+    """
+    Size and progress of one streaming checkpoint.
+
+    Attributes
+    ----------
+    path:
+        Checkpoint location.
+    kind:
+        "table", "multiplex", "profile", "legacy", "display" or "unknown".
+    orphaned:
+        Reason the checkpoint is no longer used, or None.
+    last_batch_id:
+        Latest committed batch (None if nothing committed yet).
+    last_offset_id:
+        Latest planned batch; above `last_batch_id` when a run
+        stopped mid-batch (it is replayed on restart).
+    sources_bytes:
+        Size of the source file index (Autoloader RocksDB / file log).
+    """
+
+    path: str
+    kind: str
+    orphaned: Optional[str]
+    offsets_files: int
+    offsets_bytes: int
+    commits_files: int
+    commits_bytes: int
+    last_batch_id: Optional[int]
+    last_offset_id: Optional[int]
+    sources_files: int
+    sources_bytes: int
+    state_bytes: int
+
+    @property
+    def log_bytes(self) -> int:
+        """Bytes in the offsets + commits logs."""
+        return self.offsets_bytes + self.commits_bytes
+
+
+def discover_checkpoints(
+    fs,
+    silver_base: str,
+    specs: Iterable[SilverTable] = SILVER_TABLES.values(),
+) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    List the checkpoints below `silver_base`.
+
+    Returns
+    -------
+    list of (path, kind, orphaned reason)
+    """
+    specs = list(specs)
+    layout = StorageLayout(silver_base=silver_base)
+    short_names = {spec.short_name for spec in specs}
+    found: List[Tuple[str, str, Optional[str]]] = []
+
+    for path, _, is_dir in fs.ls(layout.checkpoints_root):
+        if not is_dir:
+            continue
+        name = _name(path)
+        if name in short_names:
+            found.append((path, "table", None))
+        elif name == "_multiplex":
+            found.append((path, "multiplex", None))
+        elif name == "_profile":
+            for profile_path, _, profile_is_dir in fs.ls(path):
+                if profile_is_dir:
+                    orphaned = None if _name(profile_path) in short_names else "no Silver table with this name"
+                    found.append((profile_path, "profile", orphaned))
+        else:
+            found.append((path, "unknown", "no Silver table writes with this checkpoint"))
+
+    for spec in specs:
+        legacy = layout.legacy_checkpoint(spec)
+        if fs.exists(f"{legacy}/offsets") or fs.exists(f"{legacy}/commits"):
+            found.append((legacy, "legacy", f"{spec.name}/data stream replaced by the preview mode"))
+        if fs.exists(f"{legacy}/display"):
+            found.append((f"{legacy}/display", "display", "display stream replaced by the preview mode"))
+
+    return found
+
+
+def inspect_checkpoint(fs, path: str, kind: str, orphaned: Optional[str] = None) -> CheckpointReport:
+    """Measure one checkpoint."""
+    offsets = _batch_log(fs, f"{path}/offsets")
+    commits = _batch_log(fs, f"{path}/commits")
+    sources_files, sources_bytes = _du(fs, f"{path}/sources")
+    _, state_bytes = _du(fs, f"{path}/state")
+
+    return CheckpointReport(
+        path=path,
+        kind=kind,
+        orphaned=orphaned,
+        offsets_files=sum(len(files) for files in offsets.values()),
+        offsets_bytes=sum(size for files in offsets.values() for _, size in files),
+        commits_files=sum(len(files) for files in commits.values()),
+        commits_bytes=sum(size for files in commits.values() for _, size in files),
+        last_batch_id=max(commits) if commits else None,
+        last_offset_id=max(offsets) if offsets else None,
+        sources_files=sources_files,
+        sources_bytes=sources_bytes,
+        state_bytes=state_bytes,
+    )
+
+
+def checkpoint_query_id(spark: SparkSession, checkpoint: str) -> str:
+    """
+    Id of the streaming query owning `checkpoint`, from its `metadata` file.
+
+    Written when the query first starts and new after a checkpoint
+    reset: scoping a txnAppId with it keeps the batch ids of a reset
+    checkpoint from matching the previous query's Delta transactions.
+    """
+    return spark.read.json(f"{checkpoint}/metadata").first()["id"]
+
+
+def checkpoint_report(
+    spark: SparkSession,
+    silver_base: str,
+    specs: Iterable[SilverTable] = SILVER_TABLES.values(),
+) -> List[CheckpointReport]:
+    """
+    Inspect every checkpoint below `silver_base`.
+
+    Logs a warning when both the multiplexed and per-table streams have
+    committed batches: the two modes must not both run in one
+    environment.
+    """
+    fs = _filesystem(spark)
+    reports = [inspect_checkpoint(fs, *found) for found in discover_checkpoints(fs, silver_base, specs)]
+
+    active = {r.kind for r in reports if r.kind in ("table", "multiplex") and r.last_batch_id is not None}
+    if active == {"table", "multiplex"}:
+        logger.warning("Both per-table and multiplexed checkpoints have progress under %s", silver_base)
+
+    return reports
+
+
+def report_frame(spark: SparkSession, reports: Sequence[CheckpointReport]) -> DataFrame:
+    """Checkpoint reports as a DataFrame (e.g. for `display`)."""
+    rows = [dict(asdict(r), log_bytes=r.log_bytes) for r in reports]
+    return spark.createDataFrame(
+        rows,
+        "path STRING, kind STRING, orphaned STRING, offsets_files INT, offsets_bytes BIGINT, "
+        "commits_files INT, commits_bytes BIGINT, last_batch_id BIGINT, last_offset_id BIGINT, "
+        "sources_files INT, sources_bytes BIGINT, state_bytes BIGINT, log_bytes BIGINT",
+    )
+
+
+# ------------------------------------------------------------
+# 3) Actions
+# ------------------------------------------------------------
+
+def retain_batches(spark: SparkSession, keep_batches: int = DEFAULT_KEEP_BATCHES) -> None:
+    """
+    Keep only the last `keep_batches` batches of offsets / commits (and
+    state versions) in the checkpoints of queries started afterwards.
+    """
+    spark.conf.set(MIN_BATCHES_CONF, str(max(keep_batches, 1)))
+
+
+def remove_orphan(fs, report: CheckpointReport, dry_run: bool = False) -> bool:
+    """
+    Remove an orphaned display / legacy checkpoint.
+
+    Legacy checkpoints only lose their streaming folders; the schema
+    location below them stays.
+    """
+    if report.kind == "display":
+        targets = [report.path]
+    elif report.kind == "legacy":
+        targets = [f"{report.path}/{entry}" for entry in STREAM_ENTRIES]
+    else:
+        return False
+
+    for target in targets:
+        if fs.exists(target):
+            logger.info("%s %s", "Would remove" if dry_run else "Removing", target)
+            if not dry_run:
+                fs.rm(target, True)
+    return True
+
+
+def housekeep_checkpoints(
+    spark: SparkSession,
+    silver_base: str,
+    specs: Iterable[SilverTable] = SILVER_TABLES.values(),
+    remove_orphans: bool = False,
+    dry_run: bool = False,
+) -> List[CheckpointReport]:
+    """
+    Report every checkpoint and optionally remove orphaned checkpoints.
+
+    Raises
+    ------
+    RuntimeError
+        If a streaming query is active on the session.
+    """
+    if spark.streams.active:
+        raise RuntimeError("Stop all streaming queries before checkpoint housekeeping")
+
+    fs = _filesystem(spark)
+    reports = checkpoint_report(spark, silver_base, specs)
+
+    for report in reports:
+        logger.info(
+            "%s [%s] batch=%s planned=%s log=%dB sources=%dB state=%dB%s",
+            report.path, report.kind, report.last_batch_id, report.last_offset_id,
+            report.log_bytes, report.sources_bytes, report.state_bytes,
+            f" ORPHANED: {report.orphaned}" if report.orphaned else "",
+        )
+        if report.orphaned and remove_orphans:
+            remove_orphan(fs, report, dry_run)
+
+    return reports
+
+
+# ------------------------------------------------------------
+# 4) Local entry point
+# ------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Report and clean up Silver streaming checkpoints.")
+    parser.add_argument("--silver-base", required=True, help="Silver container root.")
+    parser.add_argument("--remove-orphans", action="store_true", help="Remove display / legacy checkpoints.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    spark = SparkSession.builder.appName("checkpoint_housekeeping").getOrCreate()
+    housekeep_checkpoints(
+        spark, args.silver_base,
+        remove_orphans=args.remove_orphans,
+        dry_run=args.dry_run,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+# ============================================================
+# Column profiles of Silver streams (mergeable sketches)
+#
+# Purpose
+# -------
+# Answer questions such as "did country cardinality explode?" from
+# a small profile table instead of a hand-written full-table scan.
+#
+# For every micro-batch, ONE aggregation over the batch computes per
+# column:
+#   - row / null counts
+#   - min / max
+#   - an HLL sketch (approximate distinct count)
+#   - value counts of the table's low-cardinality columns
+#     (`SilverTable.profile_top_k`), for top-k
+#
+# Single pass
+# -----------
+# Every row is exploded into 1 + len(top-k columns) rows:
+#   - one "profile" row carrying all columns   (_profile_column NULL)
+#   - one (column, value) row per top-k column (other columns NULL)
+# and ONE groupBy(_profile_column, _profile_value) computes every
+# statistic. The profile group holds the per-column stats; each
+# (column, value) group's row count is that value's frequency.
+#
+# Mergeable sketches
+# ------------------
+# Profile rows are written per (table, batch, column) and can be
+# rolled up to any period without rescanning data:
+#   rows / nulls / value counts : summed
+#   min / max                   : min / max
+#   hll                         : hll_union_agg (Spark 3.5+ /
+#                                 Databricks DataSketches functions)
+# Value counts are exact up to `max_values` distinct values per batch
+# (`top_values_complete` is False beyond that).
+#
+# Attaching to a stream
+# ---------------------
+# `run_profile_stream` streams the NEW rows of a Silver table (its
+# own checkpoint, {silver}/_checkpoints/_profile/{table}) into
+# {silver}/_metrics/column_profile, so ingestion is never slowed
+# down. `profile_batch` can also be called from any `foreachBatch`.
+# ============================================================
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.streaming import StreamingQuery
+from pyspark.sql.types import (
+    ArrayType,
+    BinaryType,
+    IntegerType,
+    LongType,
+    MapType,
+    NumericType,
+    StringType,
+    StructType,
+)
+from pyspark.sql.window import Window
+
+from utils.checkpoint_housekeeping import checkpoint_query_id
+from utils.silver_engine import SilverTable
+from utils.storage_paths import StorageLayout
+
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_COLUMN: str = "_profile_column"
+PROFILE_VALUE: str = "_profile_value"
+
+# HLL precision: 2^12 buckets, ~1.6% standard error
+HLL_LG_K: int = 12
+
+# Distinct values kept per top-k column and batch
+DEFAULT_MAX_VALUES: int = 1000
+DEFAULT_TOP_K: int = 10
+
+PROFILE_SCHEMA: str = (
+    "table STRING, batch_id BIGINT, profiled_at TIMESTAMP, column STRING, data_type STRING, "
+    "rows BIGINT, nulls BIGINT, min_num DOUBLE, max_num DOUBLE, min_str STRING, max_str STRING, "
+    "hll BINARY, top_values ARRAY<STRUCT<value: STRING, count: BIGINT>>, top_values_complete BOOLEAN"
+)
+
+# Types hll_sketch_agg accepts as-is; other types are hashed as strings
+_HLL_TYPES = (IntegerType, LongType, StringType, BinaryType)
+
+
+# ------------------------------------------------------------
+# 1) One-pass batch profile
+# ------------------------------------------------------------
+
+def _profiled_fields(df: DataFrame):
+    # Nested values and internal columns (e.g. _rescued_data) are skipped
+    return [
+        f for f in df.schema.fields
+        if not f.name.startswith("_") and not isinstance(f.dataType, (ArrayType, MapType, StructType))
+    ]
+
+
+def _hll_input(name: str, data_type) -> F.Column:
+    column = F.col(name)
+    return column if isinstance(data_type, _HLL_TYPES) else column.cast("string")
+
+
+def _bound(value: Any, numeric: bool):
+    """Split a min / max value into its (num, str) representation."""
+    if value is None:
+        return None, None
+    if numeric:
+        return float(value), None
+    if isinstance(value, (date, datetime)):
+        return None, value.isoformat()
+    return None, str(value)
+
+
+def profile_batch(
+    df: DataFrame,
+    table: str,
+    batch_id: int,
+    top_k_columns: Sequence[str] = (),
+    max_values: int = DEFAULT_MAX_VALUES,
+) -> List[Dict[str, Any]]:
+    """
+    Profile one (static) batch in a single aggregation.
+
+    Parameters
+    ----------
+    df:
+        Micro-batch to profile.
+    table:
+        Name stamped on the rows (e.g. "dim_user").
+    batch_id:
+        Micro-batch id stamped on the rows.
+    top_k_columns:
+        Low-cardinality columns whose value counts are kept.
+    max_values:
+        Most frequent values kept per top-k column.
+
+    Returns
+    -------
+    list of dict
+        One row per column (`PROFILE_SCHEMA`); empty for an empty batch.
+    """
+    fields = _profiled_fields(df)
+    top_k_columns = [c for c in top_k_columns if c in df.columns]
+
+    # Expand: one profile row + one (column, value) row per top-k column
+    profile_row = F.struct(
+        F.lit(None).cast("string").alias(PROFILE_COLUMN),
+        F.lit(None).cast("string").alias(PROFILE_VALUE),
+        *[F.col(f.name) for f in fields],
+    )
+    value_rows = [
+        F.struct(
+            F.lit(column).alias(PROFILE_COLUMN),
+            F.col(column).cast("string").alias(PROFILE_VALUE),
+            *[F.lit(None).cast(f.dataType).alias(f.name) for f in fields],
+        )
+        for column in top_k_columns
+    ]
+    expanded = df.select(F.explode(F.array(profile_row, *value_rows)).alias("r")).select("r.*")
+
+    aggregations = [F.count(F.lit(1)).alias("rows")]
+    for i, f in enumerate(fields):
+        aggregations += [
+            F.count(F.col(f.name)).alias(f"c{i}_values"),
+            F.min(f.name).alias(f"c{i}_min"),
+            F.max(f.name).alias(f"c{i}_max"),
+            F.hll_sketch_agg(_hll_input(f.name, f.dataType), HLL_LG_K).alias(f"c{i}_hll"),
+        ]
+
+    groups = expanded.groupBy(PROFILE_COLUMN, PROFILE_VALUE).agg(*aggregations).collect()
+
+    profile = next((g for g in groups if g[PROFILE_COLUMN] is None), None)
+    if profile is None:
+        return []
+
+    counts: Dict[str, List] = {column: [] for column in top_k_columns}
+    for g in groups:
+        if g[PROFILE_COLUMN] is not None:
+            counts[g[PROFILE_COLUMN]].append((g[PROFILE_VALUE], g["rows"]))
+
+    profiled_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = []
+    for i, f in enumerate(fields):
+        numeric = isinstance(f.dataType, NumericType)
+        min_num, min_str = _bound(profile[f"c{i}_min"], numeric)
+        max_num, max_str = _bound(profile[f"c{i}_max"], numeric)
+
+        top_values, complete = None, None
+        if f.name in counts:
+            ranked = sorted(counts[f.name], key=lambda vc: vc[1], reverse=True)
+            top_values = [{"value": v, "count": c} for v, c in ranked[:max_values]]
+            complete = len(ranked) <= max_values
+
+        rows.append(
+            {
+                "table": table,
+                "batch_id": batch_id,
+                "profiled_at": profiled_at,
+                "column": f.name,
+                "data_type": f.dataType.simpleString(),
+                "rows": profile["rows"],
+                "nulls": profile["rows"] - profile[f"c{i}_values"],
+                "min_num": min_num,
+                "max_num": max_num,
+                "min_str": min_str,
+                "max_str": max_str,
+                "hll": bytes(profile[f"c{i}_hll"]) if profile[f"c{i}_hll"] is not None else None,
+                "top_values": top_values,
+                "top_values_complete": complete,
+            }
+        )
+    return rows
+
+
+def _is_path(target: str) -> bool:
+    return "/" in target or ":" in target
+
+
+def write_profile(
+    spark: SparkSession,
+    rows: List[Dict[str, Any]],
+    target: str,
+    app_id: Optional[str] = None,
+    version: Optional[int] = None,
+) -> int:
+    """
+    Append profile rows to the profile table.
+
+    With `app_id` / `version` (e.g. query name + query id, batch id) the
+    Delta append is idempotent: a replayed micro-batch is skipped.
+    """
+    if not rows:
+        return 0
+
+    writer = spark.createDataFrame(rows, PROFILE_SCHEMA).write.format("delta").mode("append")
+    if app_id is not None and version is not None:
+        writer = writer.option("txnAppId", app_id).option("txnVersion", version)
+
+    if _is_path(target):
+        writer.save(target)
+    else:
+        writer.saveAsTable(target)
+    return len(rows)
+
+
+# ------------------------------------------------------------
+# 2) Profile stream
+# ------------------------------------------------------------
+
+def profile_query_name(spec: SilverTable) -> str:
+    return f"profile_{spec.short_name}"
+
+
+def run_profile_stream(
+    spark: SparkSession,
+    spec: SilverTable,
+    silver_base: str,
+    target: Optional[str] = None,
+    max_values: int = DEFAULT_MAX_VALUES,
+) -> StreamingQuery:
+    """
+    Profile the rows appended to a Silver table since the last run.
+
+    Each micro-batch of the profile stream covers one or more Silver
+    commits. Blocks until caught up (availableNow).
+
+    Parameters
+    ----------
+    target:
+        Profile table; defaults to {silver_base}/_metrics/column_profile.
+    """
+    layout = StorageLayout(silver_base=silver_base)
+    target = target or layout.profile_target
+    name = profile_query_name(spec)
+    checkpoint = layout.profile_checkpoint(spec)
+    # Resolved on the first batch: the query writes <checkpoint>/metadata when it starts
+    app_ids: Dict[str, str] = {}
+
+    def profile(batch_df: DataFrame, batch_id: int) -> None:
+        if checkpoint not in app_ids:
+            app_ids[checkpoint] = f"{name}_{checkpoint_query_id(batch_df.sparkSession, checkpoint)}"
+        rows = profile_batch(batch_df, spec.short_name, batch_id, spec.profile_top_k, max_values)
+        write_profile(batch_df.sparkSession, rows, target, app_id=app_ids[checkpoint], version=batch_id)
+
+    reader = spark.readStream.format("delta")
+    source = reader.load(spec.location) if spec.location else reader.table(spec.table)
+
+    query = (
+        source.writeStream
+        .queryName(name)
+        .option("checkpointLocation", checkpoint)
+        .foreachBatch(profile)
+        .trigger(availableNow=True)
+        .start()
+    )
+    query.awaitTermination()
+    return query
+
+
+# ------------------------------------------------------------
+# 3) Roll-ups (no rescan of the Silver data)
+# ------------------------------------------------------------
+
+def load_profiles(spark: SparkSession, target: str) -> DataFrame:
+    """Read the profile table written by `write_profile`."""
+    if _is_path(target):
+        return spark.read.format("delta").load(target)
+    return spark.read.table(target)
+
+
+def rollup_profiles(profiles: DataFrame, period: Optional[str] = "day", top_k: int = DEFAULT_TOP_K) -> DataFrame:
+    """
+    Merge batch profiles per table, column and period.
+
+    Parameters
+    ----------
+    profiles:
+        Rows of the profile table (optionally pre-filtered).
+    period:
+        `date_trunc` unit ("hour", "day", "week", ...) or None for
+        all time.
+    top_k:
+        Most frequent values returned per column.
+
+    Returns
+    -------
+    DataFrame
+        table, column, period_start, rows, nulls, null_fraction,
+        min_num, max_num, min_str, max_str, distinct_estimate, hll,
+        top_values, top_values_complete
+    """
+    period_start = F.date_trunc(period, "profiled_at") if period else F.lit(None).cast("timestamp")
+    keys = ["table", "column", "period_start"]
+    profiles = profiles.withColumn("period_start", period_start)
+
+    merged = (
+        profiles.groupBy(*keys)
+        .agg(
+            F.sum("rows").alias("rows"),
+            F.sum("nulls").alias("nulls"),
+            F.min("min_num").alias("min_num"),
+            F.max("max_num").alias("max_num"),
+            F.min("min_str").alias("min_str"),
+            F.max("max_str").alias("max_str"),
+            F.hll_union_agg("hll", True).alias("hll"),
+            F.bool_and("top_values_complete").alias("top_values_complete"),
+        )
+        .withColumn("null_fraction", F.col("nulls") / F.col("rows"))
+        .withColumn("distinct_estimate", F.hll_sketch_estimate("hll"))
+    )
+
+    ranked = Window.partitionBy(*keys).orderBy(F.col("count").desc(), F.col("value"))
+    top_values = (
+        profiles.select(*keys, F.explode("top_values").alias("tv"))
+        .groupBy(*keys, F.col("tv.value").alias("value"))
+        .agg(F.sum("tv.count").alias("count"))
+        .withColumn("rank", F.row_number().over(ranked))
+        .where(F.col("rank") <= top_k)
+        .groupBy(*keys)
+        .agg(F.sort_array(F.collect_list(F.struct("rank", "value", "count"))).alias("ranked"))
+        .select(
+            *keys,
+            F.expr("transform(ranked, r -> named_struct('value', r.value, 'count', r.count))").alias("top_values"),
+        )
+    )
+
+    # Null-safe on period_start (NULL for the all-time roll-up)
+    on = [merged[k].eqNullSafe(top_values[k]) for k in keys]
+    return merged.join(top_values, on, "left").select(
+        *[merged[k] for k in keys], "rows", "nulls", "null_fraction", "min_num", "max_num", "min_str", "max_str",
+        "distinct_estimate", "hll", "top_values", "top_values_complete",
+    )
+
+
+def distinct_trend(profiles: DataFrame, table: str, column: str, period: str = "day") -> DataFrame:
+    """
+    Approximate distinct count of one column per period, e.g.
+    distinct_trend(profiles, "dim_user", "country").
+    """
+    return (
+        rollup_profiles(profiles.where((F.col("table") == table) & (F.col("column") == column)), period)
+        .select("period_start", "rows", "distinct_estimate", "null_fraction")
+        .orderBy("period_start")
+    )
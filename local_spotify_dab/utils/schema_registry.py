@@ -0,0 +1,298 @@
+# ============================================================
+# Silver schema registry
+#
+# Purpose
+# -------
+# Declare the Silver column types of every Bronze table in one
+# place. Autoloader keeps whatever types the ADF Parquet sink
+# produced; the Silver engine uses this registry to:
+#   - narrow integer types (e.g. day/month -> tinyint)
+#   - cast date/timestamp columns consistently
+#   - encode low-cardinality strings as small integer codes
+#     backed by lookup dimensions (spotify.silver.lkp_<column>)
+#
+# Encoded columns: existing tables
+# --------------------------------
+# Encoding REPLACES a string column by `<column>_id`: a Silver table
+# created before the column was encoded rejects the new appends.
+# `ensure_silver_table` (utils.silver_engine) refuses to start such a
+# stream; rebuild the table once with
+# `utils.silver_engine.migrate_encoded_columns` (Silver stream stopped),
+# then FULL REFRESH the Gold pipeline.
+#
+# Readers that need the strings query the decode views
+# `spotify.silver.<table>_decoded` (`write_decode_views`): the Silver
+# columns plus the decoded string of every code column.
+#
+# Source of truth for types: data_scripts/spotify_initial_load.sql
+# ============================================================
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Optional, Sequence, Tuple
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql.functions import coalesce, col, create_map, element_at, lit
+from pyspark.sql.types import (
+    ByteType,
+    DataType,
+    DateType,
+    IntegerType,
+    LongType,
+    ShortType,
+    StringType,
+    StructField,
+    StructType,
+    TimestampType,
+)
+
+
+# ------------------------------------------------------------
+# 1) Lookup dimensions
+#
+# Each encoded column maps its known values to 1..N (tinyint).
+# Code 0 is reserved for NULL / unknown values so a new value
+# never fails the stream; it shows up as "Unknown" until added
+# here.
+#
+# NOTE:
+# Codes are positional. Only APPEND new values, never reorder,
+# or already-written Silver rows change meaning.
+# ------------------------------------------------------------
+
+UNKNOWN_CODE: int = 0
+UNKNOWN_VALUE: str = "Unknown"
+
+LOOKUPS: Dict[str, Tuple[str, ...]] = {
+    "subscription_type": ("Free", "Premium", "Family"),
+    "genre": ("Rock", "Pop", "Hip-Hop", "Jazz", "Classical", "Electronic"),
+    "weekday": ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"),
+    "device_type": ("Mobile", "Desktop", "Smart Speaker"),
+}
+
+
+def encoded_name(column: str) -> str:
+    """Name of the code column that replaces an encoded string column."""
+    return f"{column}_id"
+
+
+# ------------------------------------------------------------
+# 2) Registered table schemas
+#
+# schema  : Silver type of every Bronze column
+# encoded : string columns replaced by `<column>_id` codes
+# pinned  : Bronze Parquet types already equal `schema`, so the
+#           stream reads with it as a FIXED schema: no rescue column
+#           (and no per-row rescue check), new columns fail the
+#           stream instead of being rescued and dropped
+# ------------------------------------------------------------
+
+def _schema(*columns: Tuple[str, DataType]) -> StructType:
+    return StructType([StructField(name, data_type, True) for name, data_type in columns])
+
+
+@dataclass(frozen=True)
+class RegisteredSchema:
+    """
+    Silver typing rules for one table.
+
+    Attributes
+    ----------
+    schema:
+        Registered Bronze columns with their Silver types.
+    encoded:
+        Columns encoded through `LOOKUPS`.
+    pinned:
+        Read Bronze with `schema` as a strict, no-rescue schema.
+    """
+
+    schema: StructType
+    encoded: Tuple[str, ...] = ()
+    pinned: bool = False
+
+
+SCHEMA_REGISTRY: Dict[str, RegisteredSchema] = {
+    "dim_user": RegisteredSchema(
+        _schema(
+            ("user_id", IntegerType()),
+            ("user_name", StringType()),
+            ("country", StringType()),
+            ("subscription_type", StringType()),
+            ("start_date", DateType()),
+            ("end_date", DateType()),
+            ("updated_at", TimestampType()),
+        ),
+        encoded=("subscription_type",),
+        pinned=True,
+    ),
+    "dim_artist": RegisteredSchema(
+        _schema(
+            ("artist_id", IntegerType()),
+            ("artist_name", StringType()),
+            ("genre", StringType()),
+            ("country", StringType()),
+            ("updated_at", TimestampType()),
+        ),
+        encoded=("genre",),
+        pinned=True,
+    ),
+    "dim_track": RegisteredSchema(
+        _schema(
+            ("track_id", IntegerType()),
+            ("track_name", StringType()),
+            ("artist_id", IntegerType()),
+            ("album_name", StringType()),
+            ("duration_sec", IntegerType()),
+            ("release_date", DateType()),
+            ("updated_at", TimestampType()),
+        ),
+        pinned=True,
+    ),
+    "dim_date": RegisteredSchema(
+        _schema(
+            ("date_key", IntegerType()),
+            ("date", DateType()),
+            ("day", ByteType()),
+            ("month", ByteType()),
+            ("year", ShortType()),
+            ("weekday", StringType()),
+        ),
+        encoded=("weekday",),
+    ),
+    "fact_stream": RegisteredSchema(
+        _schema(
+            ("stream_id", LongType()),
+            ("user_id", IntegerType()),
+            ("track_id", IntegerType()),
+            ("date_key", IntegerType()),
+            ("listen_duration", IntegerType()),
+            ("device_type", StringType()),
+            ("stream_timestamp", TimestampType()),
+        ),
+        encoded=("device_type",),
+        pinned=True,
+    ),
+}
+
+
+# ------------------------------------------------------------
+# 3) Normalization
+#
+# Applied as ONE select so it adds a single projection to the
+# plan, whatever the number of columns. Columns that are not in
+# the registry (e.g. `_rescued_data`) pass through unchanged.
+# ------------------------------------------------------------
+
+def _encode(column: str) -> Column:
+    mapping = create_map(
+        *chain.from_iterable(
+            (lit(value), lit(code)) for code, value in enumerate(LOOKUPS[column], start=1)
+        )
+    )
+    return (
+        coalesce(element_at(mapping, col(column)), lit(UNKNOWN_CODE))
+        .cast("tinyint")
+        .alias(encoded_name(column))
+    )
+
+
+def normalize_types(df: DataFrame, registered: RegisteredSchema) -> DataFrame:
+    """
+    Cast a Bronze DataFrame to its registered Silver types.
+
+    Parameters
+    ----------
+    df:
+        Bronze DataFrame (streaming or static).
+    registered:
+        Entry of `SCHEMA_REGISTRY`.
+
+    Returns
+    -------
+    DataFrame
+        Same columns in the same order, with registered types applied
+        and encoded columns replaced by `<column>_id` codes.
+    """
+    types = {field.name: field.dataType for field in registered.schema.fields}
+    current = dict(df.dtypes)
+    projection = []
+
+    for name in df.columns:
+        if name in registered.encoded:
+            projection.append(_encode(name))
+        elif name in types and current[name] != types[name].simpleString():
+            projection.append(col(name).cast(types[name]).alias(name))
+        else:
+            projection.append(col(name))
+
+    return df.select(*projection)
+
+
+def pending_encodings(columns: Sequence[str], registered: RegisteredSchema) -> Tuple[str, ...]:
+    """Encoded columns still stored as strings in a table with `columns` (not migrated yet)."""
+    return tuple(name for name in registered.encoded if name in columns)
+
+
+# ------------------------------------------------------------
+# 4) Lookup tables and decode views
+# ------------------------------------------------------------
+
+def lookup_frame(spark: SparkSession, column: str) -> DataFrame:
+    """
+    Return the lookup dimension for an encoded column.
+
+    Columns: `<column>_id` (tinyint), `<column>` (string), including
+    the reserved Unknown row.
+    """
+    rows = [(UNKNOWN_CODE, UNKNOWN_VALUE)] + [
+        (code, value) for code, value in enumerate(LOOKUPS[column], start=1)
+    ]
+    return spark.createDataFrame(rows, f"{encoded_name(column)} TINYINT, {column} STRING")
+
+
+def write_lookup_tables(
+    spark: SparkSession,
+    schema: str = "spotify.silver",
+    location: Optional[str] = None,
+) -> None:
+    """
+    (Re)write every lookup dimension as `{schema}.lkp_<column>`, or as
+    the Delta path `{location}/lkp_<column>` when `location` is given
+    (local runs).
+
+    The tables are tiny and fully derived from `LOOKUPS`, so they are
+    simply overwritten on each run.
+    """
+    for column in LOOKUPS:
+        writer = lookup_frame(spark, column).write.format("delta").mode("overwrite")
+        if location:
+            writer.save(f"{location}/lkp_{column}")
+        else:
+            writer.saveAsTable(f"{schema}.lkp_{column}")
+
+
+def write_decode_views(spark: SparkSession, schema: str = "spotify.silver") -> None:
+    """
+    Create or replace `{schema}.<table>_decoded` for every existing
+    Silver table with encoded columns: the table joined to its lookup
+    dimensions, i.e. every code column plus its decoded string.
+    """
+    for table, registered in SCHEMA_REGISTRY.items():
+        if not registered.encoded or not spark.catalog.tableExists(f"{schema}.{table}"):
+            continue
+        decoded = ", ".join(f"lkp_{column}.{column}" for column in registered.encoded)
+        joins = "\n".join(
+            f"LEFT JOIN {schema}.lkp_{column} AS lkp_{column} "
+            f"ON t.{encoded_name(column)} = lkp_{column}.{encoded_name(column)}"
+            for column in registered.encoded
+        )
+        spark.sql(
+            f"""
+            CREATE OR REPLACE VIEW {schema}.{table}_decoded AS
+            SELECT t.*, {decoded}
+            FROM {schema}.{table} AS t
+            {joins}
+            """
+        )
@@ -0,0 +1,773 @@
+# ============================================================
+# Silver engine: Bronze parquet → Silver Delta tables
+#
+# Purpose
+# -------
+# Hold the per-table Silver logic (source folder, target table,
+# cleaning rules) in one place so the Silver notebook only has to
+# pick a table and call `preview_silver_table` or `run_silver_table`.
+#
+# What this module provides
+# -------------------------
+# 1) Cleaning functions for every Silver table
+# 2) `SILVER_TABLES`: the table registry used by the notebook
+#    (column types come from utils.schema_registry)
+# 3) Streaming read (Autoloader) + streaming write (UC table,
+#    created with Change Data Feed enabled)
+# 4) A preview mode that samples pending Bronze rows with a
+#    static read and never writes a checkpoint
+#
+# Local runs (no Databricks)
+# --------------------------
+# - `local_tables(silver_base)` addresses every table by its Delta
+#   path ({silver_base}/{Name}/data) instead of its UC name
+# - Without Autoloader, Bronze is streamed with the plain Parquet
+#   file source (no rescue column, no byte-based admission limit)
+# ============================================================
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional, Tuple
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.functions import col, to_date, when
+from pyspark.sql.streaming import StreamingQuery
+from pyspark.sql.types import StructType
+from pyspark.sql.utils import AnalysisException
+
+from utils.schema_registry import SCHEMA_REGISTRY, normalize_types, pending_encodings
+from utils.storage_paths import StorageLayout, on_databricks
+from utils.stream_metrics import StreamMetricsListener, load_metrics
+from utils.transformations import reusable
+
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------
+# Defaults
+#
+# DEFAULT_PREVIEW_ROWS:
+#   - Upper bound on the number of Bronze rows sampled by
+#     `preview_silver_table`
+# ------------------------------------------------------------
+
+DEFAULT_PREVIEW_ROWS: int = 100
+
+# Every Silver table is created with Change Data Feed enabled so Gold
+# reads only changed rows (see spotify_etl/utilities/silver_reader.py)
+CHANGE_DATA_FEED_PROPERTY: str = "delta.enableChangeDataFeed"
+
+# Autoloader rescue column and the observation counting it per batch
+# (lands in the progress `observedMetrics`, see utils.stream_metrics)
+RESCUED_COLUMN: str = "_rescued_data"
+RESCUE_OBSERVATION: str = "rescue"
+
+# Delta history operations that ingest Bronze rows into Silver. OPTIMIZE,
+# VACUUM, SET TBLPROPERTIES or Bloom filter DDL commit without ingesting
+# anything and must not move the preview's `modifiedAfter` cutoff.
+INGEST_OPERATIONS: Tuple[str, ...] = ("STREAMING UPDATE", "WRITE", "MERGE")
+
+# ------------------------------------------------------------
+# 1) Cleaning functions
+#
+# Each function takes the raw Bronze DataFrame (streaming OR
+# static) and returns the Silver-ready DataFrame. Because they
+# only use DataFrame operations, the same function serves the
+# streaming write and the static preview.
+# ------------------------------------------------------------
+
+def clean_dim_user(df: DataFrame) -> DataFrame:
+    """
+    Clean the DimUser DataFrame.
+
+    Rules
+    -----
+    1) Drop the Autoloader rescue column (`_rescued_data`), after
+       `observe_rescued` has counted its non-null rows
+    2) Drop duplicate users by `user_id`
+
+    Notes
+    -----
+    On a streaming DataFrame `dropDuplicates` is STATEFUL: seen
+    `user_id` values are tracked in the streaming checkpoint.
+    """
+    return (
+        reusable()
+        .drop(RESCUED_COLUMN)
+        .apply(df)
+        .dropDuplicates(["user_id"])
+    )
+
+
+def clean_dim_artist(df: DataFrame) -> DataFrame:
+    """
+    Clean the DimArtist DataFrame.
+
+    Rules
+    -----
+    1) Drop duplicate artists by `artist_id` (stateful when streaming)
+    """
+    return df.dropDuplicates(["artist_id"])
+
+
+def clean_dim_track(df: DataFrame) -> DataFrame:
+    """
+    Enrich the DimTrack DataFrame with a duration bucket.
+
+    durationFlag:
+        < 150 seconds -> "low"
+        < 300 seconds -> "medium"
+        otherwise     -> "high"
+    """
+    return (
+        reusable()
+        .derive(
+            "durationFlag",
+            when(col("duration_sec") < 150, "low")
+            .when(col("duration_sec") < 300, "medium")
+            .otherwise("high"),
+        )
+        .apply(df)
+    )
+
+
+def clean_dim_date(df: DataFrame) -> DataFrame:
+    """
+    DimDate is written as-is (no cleaning or enrichment).
+    """
+    return df
+
+
+def clean_fact_stream(df: DataFrame) -> DataFrame:
+    """
+    Derive the FactStream layout column.
+
+    stream_date:
+        Calendar date of `stream_timestamp`. FactStream is partitioned
+        (or liquid-clustered) on it so time-bounded reads prune files.
+    """
+    return reusable().derive("stream_date", to_date(col("stream_timestamp"))).apply(df)
+
+
+# ------------------------------------------------------------
+# 2) Table registry
+#
+# name           : Bronze folder and Silver storage prefix (e.g. "DimUser")
+# table          : fully-qualified Unity Catalog table name
+# clean          : cleaning function applied before the write
+# cluster_by     : business keys used by maintenance (Z-order/clustering)
+# partition_by   : physical partition columns of the Silver table
+# liquid_cluster : create the table with CLUSTER BY instead of
+#                  partitions (keys = partition_by + cluster_by)
+# dedup_keys     : keys the cleaning function deduplicates on; the
+#                  multiplexed writer (utils.silver_multiplex) also
+#                  anti-joins them against the Silver table
+# max_files_per_trigger / max_bytes_per_trigger :
+#                  Autoloader admission control; when either is set the
+#                  stream runs with trigger(availableNow=True) so a
+#                  backfill is split into bounded, checkpointed batches
+#
+# NOTE:
+# Changing partition_by / liquid_cluster for an existing table requires
+# recreating it (and its checkpoint); Delta rejects appends whose
+# partitioning differs from the table's.
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SilverTable:
+    """
+    Definition of one Bronze → Silver table.
+
+    Attributes
+    ----------
+    name:
+        Bronze folder name, also used as the Silver storage prefix.
+    table:
+        Fully-qualified Unity Catalog target table.
+    clean:
+        Cleaning function shared by the streaming and preview paths.
+    cluster_by:
+        Business keys the table is Z-ordered / clustered on.
+    partition_by:
+        Partition columns used by the streaming write.
+    liquid_cluster:
+        Use liquid clustering on `clustering_keys` instead of partitions.
+    dedup_keys:
+        Keys already written rows must not repeat (first seen wins).
+    max_files_per_trigger:
+        Upper bound on Bronze files admitted per micro-batch.
+    max_bytes_per_trigger:
+        Soft upper bound on Bronze bytes per micro-batch (byte string,
+        e.g. "1g").
+    max_file_age:
+        Autoloader `cloudFiles.maxFileAge` (e.g. "90 days"): files older
+        than this are evicted from the checkpoint's file index, which
+        otherwise grows with every file ever ingested.
+    bloom_keys:
+        Lookup keys that get per-file Bloom filters during maintenance.
+    profile_top_k:
+        Low-cardinality columns whose value counts are profiled (see
+        utils.column_profile).
+    location:
+        Delta path the table is addressed by instead of its UC name
+        (local runs, see `local_tables`).
+    """
+
+    name: str
+    table: str
+    clean: Callable[[DataFrame], DataFrame]
+    cluster_by: Tuple[str, ...] = ()
+    partition_by: Tuple[str, ...] = ()
+    liquid_cluster: bool = False
+    dedup_keys: Tuple[str, ...] = ()
+    max_files_per_trigger: Optional[int] = None
+    max_bytes_per_trigger: Optional[str] = None
+    max_file_age: Optional[str] = None
+    bloom_keys: Tuple[str, ...] = ()
+    profile_top_k: Tuple[str, ...] = ()
+    location: Optional[str] = None
+
+    @property
+    def short_name(self) -> str:
+        """Unqualified table name, e.g. "dim_user"."""
+        return self.table.rsplit(".", 1)[-1]
+
+    @property
+    def clustering_keys(self) -> Tuple[str, ...]:
+        """Liquid clustering keys: layout columns first, then business keys."""
+        return self.partition_by + self.cluster_by
+
+    @property
+    def sql_ref(self) -> str:
+        """Table reference for SQL: UC name, or delta.`<location>`."""
+        return f"delta.`{self.location}`" if self.location else self.table
+
+    @property
+    def rate_limited(self) -> bool:
+        """True when any per-trigger admission limit is configured."""
+        return self.max_files_per_trigger is not None or self.max_bytes_per_trigger is not None
+
+
+SILVER_TABLES: Dict[str, SilverTable] = {
+    spec.short_name: spec
+    for spec in (
+        SilverTable(
+            "DimUser", "spotify.silver.dim_user", clean_dim_user,
+            cluster_by=("user_id",),
+            dedup_keys=("user_id",),
+            bloom_keys=("user_id",),
+            profile_top_k=("country", "subscription_type_id"),
+        ),
+        SilverTable(
+            "DimArtist", "spotify.silver.dim_artist", clean_dim_artist,
+            cluster_by=("artist_id",),
+            dedup_keys=("artist_id",),
+            bloom_keys=("artist_id",),
+            profile_top_k=("country", "genre_id"),
+        ),
+        SilverTable(
+            "DimTrack", "spotify.silver.dim_track", clean_dim_track,
+            cluster_by=("track_id", "artist_id"),
+            bloom_keys=("track_id", "artist_id"),
+        ),
+        SilverTable(
+            "DimDate", "spotify.silver.dim_date", clean_dim_date,
+            cluster_by=("date_key",),
+            profile_top_k=("weekday_id", "month"),
+        ),
+        SilverTable(
+            "FactStream", "spotify.silver.fact_stream", clean_fact_stream,
+            cluster_by=("user_id", "track_id"),
+            partition_by=("stream_date",),
+            max_bytes_per_trigger="1g",
+            max_file_age="90 days",
+            bloom_keys=("user_id", "track_id"),
+            profile_top_k=("device_type_id",),
+        ),
+    )
+}
+
+
+# ------------------------------------------------------------
+# 3) Storage paths
+#
+# Defined once in utils.storage_paths.StorageLayout:
+#   bronze path      : {bronze_base}/{Name}
+#   schema location  : {silver_base}/{Name}/checkpoint/schema
+#   table checkpoint : {silver_base}/_checkpoints/{table}
+#   table data       : {silver_base}/{Name}/data  (local runs)
+# ------------------------------------------------------------
+
+def bronze_path(bronze_base: str, spec: SilverTable) -> str:
+    """Return the Bronze folder for a Silver table."""
+    return StorageLayout(bronze_base=bronze_base).bronze_table(spec)
+
+
+def schema_location(silver_base: str, spec: SilverTable) -> str:
+    """Return the Autoloader schema location for a Silver table."""
+    return StorageLayout(silver_base=silver_base).schema_location(spec)
+
+
+def checkpoint_location(silver_base: str, spec: SilverTable) -> str:
+    """Return the streaming checkpoint used by the UC table write."""
+    return StorageLayout(silver_base=silver_base).checkpoint(spec)
+
+
+def table_path(silver_base: str, spec: SilverTable) -> str:
+    """Return the Delta path of a Silver table addressed by path."""
+    return StorageLayout(silver_base=silver_base).table_data(spec)
+
+
+def local_tables(silver_base: str) -> Dict[str, SilverTable]:
+    """`SILVER_TABLES` addressed by path under `silver_base` (local runs)."""
+    return {
+        short_name: replace(spec, location=table_path(silver_base, spec))
+        for short_name, spec in SILVER_TABLES.items()
+    }
+
+
+def silver_table_exists(spark: SparkSession, spec: SilverTable) -> bool:
+    """True if the Silver table (UC name or Delta path) exists."""
+    if not spec.location:
+        return spark.catalog.tableExists(spec.table)
+    try:
+        spark.sql(f"DESCRIBE DETAIL {spec.sql_ref}").first()
+    except AnalysisException:
+        return False
+    return True
+
+
+def read_silver_table(spark: SparkSession, spec: SilverTable) -> DataFrame:
+    """Static read of a Silver table (UC name or Delta path)."""
+    if spec.location:
+        return spark.read.format("delta").load(spec.location)
+    return spark.read.table(spec.table)
+
+
+def autoloader_available() -> bool:
+    """True when running on Databricks, where `cloudFiles` exists."""
+    return on_databricks()
+
+
+# ------------------------------------------------------------
+# 4) Streaming read + write
+# ------------------------------------------------------------
+
+def to_silver(df: DataFrame, spec: SilverTable) -> DataFrame:
+    """
+    Apply the registered Silver types, then the table's cleaning rules.
+
+    Typing comes first so cleaning (dedup keys, derived columns such as
+    `stream_date`) always sees the narrowed, consistently cast columns.
+    """
+    return spec.clean(normalize_types(df, SCHEMA_REGISTRY[spec.short_name]))
+
+
+def read_bronze_stream(
+    spark: SparkSession,
+    spec: SilverTable,
+    bronze_base: str,
+    silver_base: str,
+) -> DataFrame:
+    """
+    Create the Autoloader stream for a Bronze table.
+
+    Notes
+    -----
+    schemaEvolutionMode = "rescue" keeps unexpected fields in
+    `_rescued_data` instead of failing the stream. Tables whose
+    registered schema is `pinned` are read with that schema and
+    "failOnNewColumns" instead: no rescue column, and drift stops the
+    stream rather than being dropped by the cleaning rules.
+
+    `spec.max_files_per_trigger` / `spec.max_bytes_per_trigger` are
+    passed through as Autoloader admission-control options, and
+    `spec.max_file_age` bounds the file index kept in the checkpoint.
+
+    Outside Databricks the Parquet file source is used instead, see
+    `read_bronze_files`.
+    """
+    if not autoloader_available():
+        return read_bronze_files(spark, spec, bronze_base)
+
+    reader = (
+        spark.readStream
+        .format("cloudFiles")
+        .option("cloudFiles.format", "parquet")
+        .option("cloudFiles.schemaLocation", schema_location(silver_base, spec))
+    )
+
+    registered = SCHEMA_REGISTRY[spec.short_name]
+    if registered.pinned:
+        reader = reader.schema(registered.schema).option("cloudFiles.schemaEvolutionMode", "failOnNewColumns")
+    else:
+        reader = reader.option("cloudFiles.schemaEvolutionMode", "rescue")
+
+    if spec.max_files_per_trigger is not None:
+        reader = reader.option("cloudFiles.maxFilesPerTrigger", str(spec.max_files_per_trigger))
+    if spec.max_bytes_per_trigger is not None:
+        reader = reader.option("cloudFiles.maxBytesPerTrigger", spec.max_bytes_per_trigger)
+    if spec.max_file_age is not None:
+        reader = reader.option("cloudFiles.maxFileAge", spec.max_file_age)
+
+    return reader.load(bronze_path(bronze_base, spec))
+
+
+def read_bronze_files(spark: SparkSession, spec: SilverTable, bronze_base: str) -> DataFrame:
+    """
+    Stream a Bronze table with the plain Parquet file source (local runs).
+
+    Pinned tables use their registered schema; the others take the
+    schema of the files already present. Only `max_files_per_trigger`
+    applies (the file source has no byte limit).
+    """
+    path = bronze_path(bronze_base, spec)
+    registered = SCHEMA_REGISTRY[spec.short_name]
+    schema = registered.schema if registered.pinned else spark.read.parquet(path).schema
+
+    reader = spark.readStream.format("parquet").schema(schema)
+    if spec.max_files_per_trigger is not None:
+        reader = reader.option("maxFilesPerTrigger", str(spec.max_files_per_trigger))
+
+    return reader.load(path)
+
+
+def observe_rescued(df: DataFrame) -> DataFrame:
+    """
+    Count rows with a non-null `_rescued_data` in every micro-batch.
+
+    Adds the "rescue" observation (rows, rescued_rows); a no-op for
+    pinned tables, which have no rescue column.
+    """
+    if RESCUED_COLUMN not in df.columns:
+        return df
+    return df.observe(
+        RESCUE_OBSERVATION,
+        F.count(F.lit(1)).alias("rows"),
+        F.count(col(RESCUED_COLUMN)).alias("rescued_rows"),
+    )
+
+
+def rescued_rows(query: StreamingQuery) -> int:
+    """Total rescued rows over a query's recent micro-batches."""
+    total = 0
+    for progress in query.recentProgress:
+        observed = (progress.get("observedMetrics") or {}).get(RESCUE_OBSERVATION) or {}
+        total += int(observed.get("rescued_rows") or 0)
+    return total
+
+
+def write_silver_table(
+    df: DataFrame,
+    spec: SilverTable,
+    silver_base: str,
+) -> StreamingQuery:
+    """
+    Append a cleaned stream to its Unity Catalog table (or to its
+    Delta path, for tables addressed by `location`).
+
+    trigger(once=True) processes everything currently available
+    and then stops, giving batch-like semantics. Rate-limited tables
+    use trigger(availableNow=True) instead: it also stops when caught
+    up, but honours the per-trigger limits (trigger once ignores them
+    and would read a whole backfill in one giant micro-batch).
+
+    Partitioned tables are written with partitionBy(*spec.partition_by);
+    liquid-clustered tables must already exist (see
+    `ensure_silver_table`), so no layout is passed to the writer.
+    """
+    writer = (
+        df.writeStream
+        .queryName(spec.short_name)
+        .format("delta")
+        .outputMode("append")
+        .option("checkpointLocation", checkpoint_location(silver_base, spec))
+    )
+
+    if spec.partition_by and not spec.liquid_cluster:
+        writer = writer.partitionBy(*spec.partition_by)
+
+    if spec.rate_limited:
+        writer = writer.trigger(availableNow=True)
+    else:
+        writer = writer.trigger(once=True)
+
+    if spec.location:
+        return writer.start(spec.location)
+    return writer.toTable(spec.table)
+
+
+def _layout(spec: SilverTable) -> str:
+    """CLUSTER BY / PARTITIONED BY clause of a Silver table."""
+    if spec.liquid_cluster:
+        return f"CLUSTER BY ({', '.join(spec.clustering_keys)})"
+    if spec.partition_by:
+        return f"PARTITIONED BY ({', '.join(spec.partition_by)})"
+    return ""
+
+
+def ensure_silver_table(spark: SparkSession, spec: SilverTable, schema: StructType) -> None:
+    """
+    Create the Silver table up front with its layout and Change Data Feed.
+
+    - Liquid-clustered tables get CLUSTER BY (streaming writers cannot
+      declare clustering); partitioned tables get PARTITIONED BY
+    - `delta.enableChangeDataFeed` is set at creation, so Gold can read
+      every change from version 0, and re-asserted on existing tables
+      (for those, CDF only covers commits after it was enabled)
+    """
+    columns = ", ".join(f"`{f.name}` {f.dataType.simpleString()}" for f in schema.fields)
+
+    if not silver_table_exists(spark, spec):
+        spark.sql(
+            f"CREATE TABLE IF NOT EXISTS {spec.sql_ref} ({columns}) USING DELTA {_layout(spec)} "
+            f"TBLPROPERTIES ({CHANGE_DATA_FEED_PROPERTY} = true)"
+        )
+        return
+
+    pending = pending_encodings(read_silver_table(spark, spec).columns, SCHEMA_REGISTRY[spec.short_name])
+    if pending:
+        raise ValueError(
+            f"{spec.table} still stores {', '.join(pending)} as strings; rebuild it once with "
+            f"utils.silver_engine.migrate_encoded_columns before streaming encoded codes into it"
+        )
+
+    # Only ALTER when needed: SET TBLPROPERTIES always writes a commit
+    current = spark.sql(f"SHOW TBLPROPERTIES {spec.sql_ref} ({CHANGE_DATA_FEED_PROPERTY})").first()
+    if current is None or str(current["value"]).lower() != "true":
+        spark.sql(f"ALTER TABLE {spec.sql_ref} SET TBLPROPERTIES ({CHANGE_DATA_FEED_PROPERTY} = true)")
+
+
+def migrate_encoded_columns(spark: SparkSession, spec: SilverTable) -> Tuple[str, ...]:
+    """
+    Rebuild a Silver table created before its string columns were encoded.
+
+    One-off: the table is replaced (CREATE OR REPLACE ... AS SELECT, same
+    layout and Change Data Feed) with every encoded column converted to
+    its `<column>_id` code. Run it with the table's Silver stream
+    stopped, then FULL REFRESH the Gold pipeline: the replace rewrites
+    every row of the change feed.
+
+    Returns
+    -------
+    tuple of str
+        The columns that were encoded; empty if the table does not exist
+        or is already migrated (nothing is written then).
+    """
+    if not silver_table_exists(spark, spec):
+        return ()
+    registered = SCHEMA_REGISTRY[spec.short_name]
+    current = read_silver_table(spark, spec)
+    pending = pending_encodings(current.columns, registered)
+    if not pending:
+        return ()
+
+    view = f"_migrate_{spec.short_name}"
+    normalize_types(current, registered).createOrReplaceTempView(view)
+    spark.sql(
+        f"CREATE OR REPLACE TABLE {spec.sql_ref} USING DELTA {_layout(spec)} "
+        f"TBLPROPERTIES ({CHANGE_DATA_FEED_PROPERTY} = true) AS SELECT * FROM {view}"
+    )
+    logger.info("%s: encoded %s", spec.table, ", ".join(pending))
+    return pending
+
+
+def run_silver_table(
+    spark: SparkSession,
+    spec: SilverTable,
+    bronze_base: str,
+    silver_base: str,
+    metrics: Optional[StreamMetricsListener] = None,
+    catch_up: bool = False,
+) -> StreamingQuery:
+    """
+    Read, clean and write one Silver table, blocking until done.
+
+    If `metrics` is given, the finished query's progress is buffered
+    on it synchronously (listener events arrive asynchronously).
+    Rows with rescued data are counted per batch (`rescued_rows`
+    metric) and logged as a warning.
+
+    With `catch_up=True` (requires `metrics`), the per-trigger byte
+    limit is derived from the table's measured throughput, see
+    `catch_up_spec`.
+
+    Returns
+    -------
+    StreamingQuery
+        The finished query (useful for `lastProgress`).
+    """
+    if catch_up and metrics is not None:
+        spec = catch_up_spec(spark, spec, metrics.target, metrics.fmt)
+
+    df = to_silver(observe_rescued(read_bronze_stream(spark, spec, bronze_base, silver_base)), spec)
+
+    ensure_silver_table(spark, spec, df.schema)
+
+    query = write_silver_table(df, spec, silver_base)
+    query.awaitTermination()
+
+    rescued = rescued_rows(query)
+    if rescued:
+        logger.warning("%s: %d Bronze rows had rescued data (schema drift)", spec.short_name, rescued)
+
+    if metrics is not None:
+        metrics.record_query(query)
+
+    return query
+
+
+# ------------------------------------------------------------
+# 5) Preview mode
+#
+# Replaces the old "display" streams ({Table}/checkpoint/display
+# + {Table}/data), which processed and wrote every row a second
+# time and had to be reset with `dbutils.fs.rm`.
+#
+# The preview:
+#   - uses a STATIC read (no streaming query, no checkpoint)
+#   - only looks at Bronze files modified after the last ingesting commit
+#     to the Silver table ("pending" files)
+#   - reads at most `limit` rows, then applies the same typing and
+#     cleaning as the real write
+# ------------------------------------------------------------
+
+def _last_commit_timestamp(spark: SparkSession, table: str) -> Optional[str]:
+    """
+    Return the timestamp of the latest ingesting commit to `table`
+    (`INGEST_OPERATIONS`), formatted for the file source `modifiedAfter`
+    option, or None if the table does not exist yet.
+    """
+    try:
+        row = (
+            spark.sql(f"DESCRIBE HISTORY {table}")
+            .where(col("operation").isin(*INGEST_OPERATIONS))
+            .agg(F.max("timestamp").alias("timestamp"))
+            .first()
+        )
+    except Exception:
+        # Table not created yet (or not accessible): everything is pending
+        return None
+
+    if row is None or row["timestamp"] is None:
+        return None
+
+    return row["timestamp"].strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def preview_silver_table(
+    spark: SparkSession,
+    spec: SilverTable,
+    bronze_base: str,
+    limit: int = DEFAULT_PREVIEW_ROWS,
+    pending_only: bool = True,
+) -> DataFrame:
+    """
+    Sample cleaned Silver rows without starting a streaming query.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession.
+    spec:
+        Table to preview (entry of `SILVER_TABLES`).
+    bronze_base:
+        Bronze base path.
+    limit:
+        Maximum number of Bronze rows read.
+    pending_only:
+        If True, only read Bronze files modified after the last
+        ingesting commit to the Silver table. Falls back to all files when the
+        table does not exist yet.
+
+    Returns
+    -------
+    DataFrame
+        Static DataFrame with at most `limit` cleaned rows.
+    """
+    reader = spark.read.format("parquet")
+
+    if pending_only:
+        last_commit = _last_commit_timestamp(spark, spec.sql_ref)
+        if last_commit:
+            reader = reader.option("modifiedAfter", last_commit)
+
+    sample = reader.load(bronze_path(bronze_base, spec)).limit(limit)
+    return to_silver(sample, spec)
+
+
+# ------------------------------------------------------------
+# 6) Catch-up mode
+#
+# After a large Bronze backfill, pick `max_bytes_per_trigger` so
+# each micro-batch takes roughly `target_batch_seconds`:
+#
+#   rows/sec    : median processedRowsPerSecond of the table's
+#                 recent non-empty batches (metrics table)
+#   bytes/row   : Silver table size / row count (both parquet,
+#                 so a fair proxy for Bronze bytes per row)
+#   chunk bytes : rows/sec * bytes/row * target_batch_seconds,
+#                 clamped to [min_bytes, max_bytes]
+#
+# Without history the spec is returned unchanged.
+# ------------------------------------------------------------
+
+def catch_up_spec(
+    spark: SparkSession,
+    spec: SilverTable,
+    metrics_target: str,
+    metrics_fmt: str = "delta",
+    target_batch_seconds: int = 120,
+    lookback_batches: int = 20,
+    min_bytes: int = 64 * 1024 * 1024,
+    max_bytes: int = 10 * 1024 * 1024 * 1024,
+) -> SilverTable:
+    """
+    Return `spec` with `max_bytes_per_trigger` sized from measured throughput.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession.
+    spec:
+        Table to size.
+    metrics_target, metrics_fmt:
+        Where `StreamMetricsListener` writes its rows.
+    target_batch_seconds:
+        Desired wall-clock duration of one micro-batch.
+    lookback_batches:
+        Number of recent non-empty batches used for the median.
+    min_bytes, max_bytes:
+        Clamp for the derived chunk size.
+
+    Returns
+    -------
+    SilverTable
+        A copy of `spec` (unchanged if there is no usable history).
+    """
+    try:
+        recent = (
+            load_metrics(spark, metrics_target, metrics_fmt)
+            .where((F.col("query_name") == spec.short_name) & (F.col("num_input_rows") > 0))
+            .orderBy(F.col("timestamp").desc())
+            .limit(lookback_batches)
+            .agg(F.percentile_approx("processed_rows_per_second", 0.5).alias("rows_per_sec"))
+            .first()
+        )
+        detail = spark.sql(f"DESCRIBE DETAIL {spec.sql_ref}").select("sizeInBytes").first()
+        row_count = read_silver_table(spark, spec).count()
+    except Exception:
+        # No metrics table / Silver table yet: keep the static settings
+        return spec
+
+    if recent is None or not recent["rows_per_sec"] or not row_count:
+        return spec
+
+    bytes_per_row = detail["sizeInBytes"] / row_count
+    chunk = int(recent["rows_per_sec"] * bytes_per_row * target_batch_seconds)
+    chunk = max(min_bytes, min(max_bytes, chunk))
+
+    return replace(spec, max_bytes_per_trigger=f"{chunk}b", max_files_per_trigger=None)
@@ -0,0 +1,173 @@
+# ============================================================
+# Silver job: Bronze → Silver for every table, without a notebook
+#
+# Purpose
+# -------
+# Everything the Silver notebook does, as one importable function
+# with explicit inputs (SparkSession, Bronze / Silver base paths),
+# so the same flow runs:
+#   - from the thin Databricks notebook (src/silver/Silver_Dimensions.py)
+#   - locally with PySpark + delta-spark, e.g. from the pytest
+#     harness in tests/
+#
+# Local mode
+# ----------
+# - Tables are addressed by path: {silver_base}/{Name}/data
+# - Lookup tables are written to {silver_base}/lkp_<column>
+# - Bronze is streamed with the Parquet file source (no Autoloader)
+#
+# Local usage (delta-spark)
+# -------------------------
+#   python -m utils.silver_job --bronze-base /tmp/bronze --silver-base /tmp/silver
+#   python -m utils.silver_job --bronze-base /tmp/bronze --silver-base /tmp/silver --multiplex
+#   python -m utils.silver_job --bronze-base /tmp/bronze --silver-base /tmp/silver --migrate-encoded
+# ============================================================
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import List, Optional, Sequence
+
+from pyspark.sql import SparkSession
+from pyspark.sql.streaming import StreamingQuery
+
+from utils.checkpoint_housekeeping import retain_batches
+from utils.column_profile import run_profile_stream
+from utils.schema_registry import write_decode_views, write_lookup_tables
+from utils.silver_engine import SILVER_TABLES, local_tables, migrate_encoded_columns, run_silver_table
+from utils.silver_multiplex import run_silver_multiplexed
+from utils.storage_paths import StorageLayout
+from utils.stream_metrics import attach_metrics_listener
+
+
+def metrics_target(silver_base: str) -> str:
+    """Path of the streaming metrics table under the Silver container."""
+    return StorageLayout(silver_base=silver_base).metrics_target
+
+
+def run_silver(
+    spark: SparkSession,
+    bronze_base: str,
+    silver_base: str,
+    tables: Optional[Sequence[str]] = None,
+    local: bool = False,
+    multiplex: bool = False,
+    catch_up: bool = False,
+    profile: bool = False,
+) -> List[StreamingQuery]:
+    """
+    Run Bronze → Silver for the selected tables, blocking until done.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession (with Delta enabled).
+    bronze_base, silver_base:
+        Storage roots of the two layers.
+    tables:
+        Short names (e.g. ["dim_user"]); all tables by default.
+    local:
+        Address tables by path under `silver_base` instead of UC names.
+    multiplex:
+        Ingest all tables with one stream (see utils.silver_multiplex).
+    catch_up:
+        Size micro-batches from measured throughput (per-table mode).
+    profile:
+        Profile the newly written rows of every table afterwards
+        (see utils.column_profile).
+
+    Returns
+    -------
+    list of StreamingQuery
+        The finished queries (one per table, or the multiplexed one).
+    """
+    registry = local_tables(silver_base) if local else SILVER_TABLES
+    specs = [registry[name] for name in tables] if tables else list(registry.values())
+
+    write_lookup_tables(spark, location=silver_base if local else None)
+    retain_batches(spark)
+
+    metrics = attach_metrics_listener(spark, metrics_target(silver_base))
+    try:
+        if multiplex:
+            queries = [run_silver_multiplexed(spark, bronze_base, silver_base, specs, metrics)]
+        else:
+            queries = [
+                run_silver_table(spark, spec, bronze_base, silver_base, metrics, catch_up)
+                for spec in specs
+            ]
+        if profile:
+            for spec in specs:
+                run_profile_stream(spark, spec, silver_base)
+        # Views need the UC tables (and catalog views are not available by path)
+        if not local:
+            write_decode_views(spark)
+    finally:
+        spark.streams.removeListener(metrics)
+        metrics.flush()
+
+    return queries
+
+
+# ------------------------------------------------------------
+# Local entry point (delta-spark)
+# ------------------------------------------------------------
+
+def local_spark(app_name: str = "silver_local") -> SparkSession:
+    """
+    Small local SparkSession with Delta Lake (delta-spark pip package).
+
+    Few shuffle partitions and no UI keep a full Silver run to seconds.
+    """
+    from delta import configure_spark_with_delta_pip
+
+    builder = (
+        SparkSession.builder
+        .master("local[2]")
+        .appName(app_name)
+        .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension")
+        .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog")
+        .config("spark.sql.shuffle.partitions", "2")
+        .config("spark.ui.enabled", "false")
+        .config("spark.ui.showConsoleProgress", "false")
+    )
+    return configure_spark_with_delta_pip(builder).getOrCreate()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run Bronze → Silver locally.")
+    parser.add_argument("--bronze-base", required=True, help="Bronze root: {bronze-base}/{Name}/*.parquet.")
+    parser.add_argument("--silver-base", required=True, help="Silver root for tables, checkpoints and metrics.")
+    parser.add_argument("--table", action="append", choices=sorted(SILVER_TABLES), help="Limit to these tables.")
+    parser.add_argument("--multiplex", action="store_true", help="One stream for all tables.")
+    parser.add_argument("--catch-up", action="store_true", help="Throughput-sized micro-batches.")
+    parser.add_argument("--profile", action="store_true", help="Profile the new rows of every table.")
+    parser.add_argument(
+        "--migrate-encoded", action="store_true", help="Rebuild tables created before their columns were encoded, then exit."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.migrate_encoded:
+        spark = local_spark()
+        registry = local_tables(args.silver_base.rstrip("/"))
+        for name in args.table or sorted(registry):
+            migrate_encoded_columns(spark, registry[name])
+        return
+
+    run_silver(
+        local_spark(),
+        args.bronze_base.rstrip("/"),
+        args.silver_base.rstrip("/"),
+        tables=args.table,
+        local=True,
+        multiplex=args.multiplex,
+        catch_up=args.catch_up,
+        profile=args.profile,
+    )
+
+
+if __name__ == "__main__":
+    main()
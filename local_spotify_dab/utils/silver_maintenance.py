@@ -0,0 +1,476 @@
+# ============================================================
+# Silver maintenance: OPTIMIZE / Z-order (or clustering) / VACUUM
+#
+# Purpose
+# -------
+# Frequent trigger(once=True) appends leave many small files in
+# the Silver Delta tables. This job reads each table's Delta log,
+# measures how fragmented it is, and only compacts + clusters the
+# table on its business keys when a threshold is crossed.
+#
+# What this module does (high level)
+# ----------------------------------
+# 1) Replays `_delta_log` (latest checkpoint + newer JSON commits)
+#    to get the active data files and their sizes
+# 2) Computes file count, small-file ratio and bytes written since
+#    the last OPTIMIZE
+# 3) Runs OPTIMIZE (ZORDER BY the business keys, or plain OPTIMIZE
+#    for liquid-clustered tables) when thresholds are crossed
+# 4) Runs VACUUM after a compaction
+# 5) Logs the scan time of the key columns before and after
+# 6) Refreshes the per-file Bloom filters on the lookup keys
+#    (utils/bloom_index.py)
+#
+# Local usage (delta-spark)
+# -------------------------
+#   python -m utils.silver_maintenance --path-root /tmp/silver
+#   python -m utils.silver_maintenance --table dim_user --dry-run
+# ============================================================
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.window import Window
+
+from utils.silver_engine import SILVER_TABLES, SilverTable
+from utils.silver_job import local_spark
+from utils.storage_paths import StorageLayout
+
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# 1) Thresholds
+#
+# A table is compacted when it has at least `min_files` files AND
+# either:
+#   - the share of files smaller than `small_file_bytes` reaches
+#     `max_small_file_ratio`, or
+#   - at least `max_bytes_since_optimize` bytes were written since
+#     the last OPTIMIZE
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class MaintenanceThresholds:
+    """
+    Thresholds that decide when a Silver table is compacted.
+
+    Attributes
+    ----------
+    small_file_bytes:
+        Files below this size count as "small".
+    min_files:
+        Never compact tables with fewer files than this.
+    max_small_file_ratio:
+        Compact once this share of files is small.
+    max_bytes_since_optimize:
+        Compact once this many bytes were added since the last OPTIMIZE.
+    vacuum_retain_hours:
+        Retention passed to VACUUM (168h = Delta default of 7 days).
+    """
+
+    small_file_bytes: int = 32 * 1024 * 1024
+    min_files: int = 16
+    max_small_file_ratio: float = 0.5
+    max_bytes_since_optimize: int = 1024 * 1024 * 1024
+    vacuum_retain_hours: int = 168
+
+
+@dataclass
+class TableStats:
+    """File statistics for one Delta table, taken from its log."""
+
+    num_files: int
+    total_bytes: int
+    small_files: int
+    bytes_since_optimize: int
+    last_optimize_version: Optional[int]
+
+    @property
+    def small_file_ratio(self) -> float:
+        """Share of active files below the small-file threshold."""
+        return self.small_files / self.num_files if self.num_files else 0.0
+
+
+@dataclass
+class MaintenanceReport:
+    """Outcome of `maintain_table` for one table."""
+
+    table: str
+    before: TableStats
+    optimized: bool = False
+    vacuumed: bool = False
+    after: Optional[TableStats] = None
+    scan_seconds_before: Optional[float] = None
+    scan_seconds_after: Optional[float] = None
+    bloom_files_indexed: int = 0
+    reasons: List[str] = field(default_factory=list)
+
+
+# ------------------------------------------------------------
+# 2) Table references
+#
+# Tables are addressed either by UC name ("spotify.silver.dim_user")
+# or by storage path ("/tmp/silver/DimUser/data"). Paths are wrapped
+# as delta.`<path>` for SQL.
+# ------------------------------------------------------------
+
+def _is_path(ref: str) -> bool:
+    return "/" in ref or ":" in ref
+
+
+def _sql_ref(ref: str) -> str:
+    return f"delta.`{ref}`" if _is_path(ref) else ref
+
+
+def _read_table(spark: SparkSession, ref: str) -> DataFrame:
+    if _is_path(ref):
+        return spark.read.format("delta").load(ref)
+    return spark.read.table(ref)
+
+
+def _table_location(spark: SparkSession, ref: str) -> str:
+    row = spark.sql(f"DESCRIBE DETAIL {_sql_ref(ref)}").select("location").first()
+    return str(row["location"]).rstrip("/")
+
+
+# ------------------------------------------------------------
+# 3) Delta log replay
+#
+# The active file set is:
+#   - every `add` in the latest checkpoint, plus
+#   - the `add` / `remove` actions of newer JSON commits,
+# keeping the LAST action per path (ordered by version).
+# ------------------------------------------------------------
+
+def _latest_checkpoint_version(spark: SparkSession, log_path: str) -> Optional[int]:
+    try:
+        row = spark.read.json(f"{log_path}/_last_checkpoint").select("version").first()
+    except Exception:
+        # No checkpoint written yet: replay JSON commits only
+        return None
+    return int(row["version"]) if row else None
+
+
+def _log_file_actions(spark: SparkSession, location: str) -> DataFrame:
+    """
+    Return one row per (path, version, is_add, size, modificationTime)
+    for every file action since the latest checkpoint (inclusive).
+    """
+    log_path = f"{location}/_delta_log"
+    checkpoint_version = _latest_checkpoint_version(spark, log_path)
+    frames: List[DataFrame] = []
+
+    if checkpoint_version is not None:
+        checkpoint = spark.read.parquet(f"{log_path}/{checkpoint_version:020d}.checkpoint*.parquet")
+        frames.append(
+            checkpoint.where(F.col("add").isNotNull()).select(
+                F.col("add.path").alias("path"),
+                F.lit(checkpoint_version).cast("long").alias("version"),
+                F.lit(True).alias("is_add"),
+                F.col("add.size").cast("long").alias("size"),
+                F.col("add.modificationTime").cast("long").alias("modificationTime"),
+            )
+        )
+
+    commits = (
+        spark.read.json(f"{log_path}/*.json")
+        .withColumn(
+            "version",
+            F.regexp_extract(F.input_file_name(), r"(\d{20})\.json$", 1).cast("long"),
+        )
+    )
+    if checkpoint_version is not None:
+        commits = commits.where(F.col("version") > checkpoint_version)
+
+    if "add" in commits.columns:
+        frames.append(
+            commits.where(F.col("add").isNotNull()).select(
+                F.col("add.path").alias("path"),
+                "version",
+                F.lit(True).alias("is_add"),
+                F.col("add.size").cast("long").alias("size"),
+                F.col("add.modificationTime").cast("long").alias("modificationTime"),
+            )
+        )
+    if "remove" in commits.columns:
+        frames.append(
+            commits.where(F.col("remove").isNotNull()).select(
+                F.col("remove.path").alias("path"),
+                "version",
+                F.lit(False).alias("is_add"),
+                F.lit(None).cast("long").alias("size"),
+                F.lit(None).cast("long").alias("modificationTime"),
+            )
+        )
+
+    if not frames:
+        # No checkpoint and no add / remove action in any commit (e.g. a table with no data files yet)
+        return spark.createDataFrame([], "path STRING, version BIGINT, is_add BOOLEAN, size BIGINT, modificationTime BIGINT")
+
+    actions = frames[0]
+    for frame in frames[1:]:
+        actions = actions.unionByName(frame)
+    return actions
+
+
+def _active_files(spark: SparkSession, location: str) -> DataFrame:
+    """Return (path, size, modificationTime) of the table's active files."""
+    latest = Window.partitionBy("path").orderBy(F.col("version").desc())
+    return (
+        _log_file_actions(spark, location)
+        .withColumn("_rn", F.row_number().over(latest))
+        .where((F.col("_rn") == 1) & F.col("is_add"))
+        .select("path", "size", "modificationTime")
+    )
+
+
+def _last_optimize(spark: SparkSession, ref: str) -> tuple[Optional[int], Optional[int]]:
+    """Return (version, epoch millis) of the latest OPTIMIZE, if any."""
+    row = (
+        spark.sql(f"DESCRIBE HISTORY {_sql_ref(ref)}")
+        .where(F.col("operation") == "OPTIMIZE")
+        .orderBy(F.col("version").desc())
+        .select("version", (F.unix_timestamp("timestamp") * 1000).alias("ts_ms"))
+        .first()
+    )
+    if row is None:
+        return None, None
+    return int(row["version"]), int(row["ts_ms"])
+
+
+def collect_table_stats(
+    spark: SparkSession,
+    ref: str,
+    thresholds: MaintenanceThresholds = MaintenanceThresholds(),
+) -> TableStats:
+    """
+    Compute file statistics for a Delta table from its transaction log.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession (with Delta enabled).
+    ref:
+        UC table name or Delta table path.
+    thresholds:
+        Supplies the small-file size used for the ratio.
+
+    Returns
+    -------
+    TableStats
+        File count, total/small-file sizes and bytes since last OPTIMIZE.
+    """
+    location = _table_location(spark, ref)
+    last_version, last_ts_ms = _last_optimize(spark, ref)
+
+    active = _active_files(spark, location)
+
+    # Files added after the last OPTIMIZE have not been compacted yet
+    new_since_optimize = (
+        F.col("modificationTime") > F.lit(last_ts_ms) if last_ts_ms is not None else F.lit(True)
+    )
+
+    row = active.agg(
+        F.count("*").alias("num_files"),
+        F.coalesce(F.sum("size"), F.lit(0)).alias("total_bytes"),
+        F.count(F.when(F.col("size") < thresholds.small_file_bytes, 1)).alias("small_files"),
+        F.coalesce(F.sum(F.when(new_since_optimize, F.col("size"))), F.lit(0)).alias("bytes_since_optimize"),
+    ).first()
+
+    return TableStats(
+        num_files=int(row["num_files"]),
+        total_bytes=int(row["total_bytes"]),
+        small_files=int(row["small_files"]),
+        bytes_since_optimize=int(row["bytes_since_optimize"]),
+        last_optimize_version=last_version,
+    )
+
+
+# ------------------------------------------------------------
+# 4) Decision + actions
+# ------------------------------------------------------------
+
+def needs_optimize(stats: TableStats, thresholds: MaintenanceThresholds) -> List[str]:
+    """
+    Return the reasons a table should be compacted (empty = skip).
+    """
+    if stats.num_files < thresholds.min_files:
+        return []
+
+    reasons: List[str] = []
+    if stats.small_file_ratio >= thresholds.max_small_file_ratio:
+        reasons.append(
+            f"small-file ratio {stats.small_file_ratio:.2f} >= {thresholds.max_small_file_ratio:.2f}"
+        )
+    if stats.bytes_since_optimize >= thresholds.max_bytes_since_optimize:
+        reasons.append(
+            f"{stats.bytes_since_optimize} bytes since last OPTIMIZE >= {thresholds.max_bytes_since_optimize}"
+        )
+    return reasons
+
+
+def _clustering_columns(spark: SparkSession, ref: str) -> List[str]:
+    detail = spark.sql(f"DESCRIBE DETAIL {_sql_ref(ref)}")
+    if "clusteringColumns" not in detail.columns:
+        return []
+    return list(detail.select("clusteringColumns").first()[0] or [])
+
+
+def optimize_table(spark: SparkSession, ref: str, cluster_by: Sequence[str]) -> None:
+    """
+    Compact a table and co-locate rows by its business keys.
+
+    Liquid-clustered tables are optimized with their own clustering
+    keys; other tables are Z-ordered by `cluster_by`.
+    """
+    if _clustering_columns(spark, ref) or not cluster_by:
+        spark.sql(f"OPTIMIZE {_sql_ref(ref)}")
+    else:
+        spark.sql(f"OPTIMIZE {_sql_ref(ref)} ZORDER BY ({', '.join(cluster_by)})")
+
+
+def vacuum_table(spark: SparkSession, ref: str, retain_hours: int) -> None:
+    """Remove data files no longer referenced by the table."""
+    spark.sql(f"VACUUM {_sql_ref(ref)} RETAIN {retain_hours} HOURS")
+
+
+def time_key_scan(spark: SparkSession, ref: str, keys: Sequence[str]) -> float:
+    """
+    Time a full scan of the key columns (seconds).
+
+    Hashing the keys forces every active file to be opened, so the
+    number reflects per-file overhead rather than Delta statistics.
+    """
+    columns = [F.col(k) for k in keys] or [F.lit(1)]
+    start = time.perf_counter()
+    _read_table(spark, ref).agg(F.sum(F.hash(*columns))).collect()
+    return time.perf_counter() - start
+
+
+def maintain_table(
+    spark: SparkSession,
+    ref: str,
+    cluster_by: Sequence[str],
+    thresholds: MaintenanceThresholds = MaintenanceThresholds(),
+    dry_run: bool = False,
+) -> MaintenanceReport:
+    """
+    Inspect one table and OPTIMIZE + VACUUM it if thresholds are crossed.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession.
+    ref:
+        UC table name or Delta table path.
+    cluster_by:
+        Business keys for Z-order (ignored for liquid-clustered tables).
+    thresholds:
+        When to compact and how long VACUUM retains files.
+    dry_run:
+        Only collect stats and log the decision.
+
+    Returns
+    -------
+    MaintenanceReport
+    """
+    stats = collect_table_stats(spark, ref, thresholds)
+    report = MaintenanceReport(table=ref, before=stats, reasons=needs_optimize(stats, thresholds))
+
+    logger.info(
+        "%s: %d files, %.2f small-file ratio, %d bytes since last OPTIMIZE",
+        ref, stats.num_files, stats.small_file_ratio, stats.bytes_since_optimize,
+    )
+
+    if not report.reasons:
+        logger.info("%s: below thresholds, skipping", ref)
+        return report
+    if dry_run:
+        logger.info("%s: would OPTIMIZE (%s)", ref, "; ".join(report.reasons))
+        return report
+
+    report.scan_seconds_before = time_key_scan(spark, ref, cluster_by)
+    optimize_table(spark, ref, cluster_by)
+    report.optimized = True
+    vacuum_table(spark, ref, thresholds.vacuum_retain_hours)
+    report.vacuumed = True
+    report.scan_seconds_after = time_key_scan(spark, ref, cluster_by)
+    report.after = collect_table_stats(spark, ref, thresholds)
+
+    logger.info(
+        "%s: OPTIMIZE %d -> %d files, key scan %.2fs -> %.2fs",
+        ref, stats.num_files, report.after.num_files,
+        report.scan_seconds_before, report.scan_seconds_after,
+    )
+    return report
+
+
+def maintain_silver_tables(
+    spark: SparkSession,
+    specs: Iterable[SilverTable] = SILVER_TABLES.values(),
+    path_root: Optional[str] = None,
+    thresholds: MaintenanceThresholds = MaintenanceThresholds(),
+    dry_run: bool = False,
+) -> List[MaintenanceReport]:
+    """
+    Run `maintain_table` for every Silver table, then bring its Bloom
+    filter index on `spec.bloom_keys` up to date.
+
+    Parameters
+    ----------
+    path_root:
+        If set, tables are addressed by path as `{path_root}/{Name}/data`
+        (local runs); otherwise by their UC names.
+    """
+    # Local import: utils.bloom_index builds on this module's log replay
+    from utils.bloom_index import maintain_bloom_index
+
+    reports = []
+    for spec in specs:
+        ref = StorageLayout(silver_base=path_root).table_data(spec) if path_root else spec.table
+        report = maintain_table(spark, ref, spec.cluster_by, thresholds, dry_run)
+        if spec.bloom_keys and not dry_run:
+            report.bloom_files_indexed = maintain_bloom_index(spark, ref, spec.bloom_keys)
+        reports.append(report)
+    return reports
+
+
+# ------------------------------------------------------------
+# 5) Local entry point (delta-spark)
+# ------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="OPTIMIZE / Z-order / VACUUM Silver tables.")
+    parser.add_argument("--table", action="append", choices=sorted(SILVER_TABLES), help="Limit to these tables.")
+    parser.add_argument("--path-root", help="Address tables by path: {path-root}/{Name}/data.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report stats and decisions.")
+    parser.add_argument("--min-files", type=int, default=MaintenanceThresholds.min_files)
+    parser.add_argument("--small-file-mb", type=int, default=MaintenanceThresholds.small_file_bytes // (1024 * 1024))
+    parser.add_argument("--small-file-ratio", type=float, default=MaintenanceThresholds.max_small_file_ratio)
+    parser.add_argument("--retain-hours", type=int, default=MaintenanceThresholds.vacuum_retain_hours)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    thresholds = MaintenanceThresholds(
+        small_file_bytes=args.small_file_mb * 1024 * 1024,
+        min_files=args.min_files,
+        max_small_file_ratio=args.small_file_ratio,
+        vacuum_retain_hours=args.retain_hours,
+    )
+    specs = [SILVER_TABLES[name] for name in args.table] if args.table else SILVER_TABLES.values()
+
+    maintain_silver_tables(local_spark("silver_maintenance"), specs, args.path_root, thresholds, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
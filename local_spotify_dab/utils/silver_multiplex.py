@@ -0,0 +1,312 @@
+# ============================================================
+# Multiplexed Silver ingestion: ONE Autoloader stream for Bronze
+#
+# Purpose
+# -------
+# Each Silver table normally has its own stream, so every run pays
+# the fixed per-query cost (file listing, checkpoint commits,
+# scheduling) five times. For the mostly-small dimension deltas
+# that overhead dominates. This module reads the whole `bronze`
+# container with a single stream and routes each micro-batch to
+# the Silver tables in `foreachBatch`.
+#
+# How a micro-batch is processed
+# ------------------------------
+# 1) Every row is tagged with its table from the parent folder of
+#    its file (bronze/<Table>/<file>.parquet)
+# 2) The batch is cached once, then for every table:
+#      - project the table's registered columns (plus the rescue
+#        column, unless the table's schema is pinned)
+#      - apply `to_silver` (types + cleaning)
+#      - append with txnVersion = batch id, or for tables
+#        with `dedup_keys` an insert-only MERGE on those keys (only
+#        the files that can hold the batch's keys are read)
+# 3) The idempotent (txnAppId, txnVersion) writes make the batch
+#    one transaction boundary: on retry, tables that already
+#    committed this batch id skip it, the others append it.
+#    txnAppId = query name + id of the streaming query: a reset
+#    checkpoint restarts at batch 0 under a new id, so its batches
+#    are never mistaken for ones already committed.
+#
+# IMPORTANT
+# ---------
+# The multiplexed stream has its own checkpoint
+# ({silver_base}/_checkpoints/_multiplex). Pick ONE mode per
+# environment: running both modes would ingest every file twice.
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.functions import col, regexp_extract
+from pyspark.sql.streaming import StreamingQuery
+
+from utils.checkpoint_housekeeping import checkpoint_query_id
+from utils.schema_registry import SCHEMA_REGISTRY
+from utils.silver_engine import (
+    RESCUE_OBSERVATION,
+    RESCUED_COLUMN,
+    SILVER_TABLES,
+    SilverTable,
+    autoloader_available,
+    ensure_silver_table,
+    to_silver,
+)
+from utils.storage_paths import StorageLayout
+from utils.stream_metrics import StreamMetricsListener
+
+
+MULTIPLEX_QUERY_NAME: str = "silver_multiplex"
+TABLE_TAG: str = "_bronze_table"
+
+
+# ------------------------------------------------------------
+# 1) Read: one stream over the whole Bronze container
+#
+# pathGlobFilter = "*.parquet":
+#   - skips the ADF watermark files in <Table>_cdc/cdc.json
+#
+# Schema is inferred across all tables (shared columns such as
+# user_id have the same type everywhere); per-table typing happens
+# later through the schema registry. The union of all tables is read
+# in rescue mode, and the "rescue" observation counts rescued rows
+# per table. Routing then follows each table's own setting, so the
+# Silver schema does not depend on the run mode:
+#   - pinned tables get no `_rescued_data` column, and a batch with
+#     rescued data for one fails the stream (as "failOnNewColumns"
+#     does in per-table mode)
+#   - the other tables keep the rescue column
+# ------------------------------------------------------------
+
+def read_bronze_multiplexed(
+    spark: SparkSession,
+    bronze_base: str,
+    silver_base: str,
+    max_files_per_trigger: Optional[int] = None,
+    max_bytes_per_trigger: Optional[str] = None,
+) -> DataFrame:
+    """
+    Create one Autoloader stream over every Bronze table folder.
+
+    Returns
+    -------
+    DataFrame
+        Streaming DataFrame with the union of all Bronze columns plus
+        `_bronze_table` (the table folder of each row's file).
+
+    Outside Databricks the Parquet file source is used, with the merged
+    schema of the files already present (no byte limit).
+    """
+    if autoloader_available():
+        reader = (
+            spark.readStream
+            .format("cloudFiles")
+            .option("cloudFiles.format", "parquet")
+            .option("cloudFiles.schemaEvolutionMode", "rescue")
+            .option("cloudFiles.schemaLocation", StorageLayout(silver_base=silver_base).multiplex_schema_location)
+        )
+        if max_files_per_trigger is not None:
+            reader = reader.option("cloudFiles.maxFilesPerTrigger", str(max_files_per_trigger))
+        if max_bytes_per_trigger is not None:
+            reader = reader.option("cloudFiles.maxBytesPerTrigger", max_bytes_per_trigger)
+    else:
+        schema = (
+            spark.read
+            .option("mergeSchema", "true")
+            .option("pathGlobFilter", "*.parquet")
+            .option("recursiveFileLookup", "true")
+            .parquet(bronze_base)
+            .schema
+        )
+        reader = spark.readStream.format("parquet").schema(schema)
+        if max_files_per_trigger is not None:
+            reader = reader.option("maxFilesPerTrigger", str(max_files_per_trigger))
+
+    reader = reader.option("pathGlobFilter", "*.parquet").option("recursiveFileLookup", "true")
+
+    return (
+        reader.load(bronze_base)
+        .withColumn(TABLE_TAG, regexp_extract(col("_metadata.file_path"), r"/([^/]+)/[^/]+$", 1))
+    )
+
+
+def observe_rescued_by_table(df: DataFrame, specs: Iterable[SilverTable]) -> DataFrame:
+    """
+    Count rescued rows per micro-batch: in total (`rescued_rows`) and
+    per table (`<table>_rescued_rows`).
+    """
+    if RESCUED_COLUMN not in df.columns:
+        return df
+    rescued = col(RESCUED_COLUMN).isNotNull()
+    return df.observe(
+        RESCUE_OBSERVATION,
+        F.count(F.lit(1)).alias("rows"),
+        F.count(F.when(rescued, 1)).alias("rescued_rows"),
+        *[
+            F.count(F.when(rescued & (col(TABLE_TAG) == spec.name), 1)).alias(f"{spec.short_name}_rescued_rows")
+            for spec in specs
+        ],
+    )
+
+
+# ------------------------------------------------------------
+# 2) Route: foreachBatch handler
+# ------------------------------------------------------------
+
+def _rows_for(batch_df: DataFrame, spec: SilverTable) -> DataFrame:
+    """
+    Rows of one table, restricted to that table's Bronze columns.
+
+    Raises
+    ------
+    ValueError
+        If a pinned table has rows with rescued data (schema drift).
+    """
+    registered = SCHEMA_REGISTRY[spec.short_name]
+    columns = [f.name for f in registered.schema.fields if f.name in batch_df.columns]
+    rows = batch_df.where(col(TABLE_TAG) == spec.name)
+
+    if RESCUED_COLUMN not in batch_df.columns:
+        return rows.select(*columns)
+    if not registered.pinned:
+        return rows.select(*columns, RESCUED_COLUMN)
+    if not rows.where(col(RESCUED_COLUMN).isNotNull()).isEmpty():
+        raise ValueError(f"{spec.table}: Bronze columns outside the pinned schema (see {RESCUED_COLUMN})")
+    return rows.select(*columns)
+
+
+def _merge_new_keys(spark: SparkSession, silver: DataFrame, spec: SilverTable, app_id: str, batch_id: int) -> None:
+    """
+    Insert the rows whose `dedup_keys` are not in Silver yet ("first seen wins").
+
+    An insert-only MERGE: only the target files that can hold the
+    batch's keys are read (file skipping on the clustering keys / Bloom
+    filters), instead of every key of the table. Idempotent per batch id.
+    """
+    view = f"_multiplex_{spec.short_name}"
+    silver.createOrReplaceTempView(view)
+    on = " AND ".join(f"t.`{key}` = s.`{key}`" for key in spec.dedup_keys)
+
+    spark.conf.set("spark.databricks.delta.write.txnAppId", app_id)
+    spark.conf.set("spark.databricks.delta.write.txnVersion", str(batch_id))
+    try:
+        spark.sql(f"MERGE INTO {spec.sql_ref} t USING {view} s ON {on} WHEN NOT MATCHED THEN INSERT *")
+    finally:
+        spark.conf.unset("spark.databricks.delta.write.txnAppId")
+        spark.conf.unset("spark.databricks.delta.write.txnVersion")
+
+
+def route_batch(batch_df: DataFrame, batch_id: int, specs: Iterable[SilverTable], app_id: str) -> None:
+    """
+    Append one multiplexed micro-batch to every Silver table it touches.
+
+    Parameters
+    ----------
+    batch_df:
+        Static micro-batch DataFrame from `foreachBatch`.
+    batch_id:
+        Micro-batch id, used as the idempotent `txnVersion`.
+    specs:
+        Tables to route.
+    app_id:
+        Idempotent `txnAppId`, scoped to the streaming query
+        (`run_silver_multiplexed`).
+    """
+    spark = batch_df.sparkSession
+    batch_df.persist()
+
+    try:
+        for spec in specs:
+            rows = _rows_for(batch_df, spec)
+            if rows.isEmpty():
+                continue
+
+            silver = to_silver(rows, spec)
+            ensure_silver_table(spark, spec, silver.schema)
+
+            # Streaming dropDuplicates kept state across batches; in a
+            # static batch the same "first seen wins" rule needs the
+            # keys already written to Silver.
+            if spec.dedup_keys:
+                _merge_new_keys(spark, silver, spec, app_id, batch_id)
+                continue
+
+            writer = (
+                silver.write
+                .format("delta")
+                .mode("append")
+                .option("txnAppId", app_id)
+                .option("txnVersion", batch_id)
+            )
+            if spec.partition_by and not spec.liquid_cluster:
+                writer = writer.partitionBy(*spec.partition_by)
+
+            if spec.location:
+                writer.save(spec.location)
+            else:
+                writer.saveAsTable(spec.table)
+    finally:
+        batch_df.unpersist()
+
+
+# ------------------------------------------------------------
+# 3) Run
+# ------------------------------------------------------------
+
+def run_silver_multiplexed(
+    spark: SparkSession,
+    bronze_base: str,
+    silver_base: str,
+    specs: Iterable[SilverTable] = SILVER_TABLES.values(),
+    metrics: Optional[StreamMetricsListener] = None,
+    max_files_per_trigger: Optional[int] = None,
+    max_bytes_per_trigger: Optional[str] = None,
+) -> StreamingQuery:
+    """
+    Ingest every Bronze table with a single stream, blocking until done.
+
+    Runs trigger(once=True), or trigger(availableNow=True) when a
+    per-trigger limit is given.
+
+    Returns
+    -------
+    StreamingQuery
+        The finished query.
+    """
+    specs = list(specs)
+    df = observe_rescued_by_table(
+        read_bronze_multiplexed(spark, bronze_base, silver_base, max_files_per_trigger, max_bytes_per_trigger),
+        specs,
+    )
+
+    checkpoint = StorageLayout(silver_base=silver_base).multiplex_checkpoint
+    # Resolved on the first batch: the query writes <checkpoint>/metadata when it starts
+    app_ids: Dict[str, str] = {}
+
+    def route(batch_df: DataFrame, batch_id: int) -> None:
+        if checkpoint not in app_ids:
+            app_ids[checkpoint] = f"{MULTIPLEX_QUERY_NAME}_{checkpoint_query_id(batch_df.sparkSession, checkpoint)}"
+        route_batch(batch_df, batch_id, specs, app_ids[checkpoint])
+
+    writer = (
+        df.writeStream
+        .queryName(MULTIPLEX_QUERY_NAME)
+        .option("checkpointLocation", checkpoint)
+        .foreachBatch(route)
+    )
+
+    if max_files_per_trigger is not None or max_bytes_per_trigger is not None:
+        writer = writer.trigger(availableNow=True)
+    else:
+        writer = writer.trigger(once=True)
+
+    query = writer.start()
+    query.awaitTermination()
+
+    if metrics is not None:
+        metrics.record_query(query)
+
+    return query
@@ -0,0 +1,253 @@
+# ============================================================
+# Storage layout: every Bronze / Silver path from one definition
+#
+# Purpose
+# -------
+# 1) Resolve the Bronze and Silver roots LAZILY (on first use) and
+#    cache them for the session, so a notebook that only previews
+#    Bronze never asks the catalog for the Silver location, and no
+#    location is resolved twice.
+# 2) Derive every per-table path from those roots in ONE place
+#    (`StorageLayout`) instead of ad hoc f-strings.
+#
+# Root resolution (in priority order)
+# -----------------------------------
+#   1) Environment variable (BRONZE_BASE_PATH / SILVER_BASE_PATH):
+#      explicit configuration wins and needs no catalog round-trip
+#   2) Unity Catalog external location ("bronze" / "silver")
+#   3) Outside Databricks only: local directory
+#      {SPOTIFY_LOCAL_ROOT or <tmp>/spotify_dab}/<layer>
+#
+# Layout
+# ------
+#   bronze table        : {bronze}/{Name}
+#   silver table data   : {silver}/{Name}/data        (path-addressed tables)
+#   schema location     : {silver}/{Name}/checkpoint/schema
+#   legacy checkpoint   : {silver}/{Name}/checkpoint  (pre-preview streams)
+#   stream checkpoint   : {silver}/_checkpoints/{table}
+#   multiplex checkpoint: {silver}/_checkpoints/_multiplex
+#   multiplex schema    : {silver}/_multiplex/checkpoint/schema
+#   metrics             : {silver}/_metrics/streaming_progress
+#   column profiles     : {silver}/_metrics/column_profile
+#   profile checkpoint  : {silver}/_checkpoints/_profile/{table}
+#
+# Local runs swap in a temp directory with StorageLayout.under(tmp).
+# ============================================================
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Dict, Optional
+
+from pyspark.sql import SparkSession
+
+
+BASE_PATH_ENV: Dict[str, str] = {
+    "bronze": "BRONZE_BASE_PATH",
+    "silver": "SILVER_BASE_PATH",
+}
+LOCAL_ROOT_ENV: str = "SPOTIFY_LOCAL_ROOT"
+
+# Set on every Databricks cluster
+DATABRICKS_RUNTIME_ENV: str = "DATABRICKS_RUNTIME_VERSION"
+
+# Roots resolved in this Python session, by layer
+_RESOLVED: Dict[str, str] = {}
+
+
+def on_databricks() -> bool:
+    """True when running on a Databricks cluster."""
+    return DATABRICKS_RUNTIME_ENV in os.environ
+
+
+# ------------------------------------------------------------
+# 1) Root resolution
+# ------------------------------------------------------------
+
+def get_external_location_url(spark: SparkSession, location_name: str) -> Optional[str]:
+    """
+    Attempt to fetch the URL for a Unity Catalog External Location.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession.
+    location_name:
+        Name of the external location (e.g. "bronze", "silver").
+
+    Returns
+    -------
+    Optional[str]
+        The external location URL with any trailing slash removed,
+        or None if the location cannot be resolved.
+
+    Notes
+    -----
+    Common failure reasons include:
+      - Unity Catalog is not enabled (e.g. local Spark)
+      - The external location does not exist
+      - The current principal lacks permission to DESCRIBE it
+    """
+    try:
+        row = spark.sql(f"DESCRIBE EXTERNAL LOCATION {location_name}").select("url").first()
+    except Exception:
+        # Swallow exceptions intentionally:
+        # this allows a clean fallback to the next strategy
+        return None
+
+    if row and row["url"]:
+        return str(row["url"]).rstrip("/")
+    return None
+
+
+def resolve_base_path(spark: Optional[SparkSession], layer: str) -> str:
+    """
+    Resolve (once per session) the root of a storage layer.
+
+    Parameters
+    ----------
+    spark:
+        Active SparkSession, used for the external-location lookup
+        (skipped when None).
+    layer:
+        "bronze" or "silver".
+
+    Raises
+    ------
+    RuntimeError
+        On Databricks, if neither the environment variable nor the
+        external location is available.
+    """
+    if layer in _RESOLVED:
+        return _RESOLVED[layer]
+
+    env_var = BASE_PATH_ENV[layer]
+    path = os.environ.get(env_var, "").rstrip("/") or None
+
+    if path is None and spark is not None:
+        path = get_external_location_url(spark, layer)
+
+    if path is None and not on_databricks():
+        path = os.path.join(os.environ.get(LOCAL_ROOT_ENV, os.path.join(tempfile.gettempdir(), "spotify_dab")), layer)
+
+    if path is None:
+        raise RuntimeError(
+            f"{layer.capitalize()} base path not found. "
+            f"Grant access to external location '{layer}' "
+            f"or set {env_var}."
+        )
+
+    _RESOLVED[layer] = path
+    return path
+
+
+def clear_resolved_paths() -> None:
+    """Forget the cached roots (e.g. after changing the env variables)."""
+    _RESOLVED.clear()
+
+
+def get_bronze_base_path(spark: Optional[SparkSession] = None) -> str:
+    """Resolve the base path for Bronze storage (no trailing slash)."""
+    return resolve_base_path(spark, "bronze")
+
+
+def get_silver_base_path(spark: Optional[SparkSession] = None) -> str:
+    """Resolve the base path for Silver storage (no trailing slash)."""
+    return resolve_base_path(spark, "silver")
+
+
+# ------------------------------------------------------------
+# 2) Layout
+#
+# Table arguments only need `name` (Bronze folder, e.g. "DimUser")
+# and `short_name` (e.g. "dim_user"), as on `SilverTable`.
+# ------------------------------------------------------------
+
+class StorageLayout:
+    """
+    Every storage path of the Bronze → Silver flow.
+
+    Roots passed explicitly are used as-is; missing ones are resolved
+    on first access through `resolve_base_path` (cached per session).
+
+    Examples
+    --------
+    StorageLayout(spark)                      # resolve lazily
+    StorageLayout(silver_base="/tmp/silver")  # explicit root
+    StorageLayout.under(tmp_path)             # local / tests
+    """
+
+    def __init__(
+        self,
+        spark: Optional[SparkSession] = None,
+        bronze_base: Optional[str] = None,
+        silver_base: Optional[str] = None,
+    ):
+        self._spark = spark
+        self._bronze_base = bronze_base.rstrip("/") if bronze_base else None
+        self._silver_base = silver_base.rstrip("/") if silver_base else None
+
+    @classmethod
+    def under(cls, root: str) -> "StorageLayout":
+        """Layout with both layers below one local directory."""
+        root = str(root).rstrip("/")
+        return cls(bronze_base=f"{root}/bronze", silver_base=f"{root}/silver")
+
+    @property
+    def bronze_base(self) -> str:
+        if self._bronze_base is None:
+            self._bronze_base = resolve_base_path(self._spark, "bronze")
+        return self._bronze_base
+
+    @property
+    def silver_base(self) -> str:
+        if self._silver_base is None:
+            self._silver_base = resolve_base_path(self._spark, "silver")
+        return self._silver_base
+
+    # --------------------------------------------------------
+    # Per-table paths
+    # --------------------------------------------------------
+
+    def bronze_table(self, table) -> str:
+        return f"{self.bronze_base}/{table.name}"
+
+    def table_data(self, table) -> str:
+        return f"{self.silver_base}/{table.name}/data"
+
+    def schema_location(self, table) -> str:
+        return f"{self.silver_base}/{table.name}/checkpoint/schema"
+
+    def legacy_checkpoint(self, table) -> str:
+        return f"{self.silver_base}/{table.name}/checkpoint"
+
+    def checkpoint(self, table) -> str:
+        return f"{self.checkpoints_root}/{table.short_name}"
+
+    def profile_checkpoint(self, table) -> str:
+        return f"{self.checkpoints_root}/_profile/{table.short_name}"
+
+    # --------------------------------------------------------
+    # Shared paths
+    # --------------------------------------------------------
+
+    @property
+    def checkpoints_root(self) -> str:
+        return f"{self.silver_base}/_checkpoints"
+
+    @property
+    def multiplex_checkpoint(self) -> str:
+        return f"{self.checkpoints_root}/_multiplex"
+
+    @property
+    def multiplex_schema_location(self) -> str:
+        return f"{self.silver_base}/_multiplex/checkpoint/schema"
+
+    @property
+    def metrics_target(self) -> str:
+        return f"{self.silver_base}/_metrics/streaming_progress"
+
+    @property
+    def profile_target(self) -> str:
+        return f"{self.silver_base}/_metrics/column_profile"
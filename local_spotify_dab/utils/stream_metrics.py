@@ -0,0 +1,395 @@
+# ============================================================
+# Streaming metrics sink (StreamingQueryListener)
+#
+# Purpose
+# -------
+# Record every micro-batch of every Structured Streaming query
+# (Silver ingestion, and any Gold stream run outside DLT) into a
+# metrics table so batch-duration regressions can be queried over
+# time instead of being noticed when a job runs late.
+#
+# One row per micro-batch, keyed by:
+#   - run_id       : the notebook / job run that produced it
+#   - query_name   : `queryName(...)` of the stream (e.g. "dim_user")
+#   - query_run_id : Spark's run id for that query start
+#   - batch_id
+#
+# Usage
+# -----
+#   metrics = attach_metrics_listener(spark, f"{silver_base}/_metrics/streaming_progress")
+#   ... run streams ...
+#   metrics.flush()
+#
+# NOTE:
+# Listener callbacks only buffer rows in memory. Spark jobs must not
+# be launched from the listener thread, so the buffer is written by
+# an explicit `flush()` (e.g. the last cell of the notebook).
+# ============================================================
+
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.streaming import StreamingQuery, StreamingQueryListener
+from pyspark.sql.types import (
+    DoubleType,
+    LongType,
+    MapType,
+    StringType,
+    StructField,
+    StructType,
+    TimestampType,
+)
+
+
+# ------------------------------------------------------------
+# 1) Metrics table schema
+#
+# duration_ms       : full `durationMs` breakdown (addBatch,
+#                     getBatch, latestOffset, queryPlanning,
+#                     triggerExecution, walCommit, ...)
+# state_*           : summed over all stateful operators
+#                     (e.g. dropDuplicates in dim_user)
+# state_operators   : raw per-operator JSON
+# sources           : per-source start/end offsets (JSON)
+# observed_metrics  : `Dataset.observe` metrics (JSON)
+# rescued_rows      : rows with a non-null `_rescued_data` (from the
+#                     "rescue" observation), NULL if not observed
+# ------------------------------------------------------------
+
+METRICS_SCHEMA = StructType(
+    [
+        StructField("run_id", StringType(), False),
+        StructField("query_name", StringType(), True),
+        StructField("query_id", StringType(), False),
+        StructField("query_run_id", StringType(), False),
+        StructField("batch_id", LongType(), False),
+        StructField("timestamp", TimestampType(), True),
+        StructField("num_input_rows", LongType(), True),
+        StructField("input_rows_per_second", DoubleType(), True),
+        StructField("processed_rows_per_second", DoubleType(), True),
+        StructField("trigger_execution_ms", LongType(), True),
+        StructField("duration_ms", MapType(StringType(), LongType()), True),
+        StructField("state_rows_total", LongType(), True),
+        StructField("state_memory_bytes", LongType(), True),
+        StructField("state_operators", StringType(), True),
+        StructField("sources", StringType(), True),
+        StructField("observed_metrics", StringType(), True),
+        StructField("rescued_rows", LongType(), True),
+    ]
+)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    # Progress timestamps are ISO-8601 UTC, e.g. 2025-10-01T19:49:55.123Z
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+
+
+def _as_float(value: Any) -> Optional[float]:
+    # Rates are NaN / missing for empty batches
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def progress_row(progress: Dict[str, Any], run_id: str) -> Dict[str, Any]:
+    """
+    Flatten one `StreamingQueryProgress` (as a dict) into a metrics row.
+
+    Parameters
+    ----------
+    progress:
+        Progress dict, e.g. `json.loads(event.progress.json)` or an entry
+        of `StreamingQuery.recentProgress`.
+    run_id:
+        Identifier of the surrounding notebook / job run.
+    """
+    state_operators = progress.get("stateOperators") or []
+    observed = progress.get("observedMetrics") or {}
+    rescued = [int(m["rescued_rows"]) for m in observed.values() if m.get("rescued_rows") is not None]
+    duration_ms = {k: int(v) for k, v in (progress.get("durationMs") or {}).items()}
+
+    return {
+        "run_id": run_id,
+        "query_name": progress.get("name"),
+        "query_id": progress["id"],
+        "query_run_id": progress["runId"],
+        "batch_id": int(progress["batchId"]),
+        "timestamp": _parse_timestamp(progress.get("timestamp")),
+        "num_input_rows": int(progress.get("numInputRows") or 0),
+        "input_rows_per_second": _as_float(progress.get("inputRowsPerSecond")),
+        "processed_rows_per_second": _as_float(progress.get("processedRowsPerSecond")),
+        "trigger_execution_ms": duration_ms.get("triggerExecution"),
+        "duration_ms": duration_ms,
+        "state_rows_total": sum(int(op.get("numRowsTotal") or 0) for op in state_operators),
+        "state_memory_bytes": sum(int(op.get("memoryUsedBytes") or 0) for op in state_operators),
+        "state_operators": json.dumps(state_operators),
+        "sources": json.dumps(
+            [
+                {
+                    "description": src.get("description"),
+                    "startOffset": src.get("startOffset"),
+                    "endOffset": src.get("endOffset"),
+                    "numInputRows": src.get("numInputRows"),
+                }
+                for src in progress.get("sources") or []
+            ]
+        ),
+        "observed_metrics": json.dumps(observed),
+        "rescued_rows": sum(rescued) if rescued else None,
+    }
+
+
+# ------------------------------------------------------------
+# 2) Listener
+# ------------------------------------------------------------
+
+class StreamMetricsListener(StreamingQueryListener):
+    """
+    Buffer a metrics row for every micro-batch of every query.
+
+    Attributes
+    ----------
+    target:
+        Path (e.g. "{silver_base}/_metrics/streaming_progress") or
+        table name the buffer is appended to on `flush()`.
+    run_id:
+        Identifier stamped on every row of this run.
+    fmt:
+        "delta" (default) or "parquet" for local runs without Delta.
+    """
+
+    def __init__(self, spark: SparkSession, target: str, run_id: Optional[str] = None, fmt: str = "delta"):
+        self._session = spark
+        self.target = target
+        self.run_id = run_id or uuid.uuid4().hex
+        self.fmt = fmt
+        self._rows: List[Dict[str, Any]] = []
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------
+    # Listener callbacks (buffer only, never launch Spark jobs)
+    # --------------------------------------------------------
+
+    def onQueryStarted(self, event) -> None:
+        pass
+
+    def onQueryProgress(self, event) -> None:
+        self.record(json.loads(event.progress.json))
+
+    def onQueryIdle(self, event) -> None:
+        pass
+
+    def onQueryTerminated(self, event) -> None:
+        pass
+
+    # --------------------------------------------------------
+    # Public helpers
+    # --------------------------------------------------------
+
+    def record(self, progress: Dict[str, Any]) -> None:
+        """Buffer one progress dict (duplicates by run/batch are ignored)."""
+        key = (progress["runId"], progress["batchId"])
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            self._rows.append(progress_row(progress, self.run_id))
+
+    def record_query(self, query: StreamingQuery) -> None:
+        """
+        Buffer `query.recentProgress` synchronously.
+
+        Listener events are delivered asynchronously; calling this after
+        `awaitTermination()` guarantees a finished query's batches are
+        in the buffer before `flush()`.
+        """
+        for progress in query.recentProgress:
+            self.record(progress)
+
+    def flush(self) -> int:
+        """
+        Append buffered rows to the metrics target.
+
+        Returns
+        -------
+        int
+            Number of rows written.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+
+        if not rows:
+            return 0
+
+        writer = (
+            self._session.createDataFrame(rows, METRICS_SCHEMA)
+            .write.format(self.fmt)
+            .mode("append")
+            .option("mergeSchema", "true")  # tables created before newer columns
+        )
+        if "/" in self.target or ":" in self.target:
+            writer.save(self.target)
+        else:
+            writer.saveAsTable(self.target)
+        return len(rows)
+
+
+def attach_metrics_listener(
+    spark: SparkSession,
+    target: str,
+    run_id: Optional[str] = None,
+    fmt: str = "delta",
+) -> StreamMetricsListener:
+    """
+    Create a `StreamMetricsListener` and register it on the session.
+    """
+    listener = StreamMetricsListener(spark, target, run_id, fmt)
+    spark.streams.addListener(listener)
+    return listener
+
+
+# ------------------------------------------------------------
+# 3) Reading the metrics back
+# ------------------------------------------------------------
+
+def load_metrics(spark: SparkSession, target: str, fmt: str = "delta") -> DataFrame:
+    """Read the metrics table written by `StreamMetricsListener.flush`."""
+    if "/" in target or ":" in target:
+        return spark.read.format(fmt).load(target)
+    return spark.read.table(target)
+
+
+def batch_duration_trend(metrics: DataFrame) -> DataFrame:
+    """
+    Daily batch-duration percentiles per query.
+
+    Non-empty batches only, so idle triggers do not hide regressions.
+
+    Returns
+    -------
+    DataFrame
+        query_name, day, batches, input_rows, p50_ms, p95_ms, max_ms
+    """
+    return (
+        metrics
+        .where(F.col("num_input_rows") > 0)
+        .groupBy("query_name", F.to_date("timestamp").alias("day"))
+        .agg(
+            F.count("*").alias("batches"),
+            F.sum("num_input_rows").alias("input_rows"),
+            F.percentile_approx("trigger_execution_ms", 0.5).alias("p50_ms"),
+            F.percentile_approx("trigger_execution_ms", 0.95).alias("p95_ms"),
+            F.max("trigger_execution_ms").alias("max_ms"),
+        )
+        .orderBy("query_name", "day")
+    )
+
+
+def load_dlt_flow_progress(spark: SparkSession, pipeline_id: str) -> DataFrame:
+    """
+    Gold flows run inside a DLT pipeline, where session listeners cannot
+    be registered. DLT records the equivalent per-update progress in its
+    event log; this projects it onto the metrics table's key columns.
+
+    Returns
+    -------
+    DataFrame
+        run_id (update id), query_name (flow name), timestamp,
+        num_output_rows, backlog_bytes, backlog_files
+    """
+    return spark.sql(
+        f"""
+        SELECT
+            origin.update_id AS run_id,
+            origin.flow_name AS query_name,
+            timestamp,
+            CAST(details:flow_progress.metrics.num_output_rows AS BIGINT) AS num_output_rows,
+            CAST(details:flow_progress.metrics.backlog_bytes AS BIGINT) AS backlog_bytes,
+            CAST(details:flow_progress.metrics.backlog_files AS BIGINT) AS backlog_files
+        FROM event_log('{pipeline_id}')
+        WHERE event_type = 'flow_progress'
+        """
+    )
+
+
+def load_dlt_expectations(spark: SparkSession, pipeline_id: str) -> DataFrame:
+    """
+    Per-rule data quality counts of a DLT pipeline, from its event log.
+
+    The Gold staging tables record every rule with `expect_all` (rows
+    are routed to `<table>_quarantine`, not dropped), so these counts
+    match the quarantine contents.
+
+    Returns
+    -------
+    DataFrame
+        run_id (update id), query_name (flow name), timestamp, dataset,
+        rule, passed_records, failed_records
+    """
+    return spark.sql(
+        f"""
+        SELECT
+            origin.update_id AS run_id,
+            origin.flow_name AS query_name,
+            timestamp,
+            e.dataset,
+            e.name AS rule,
+            e.passed_records,
+            e.failed_records
+        FROM event_log('{pipeline_id}')
+        LATERAL VIEW explode(
+            from_json(
+                details:flow_progress.data_quality.expectations,
+                'array<struct<name: string, dataset: string, passed_records: bigint, failed_records: bigint>>'
+            )
+        ) AS e
+        WHERE event_type = 'flow_progress'
+          AND details:flow_progress.data_quality.expectations IS NOT NULL
+        """
+    )
+
+
+def append_dlt_expectations(spark: SparkSession, pipeline_id: str, target: str, fmt: str = "delta") -> int:
+    """
+    Append the per-rule counts newer than the last recorded event.
+
+    Parameters
+    ----------
+    target:
+        Metrics table path (e.g. "{silver_base}/_metrics/dlt_expectations")
+        or name.
+
+    Returns
+    -------
+    int
+        Number of rows appended.
+    """
+    counts = load_dlt_expectations(spark, pipeline_id)
+    try:
+        last = load_metrics(spark, target, fmt).agg(F.max("timestamp")).first()[0]
+    except Exception:
+        # First run: target does not exist yet
+        last = None
+    if last is not None:
+        counts = counts.where(F.col("timestamp") > F.lit(last))
+
+    rows = counts.count()
+    if rows:
+        writer = counts.write.format(fmt).mode("append")
+        if "/" in target or ":" in target:
+            writer.save(target)
+        else:
+            writer.saveAsTable(target)
+    return rows